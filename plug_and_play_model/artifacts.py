@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Output of solution and model files of a run and reading of archived solutions.
+
+"""
+
+import os
+import re
+import gzip
+import numpy as np
+
+import matrix_model
+
+
+# "off": no files, "solution": <run_name>.sol, "full": <run_name>.sol and <run_name>.lp
+artifact_policies = ["off", "solution", "full"]
+
+
+def check_policy(policy):
+    if policy not in artifact_policies:
+        raise ValueError(f"Unknown artifact policy {policy}, use one of {artifact_policies}.")
+
+
+def write_artifacts(model, policy="full", run_name="model", compress=False, result_dir="results"):
+    """
+    Write the solution (and the model) of a solved gurobipy model (or a
+    solvers.Result) into result_dir.
+    With compress=True, gzip-compressed files (.sol.gz, .lp.gz) are written.
+    Returns the paths of the written files.
+    """
+    check_policy(policy)
+    if policy == "off":
+        return []
+
+    if not os.path.exists(result_dir):
+        os.makedirs(result_dir, exist_ok=True)
+
+    extensions = [".sol", ".lp"] if policy == "full" else [".sol"]
+    files = [os.path.join(result_dir, run_name + ext + (".gz" if compress else "")) for ext in extensions]
+    for file in files:
+        model.write(file)
+    return files
+
+
+# Names of scalar variables (see matrix_model.build_hub_problem): name -> (key, device)
+def _scalar_names():
+    names = {}
+    for dev in matrix_model.all_devs:
+        names["x_" + dev] = ("x", dev)
+        names["nominal_capacity_" + dev] = ("cap", dev)
+        for key, prefix in matrix_model.cost_vars:
+            names[prefix + dev] = (key, dev)
+    for dev in ["PV", "STC"]:
+        names["roof_area_" + dev] = ("area", dev)
+    for key in matrix_model.total_vars:
+        names["supply_costs_biomass" if key == "supply_costs_biom" else key] = (key, None)
+    names["total_annualized_costs"] = ("obj", "tac")
+    names["total_CO2"] = ("obj", "co2")
+    return names
+
+
+_series_name = re.compile(r"(\w+)_(\w+?)_d(\d+)(?:_t(\d+))?$")
+
+
+def read_solution(path):
+    """
+    Load a solution file (.sol or .sol.gz) into numpy arrays, keyed like the
+    variable dicts of optim_model.run_optim, e.g.
+
+        sol = read_solution("results/model.sol")
+        sol["cap"]["HP"]          # float
+        sol["heat"]["HP"]         # array (n_clusters x 24)
+        sol["soc"]["TES"]         # array (365 x 24)
+        sol["el_import_total"]    # float
+        sol["obj"]["tac"]         # float
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as file:
+        lines = [line for line in file.read().splitlines() if line and not line.startswith("#")]
+    tokens = " ".join(lines).split()
+    names = tokens[0::2]
+    values = np.array(tokens[1::2], dtype=float)
+
+    scalars = _scalar_names()
+    sol = {}
+    series = {}
+    for name, value in zip(names, values):
+        if name in scalars:
+            key, dev = scalars[name]
+            if dev is None:
+                sol[key] = float(value)
+            else:
+                sol.setdefault(key, {})[dev] = float(value)
+            continue
+        match = _series_name.match(name)
+        if match is None:
+            sol.setdefault("other", {})[name] = float(value)
+            continue
+        m, dev, d, t = match.groups()
+        series.setdefault((m, dev), []).append((int(d), -1 if t is None else int(t), value))
+
+    for (m, dev), entries in series.items():
+        entries = np.array(entries)
+        days = entries[:, 0].astype(int)
+        steps = entries[:, 1].astype(int)
+        if steps[0] < 0:
+            array = np.zeros(days.max() + 1)
+            array[days] = entries[:, 2]
+        else:
+            array = np.zeros((days.max() + 1, steps.max() + 1))
+            array[days, steps] = entries[:, 2]
+        sol.setdefault(m, {})[dev] = array
+    return sol
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Batch runs of the building x size scenario matrix in a process pool.
+Every result_dict is written to <result_dir>/<building>_<size>.json as soon as
+its scenario is finished. Scenarios with a result file are skipped, so a batch
+that was interrupted or had failed scenarios continues when it is started
+again. Run from plug_and_play_model, e.g.
+
+    python batch_run.py --workers 4                      (all buildings)
+    python batch_run.py ac_istzustand pmh_istzustand:dez
+
+"""
+
+import os
+import sys
+import json
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+import demands
+import load_params
+import optim_model
+import solvers
+
+
+# Buildings of run_optim.py with demand profiles in input_data
+buildings = ["ac_istzustand",
+             "ac_sanierterzustand",
+             "pmh_istzustand",
+             "pmh_sanierterzustand",
+             "hnbk_istzustand",
+             "sk_istzustand"]
+
+sizes = ["ref", "dez", "zent"]
+
+devices_to_use = ["HP", "BOI", "EB", "CHP", "BCHP", "PV", "STC", "BAT", "TES"]
+
+
+def default_size(building):
+    """Size of a building as in run_optim.py."""
+    if building == "reference":
+        return "ref"
+    if building.startswith("quart"):
+        return "zent"
+    return "dez"
+
+
+def scenarios(building_list=buildings, size_list=None):
+    """Scenario list: every building with every size of size_list (default: the size of the building)."""
+    return [{"building": building, "size": size}
+            for building in building_list
+            for size in (size_list or [default_size(building)])]
+
+
+def scenario_name(scenario):
+    return scenario["building"] + "_" + scenario["size"]
+
+
+def scenario_params(building, size, devices=None, solver="gurobi", threads=None, n_clusters=8):
+    """load_params with the building specific parameters of run_optim.py."""
+    devices = list(devices_to_use if devices is None else devices)
+    if building.startswith("pmh"):
+        devices = [dev for dev in devices if dev not in ("BCHP", "CHP")]
+
+    param, devs, dem, result_dict = load_params.load_params(building, size, devices, solver, threads,
+                                                            n_clusters=n_clusters)
+
+    param["observation_time"] = 10
+    if building.startswith("ac"):
+        param["roof_area"] = 152
+    if building.startswith("pmh"):
+        param["roof_area"] = 123
+    if building.startswith("hnbk"):
+        param["roof_area"] = 1600
+    if building.startswith("sk"):
+        param["roof_area"] = 0
+    if building.startswith("quart"):
+        param["roof_area"] = 100000
+
+    if building.startswith(("ac", "pmh")):
+        param["enable_supply_heat"] = True
+    if building.startswith(("hnbk", "sk")):
+        param["enable_supply_heat"] = False
+
+    if size == "zent":
+        param["price_supply_el"] = 67
+        param["price_supply_gas"] = 15
+        param["enable_supply_heat"] = False
+        param["enable_supply_el"] = False
+        param["enable_supply_gas"] = False
+        param["feed_in_el_limit"] = 1000000000
+
+    return param, devs, dem, result_dict
+
+
+def run_scenario(scenario, threads=None, options=None):
+    """
+    Run one scenario (called in a worker process).
+    Returns (result_dict, None) or (None, error message) if the scenario failed
+    or has no feasible solution.
+    """
+    options = dict(options or {})
+    try:
+        param, devs, dem, result_dict = scenario_params(scenario["building"], scenario["size"],
+                                                        scenario.get("devices"),
+                                                        options.get("solver", "gurobi"), threads)
+        result_dict = optim_model.run_optim(devs, param, dem, result_dict, run_name=scenario_name(scenario),
+                                            threads=threads, **options)
+        if not result_dict:
+            return None, "No feasible solution found (run_optim returned an empty result_dict).\n"
+        return result_dict, None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(path, data):
+    """Write via a temporary file, so that an interrupted batch leaves no incomplete result files."""
+    with open(path + ".tmp", "w") as json_file:
+        json.dump(data, json_file, indent=4, default=_json_default)
+    os.replace(path + ".tmp", path)
+
+
+def _write_error(path, error):
+    with open(path, "w") as error_file:
+        error_file.write(error)
+
+
+def run_batch(scenario_list, workers=None, result_dir="results/batch", **options):
+    """
+    Run the scenarios in a pool of worker processes.
+
+    workers : Number of worker processes (default: number of cores). The cores
+              are split between the workers: every solver (clustering and energy
+              hub model) uses cores // workers threads.
+    options : Passed to optim_model.run_optim (e.g. builder, solver, prune).
+              artifact_policy defaults to "solution" (results/<building>_<size>.sol).
+
+    Results are written to <result_dir>/<building>_<size>.json, errors to
+    <result_dir>/<building>_<size>.error.txt (also for infeasible scenarios).
+    Scenarios with a result file are skipped. Buildings without demand profiles
+    in input_data fail before the pool is started. Returns the names of the
+    failed scenarios.
+    """
+    options.setdefault("artifact_policy", "solution")
+    os.makedirs(result_dir, exist_ok=True)
+
+    pending = [scenario for scenario in scenario_list
+               if not os.path.exists(os.path.join(result_dir, scenario_name(scenario) + ".json"))]
+    n_pending = len(pending)
+    print("%d scenarios, %d already done." % (len(scenario_list), len(scenario_list) - n_pending))
+
+    failed = []
+    known = demands.buildings(load_params.default_input_dir)
+    for scenario in [scenario for scenario in pending if scenario["building"] not in known]:
+        name = scenario_name(scenario)
+        error_path = os.path.join(result_dir, name + ".error.txt")
+        _write_error(error_path, "No demand profiles of building " + scenario["building"] + " in "
+                     + load_params.default_input_dir + ".\n")
+        failed.append(name)
+        pending.remove(scenario)
+        print("Scenario " + name + " failed (see " + error_path + ").")
+    if not pending:
+        return failed
+
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, len(pending))
+    threads = max(1, cores // workers)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_scenario, scenario, threads, options): scenario for scenario in pending}
+        for future in as_completed(futures):
+            name = scenario_name(futures[future])
+            result_path = os.path.join(result_dir, name + ".json")
+            error_path = os.path.join(result_dir, name + ".error.txt")
+            try:
+                result_dict, error = future.result()
+            except Exception:  # worker process died
+                result_dict, error = None, traceback.format_exc()
+
+            if error is None:
+                _write_json(result_path, result_dict)
+                if os.path.exists(error_path):
+                    os.remove(error_path)
+                print("Scenario " + name + " done.")
+            else:
+                _write_error(error_path, error)
+                failed.append(name)
+                print("Scenario " + name + " failed (see " + error_path + ").")
+
+    print("Batch finished: %d of %d scenarios failed." % (len(failed), n_pending))
+    return failed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Run the building x size scenario matrix.")
+    parser.add_argument("scenarios", nargs="*",
+                        help="building or building:size (default: all buildings with their size)")
+    parser.add_argument("--sizes", nargs="*", choices=sizes,
+                        help="sizes for every building (default: size of the building)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--result-dir", default="results/batch")
+    parser.add_argument("--builder", default="dict", choices=["dict", "matrix"])
+    parser.add_argument("--solver", default="gurobi", choices=solvers.solver_names)
+    args = parser.parse_args()
+
+    if args.scenarios:
+        scenario_list = []
+        for item in args.scenarios:
+            building, _, size = item.partition(":")
+            scenario_list += [{"building": building, "size": size}] if size else scenarios([building], args.sizes)
+    else:
+        scenario_list = scenarios(buildings, args.sizes)
+
+    failed = run_batch(scenario_list, args.workers, args.result_dir, builder=args.builder, solver=args.solver)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,670 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Benchmarks for model set-up and solution. Run from the repository root, e.g.
+
+    python plug_and_play_model/benchmark.py builders ac_sanierterzustand
+
+"""
+
+import os
+import sys
+import json
+import copy
+import math
+import time
+import multiprocessing as mp
+import numpy as np
+
+import load_params
+import clustering_medoid
+import k_medoids
+import optim_model
+import matrix_model
+import solvers
+import portfolio
+import bounds
+import scaling
+import refinement
+import profiles
+import weather
+import demands
+from run_metrics import RunMetrics, peak_memory
+
+
+def _canonical(model):
+    """
+    Canonical form of a gurobipy model: variables by name and the set of rows.
+    Zero coefficients are dropped, '>=' rows are turned into '<=' rows and
+    equality rows are scaled such that their first coefficient is positive.
+    """
+    model.update()
+    variables = model.getVars()
+    names = model.getAttr("VarName", variables)
+    columns = {name: (lb, ub, obj, vtype) for name, lb, ub, obj, vtype in
+               zip(names, model.getAttr("LB", variables), model.getAttr("UB", variables),
+                   model.getAttr("Obj", variables), model.getAttr("VType", variables))}
+
+    constrs = model.getConstrs()
+    A = model.getA().tocsr()
+    senses = model.getAttr("Sense", constrs)
+    rhs = model.getAttr("RHS", constrs)
+    rows = set()
+    for i in range(A.shape[0]):
+        cols = A.indices[A.indptr[i]:A.indptr[i+1]]
+        vals = A.data[A.indptr[i]:A.indptr[i+1]]
+        terms = sorted((names[c], val) for c, val in zip(cols, vals) if val != 0)
+        sign = -1 if senses[i] == ">" or (senses[i] == "=" and terms and terms[0][1] < 0) else 1
+        sense = "<" if senses[i] == ">" else senses[i]
+        rows.add((sense, float("%.12g" % (sign * rhs[i])),
+                  tuple((name, float("%.12g" % (sign * val))) for name, val in terms)))
+    return columns, rows
+
+
+def compare_models(model_a, model_b):
+    """
+    Check whether two models have the same variables (names, bounds, objective
+    coefficients, types) and the same constraints. Rows which are added more than
+    once are only counted once. Returns a list of differences (empty if identical).
+    """
+    cols_a, rows_a = _canonical(model_a)
+    cols_b, rows_b = _canonical(model_b)
+    diff = []
+    for name in sorted(set(cols_a) ^ set(cols_b)):
+        diff.append("variable only in one model: " + name)
+    for name in sorted(set(cols_a) & set(cols_b)):
+        if cols_a[name] != cols_b[name]:
+            diff.append("variable differs: %s %s %s" % (name, cols_a[name], cols_b[name]))
+    for row in rows_a - rows_b:
+        diff.append("row only in first model: " + str(row)[:200])
+    for row in rows_b - rows_a:
+        diff.append("row only in second model: " + str(row)[:200])
+    return diff
+
+
+def _build(builder, devs, param, dem, queue):
+    """Build the model in a fresh process and report build time and peak memory."""
+    rss_before = peak_memory()
+    start = time.perf_counter()
+    if builder == "matrix":
+        model, v = matrix_model.build_gurobi_model(devs, param, dem)
+    else:
+        model, v = optim_model._build_dict_model(devs, param, dem)
+    model.update()
+    build_time = time.perf_counter() - start
+
+    queue.put({"builder": builder,
+               "build_time": build_time,
+               "peak_memory_MB": peak_memory() - rss_before,
+               "num_vars": model.NumVars,
+               "num_constrs": model.NumConstrs,
+               "num_nz": model.NumNZs})
+
+
+def bench_builders(devs, param, dem):
+    """
+    Compare the dict-based and the matrix builder: build time, peak memory and
+    model size. Each builder runs in its own process. Also checks that both
+    builders create the same model.
+    """
+    results = []
+    queue = mp.Queue()
+    for builder in ["dict", "matrix"]:
+        proc = mp.Process(target=_build, args=(builder, devs, param, dem, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+
+    model_dict, _ = optim_model._build_dict_model(devs, param, dem)
+    model_matrix, _ = matrix_model.build_gurobi_model(devs, param, dem)
+    diff = compare_models(model_dict, model_matrix)
+
+    for res in results:
+        print("%-7s build %8.3f s | peak memory %8.1f MB | %d vars, %d constrs, %d nz"
+              % (res["builder"], res["build_time"], res["peak_memory_MB"],
+                 res["num_vars"], res["num_constrs"], res["num_nz"]))
+    print("Speed-up matrix vs. dict: %.1fx" % (results[0]["build_time"] / results[1]["build_time"]))
+    print("Models identical: %s" % (not diff))
+    for line in diff[:20]:
+        print("  " + line)
+    return results, diff
+
+
+def bench_session(devs, param, dem, result_dict, prices=(0.25, 0.30, 0.35, 0.40)):
+    """
+    Electricity price sweep: one run_optim call (new model) per price compared
+    with one HubModel session that is patched between the solves.
+    """
+    start = time.perf_counter()
+    for price in prices:
+        param_price = copy.deepcopy(param)
+        param_price["price_supply_el"] = price
+        optim_model.run_optim(devs, param_price, dem, copy.deepcopy(result_dict), builder="matrix",
+                              artifact_policy="off")
+    time_rebuild = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hub = optim_model.HubModel(devs, param, dem)
+    for price in prices:
+        hub.update_param(price_supply_el=price)
+        hub.optimize(copy.deepcopy(result_dict), artifact_policy="off")
+    time_session = time.perf_counter() - start
+
+    print("%d prices: run_optim %.2f s | HubModel %.2f s" % (len(prices), time_rebuild, time_session))
+    return time_rebuild, time_session
+
+
+def bench_prune(devs, param, dem):
+    """
+    Full vs. pruned matrix model (infeasible devices left out): build time,
+    model size, solve time and objective value.
+    """
+    results = []
+    for prune in [False, True]:
+        start = time.perf_counter()
+        model, v = matrix_model.build_gurobi_model(devs, param, dem, prune)
+        build_time = time.perf_counter() - start
+
+        model.Params.MIPGap = 0.02
+        model.Params.OutputFlag = 0
+        start = time.perf_counter()
+        model.optimize()
+        solve_time = time.perf_counter() - start
+
+        results.append({"prune": prune,
+                        "build_time": build_time,
+                        "solve_time": solve_time,
+                        "num_vars": model.NumVars,
+                        "num_constrs": model.NumConstrs,
+                        "obj": model.ObjVal if model.SolCount > 0 else float("nan")})
+
+    print("Pruned devices: " + ", ".join(matrix_model.pruned_devices(devs)))
+    for res in results:
+        print("%-6s build %7.3f s | solve %8.3f s | %d vars, %d constrs | tac %.2f"
+              % ("pruned" if res["prune"] else "full", res["build_time"], res["solve_time"],
+                 res["num_vars"], res["num_constrs"], res["obj"]))
+    return results
+
+
+def bench_storage(devs, param, dem, storage=("TES", "BAT", "H2S", "GS")):
+    """
+    Chain vs. superposition storage model for the given storage devices (which
+    are made feasible): state of charge variables and constraints, build time,
+    solve time and objective value.
+    """
+    devs = copy.deepcopy(devs)
+    for dev in storage:
+        devs[dev]["feasible"] = True
+
+    results = []
+    for storage_model in ["chain", "superposition"]:
+        for dev in storage:
+            devs[dev]["storage_model"] = storage_model
+
+        start = time.perf_counter()
+        problem, v = matrix_model.build_hub_problem(devs, param, dem)
+        model, x = problem.to_gurobi()
+        build_time = time.perf_counter() - start
+
+        # state of charge variables and constraints of the compared storages
+        sto_vars = sum(1 for name in problem.var_names
+                       if name.startswith("soc") and name.split("_d")[0].rsplit("_", 1)[1] in storage)
+        sto_rows = sum(rows.size for name, rows in problem.blocks.items()
+                       if name.startswith(("soc", "storage")) and name.rsplit("_", 1)[1] in storage)
+
+        model.Params.MIPGap = 0.02
+        model.Params.OutputFlag = 0
+        start = time.perf_counter()
+        model.optimize()
+        solve_time = time.perf_counter() - start
+
+        results.append({"storage_model": storage_model,
+                        "storage_vars": sto_vars,
+                        "storage_constrs": sto_rows,
+                        "num_vars": model.NumVars,
+                        "build_time": build_time,
+                        "solve_time": solve_time,
+                        "obj": model.ObjVal if model.SolCount > 0 else float("nan")})
+
+    for res in results:
+        print("%-13s soc: %6d vars, %6d constrs | total %d vars | build %6.3f s | solve %8.3f s | tac %.2f"
+              % (res["storage_model"], res["storage_vars"], res["storage_constrs"], res["num_vars"],
+                 res["build_time"], res["solve_time"], res["obj"]))
+    print("Storage model size reduction: %.1fx" % (results[0]["storage_vars"] / results[1]["storage_vars"]))
+    return results
+
+
+def bench_pareto(devs, param, dem, result_dict, n_points=10):
+    """
+    Cost-CO2 Pareto front: HubModel.pareto (one model, warm-started points)
+    compared with one run_optim call per CO2 limit of the front.
+    """
+    start = time.perf_counter()
+    hub = optim_model.HubModel(devs, param, dem)
+    front = hub.pareto(n_points)
+    time_pareto = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tac = []
+    for co2 in front["co2"]:
+        param_limit = copy.deepcopy(param)
+        param_limit["co2_limit"] = co2 + 1e-6
+        result = optim_model.run_optim(devs, param_limit, dem, copy.deepcopy(result_dict),
+                                       builder="matrix", artifact_policy="off")
+        tac.append(result["Total Costs"]["Total annualized costs"] if result else float("nan"))
+    time_runs = time.perf_counter() - start
+
+    for point, tac_run in zip(front, tac):
+        print("co2 %12.2f | tac %12.2f (run_optim %12.2f)" % (point["co2"], point["tac"], tac_run))
+    print("%d points: HubModel.pareto %.2f s | run_optim %.2f s" % (len(front), time_pareto, time_runs))
+    return front, time_pareto, time_runs
+
+
+def bench_lp(devs, param, dem, solver="gurobi"):
+    """
+    The hub model as MILP (purchase binaries fixed by equality rows) vs. the same
+    model as LP (fixed binaries turned into continuous variables) with different
+    LP algorithms: solve time, speed-up and objective value.
+    """
+    cases = [("MILP", False, None, True),
+             ("LP", True, None, True),
+             ("LP barrier", True, "barrier", True),
+             ("LP dual simplex", True, "dual", True),
+             ("LP barrier, no crossover", True, "barrier", False)]
+    results = []
+    for label, fix_binaries, lp_method, crossover in cases:
+        problem, v = matrix_model.build_hub_problem(devs, param, dem)
+        if fix_binaries:
+            problem.fix_integers()
+        result = solvers.solve(problem, solver, mip_gap=0.02, lp_method=lp_method, crossover=crossover)
+        results.append({"case": label,
+                        "mip": problem.is_mip(),
+                        "solve_time": result.runtime,
+                        "status": result.status,
+                        "obj": result.obj})
+
+    for res in results:
+        print("%-25s solve %8.3f s | speed-up %5.1fx | %-10s | tac %.2f"
+              % (res["case"], res["solve_time"], results[0]["solve_time"] / res["solve_time"],
+                 res["status"], res["obj"]))
+    return results
+
+
+def bench_portfolio(devs, param, dem, result_dict, solver="gurobi"):
+    """
+    Device portfolio with minimum sizes: two-pass workflow (solve, remove devices
+    below the minimum sizes, solve again) vs. one solve with free purchase
+    decisions (see portfolio.py). Time, objective value and installed devices.
+    """
+    builder = "dict" if solver == "gurobi" else "matrix"
+    results = []
+    for mode in ["two-pass", "free portfolio"]:
+        start = time.perf_counter()
+        if mode == "two-pass":
+            result, removed = portfolio.run_two_pass(devs, param, dem, copy.deepcopy(result_dict), builder=builder,
+                                                     solver=solver, artifact_policy="off")
+        else:
+            result = portfolio.run_portfolio(devs, param, dem, copy.deepcopy(result_dict), builder=builder,
+                                             solver=solver, artifact_policy="off")
+        results.append({"mode": mode,
+                        "time": time.perf_counter() - start,
+                        "tac": result["Total Costs"]["Total annualized costs"] if result else float("nan"),
+                        "devices": {dev: res["cap"] for dev, res in result.get("Devices", {}).items()}})
+
+    for res in results:
+        print("%-15s %8.2f s | tac %10.2f | %s" % (res["mode"], res["time"], res["tac"],
+                                                ", ".join("%s %.1f" % item for item in res["devices"].items())))
+    return results
+
+
+def bench_bounds(devs, param, dem, result_dict, solver="gurobi"):
+    """
+    Solution with and without the estimated capacity and grid bounds (see
+    bounds.py), for fixed purchase decisions and for a free portfolio (where
+    max_cap is the big-M of the purchase decision). Time, number of solves
+    and objective value (must be the same with and without bounds).
+    """
+    builder = "dict" if solver == "gurobi" else "matrix"
+    results = []
+    for mode in ["fixed", "free portfolio"]:
+        if mode == "fixed":
+            devs_mode, param_mode = devs, param
+        else:
+            devs_mode, param_mode = portfolio.set_min_sizes(copy.deepcopy(devs), param), dict(param, free_portfolio=True)
+        for tighten in [False, True]:
+            start = time.perf_counter()
+            if tighten:
+                result, n_solves = bounds.run_tightened(devs_mode, param_mode, dem, copy.deepcopy(result_dict),
+                                                        builder=builder, solver=solver, artifact_policy="off")
+            else:
+                result, n_solves = optim_model.run_optim(devs_mode, param_mode, dem, copy.deepcopy(result_dict),
+                                                         builder=builder, solver=solver, artifact_policy="off"), 1
+            results.append({"mode": mode, "bounds": tighten,
+                            "time": time.perf_counter() - start,
+                            "solves": n_solves,
+                            "tac": result["Total Costs"]["Total annualized costs"] if result else float("nan")})
+
+    for res in results:
+        print("%-15s bounds %-5s %8.2f s | %d solve(s) | tac %10.2f" % (res["mode"], res["bounds"], res["time"],
+                                                                      res["solves"], res["tac"]))
+    return results
+
+
+def bench_scaling(devs, param, dem, solver="gurobi"):
+    """
+    Solution of the matrix built model with and without scaling (see scaling.py)
+    for the default LP method, barrier and barrier without crossover:
+    coefficient ranges, solution time and objective value.
+    """
+    problem, v = matrix_model.build_hub_problem(devs, param, dem)
+    problem.fix_integers()
+    scaled, col_scale, obj_scale = scaling.scale_problem(problem)
+    print(scaling.format_ranges(scaling.coefficient_ranges(problem), scaling.coefficient_ranges(scaled)))
+
+    results = []
+    for name, options in [("default", {}), ("barrier", {"lp_method": "barrier"}),
+                          ("no crossover", {"crossover": False})]:
+        for scale in [False, True]:
+            result = solvers.solve(problem, solver, mip_gap=0.02, scale=scale, **options)
+            results.append({"case": name, "scale": scale, "time": result.runtime, "obj": result.obj})
+
+    for res in results:
+        print("%-13s scaled %-5s %8.2f s | obj %10.2f" % (res["case"], res["scale"], res["time"], res["obj"]))
+    return results
+
+
+def _loop_profiles(devs, T_air, wind_speed):
+    """COP and wind turbine power with one function call per time step (reference of bench_profiles)."""
+    power_curve = dict(enumerate(zip(profiles.wt_curve_speed, profiles.wt_curve_power)))
+    wind_speed_corr = wind_speed * (devs["WT"]["hub_h"] / devs["WT"]["ref_h"]) ** devs["WT"]["h_coeff"]
+    eta_carnot, supply_temp = devs["HP"]["eta_carnot"], devs["HP"]["supply_temp"]
+    COP = np.zeros(np.shape(T_air))
+    WT_power = np.zeros(np.shape(wind_speed))
+    for idx in np.ndindex(np.shape(T_air)):
+        COP[idx] = eta_carnot * (supply_temp+273.15)/(supply_temp-T_air[idx])
+        WT_power[idx] = load_params.get_turbine_power(wind_speed_corr[idx], power_curve)
+    return COP, WT_power / profiles.wt_rated_power
+
+
+def bench_profiles(devs=None, repeats=20):
+    """
+    Device profiles (COP, wind turbine, PV, STC) from the weather data of the
+    input directory: loops vs. profiles.py for design days (12 x 24) and a
+    full year (8760). Checks that the results are identical.
+    devs defaults to the reference device data (input_data/devs_ref.json).
+    """
+    input_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input_data")
+    if devs is None:
+        with open(os.path.join(input_dir, "devs_ref.json"), "r") as file:
+            devs = json.load(file)
+    weather_data = weather.load_weather(os.path.join(input_dir, "DEU_Dusseldorf.104000_IWEC.epw"))
+    series = {name: np.array(weather_data[name]) for name in weather.series_names}
+
+    results = []
+    for case, shape in [("design days", (12, 24)), ("full year", (8760,))]:
+        data = {name: values[:int(np.prod(shape))].reshape(shape) for name, values in series.items()}
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            COP_loop, WT_loop = _loop_profiles(devs, data["T_air"], data["wind_speed"])
+        loop_time = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            device_profiles = profiles.device_profiles(devs, data["T_air"], data["GHI"], data["DHI"],
+                                                       data["wind_speed"])
+        vector_time = (time.perf_counter() - start) / repeats
+
+        identical = (np.array_equal(COP_loop, device_profiles["COP_HP"])
+                     and np.allclose(WT_loop, device_profiles["norm_power_WT"], rtol=1e-12, atol=1e-12))
+        results.append({"case": case, "loop_time": loop_time, "vector_time": vector_time, "identical": identical})
+
+    for res in results:
+        print("%-12s loops (COP, WT) %8.3f ms | profiles.py (COP, WT, PV, STC) %7.3f ms | identical %s"
+              % (res["case"], 1e3 * res["loop_time"], 1e3 * res["vector_time"], res["identical"]))
+    return results
+
+
+def _loop_distances(values, norm=2):
+    """Distance matrix with one function call per pair of days (former clustering_medoid._distances)."""
+    d = np.zeros((values.shape[1], values.shape[1]))
+    for i in range(values.shape[1]):
+        for j in range(i+1, values.shape[1]):
+            d[i, j] = math.pow(np.sum(np.power(np.abs(values[:, i] - values[:, j]), norm)), 1/norm)
+    return d + d.T
+
+
+def bench_distances(norms=(2, 1, 3), seed=0, max_loop_days=365):
+    """
+    Distance matrix of the design day clustering (8 time series, scaled to 0...1):
+    pairwise loops vs. clustering_medoid._distances for one year (hourly and
+    15-minute resolution) and ten years (hourly). The loops are only timed for
+    up to max_loop_days days. Checks that the results agree.
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for case, n_days, steps in [("1 year, 1 h", 365, 24), ("1 year, 15 min", 365, 96),
+                                ("10 years, 1 h", 3650, 24)]:
+        values = rng.random((8 * steps, n_days))
+        for norm in norms:
+            start = time.perf_counter()
+            d = clustering_medoid._distances(values, norm)
+            vector_time = time.perf_counter() - start
+
+            loop_time, identical = float("nan"), None
+            if n_days <= max_loop_days:
+                start = time.perf_counter()
+                d_loop = _loop_distances(values, norm)
+                loop_time = time.perf_counter() - start
+                identical = np.allclose(d, d_loop, rtol=1e-9, atol=1e-9)
+            results.append({"case": case, "norm": norm, "loop_time": loop_time, "vector_time": vector_time,
+                            "identical": identical})
+
+    for res in results:
+        print("%-15s p = %d | loops %8.3f s | _distances %8.3f s | identical %s"
+              % (res["case"], res["norm"], res["loop_time"], res["vector_time"], res["identical"]))
+    return results
+
+
+def _clustering_inputs(building):
+    """Time series of the design day clustering of a building (as in load_params)."""
+    input_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input_data")
+    weather_data = weather.load_weather(os.path.join(input_dir, "DEU_Dusseldorf.104000_IWEC.epw"))
+    dem_uncl, _ = demands.load_demands(building, input_dir)
+    return np.array([dem_uncl["heat"], dem_uncl["cool"], dem_uncl["power"], dem_uncl["hydrogen"],
+                     weather_data["T_air"], weather_data["GHI"], weather_data["DHI"], weather_data["wind_speed"]])
+
+
+def bench_clustering(building="ac_sanierterzustand", n_clusters=(4, 8, 12), solver="gurobi",
+                     time_limit=300, mip_gap=0.02):
+    """
+    Engines of the k-medoids problem (see k_medoids.engines) on the distance
+    matrix of the design day clustering of a building: time and objective value.
+    The gaps are relative to the MIP with binary assignments (which itself is
+    only optimal up to mip_gap or the time limit).
+    """
+    d = clustering_medoid.day_distances(_clustering_inputs(building))
+    engines = {"pam": lambda k: k_medoids.k_medoids_pam(d, k),
+               "reduced": lambda k: k_medoids.k_medoids_reduced(d, k, time_limit, mip_gap, solver),
+               "mip": lambda k: k_medoids.k_medoids(d, k, time_limit, mip_gap, solver)}
+    results = []
+    for k in n_clusters:
+        res = {"n_clusters": k}
+        for engine, k_medoids_engine in engines.items():
+            start = time.perf_counter()
+            res[engine] = {"obj": k_medoids_engine(k)[2], "time": time.perf_counter() - start}
+        for engine in engines:
+            res[engine]["gap"] = res[engine]["obj"] / res["mip"]["obj"] - 1
+        results.append(res)
+
+    for res in results:
+        print("k = %2d | " % res["n_clusters"]
+              + " | ".join("%s %9.3f s, obj %9.4f (%+.3f %%)" % (engine, res[engine]["time"], res[engine]["obj"],
+                                                                100 * res[engine]["gap"]) for engine in engines))
+    return results
+
+
+def bench_full_year(building="ac_sanierterzustand", solver="gurobi"):
+    """
+    Design days (clustered) vs. full year (365 x 24, see load_params with
+    full_year=True), both with the matrix builder: model size, time of model
+    set-up and solution, peak memory and objective value. The difference of the
+    objective values is the error of the design day clustering.
+    """
+    results = []
+    for mode in ["design days", "full year"]:
+        param, devs, dem, result_dict = _load(building, solver, full_year=(mode == "full year"))
+        metrics = RunMetrics()
+        result = optim_model.run_optim(devs, param, dem, result_dict, builder="matrix", solver=solver,
+                                       artifact_policy="off", metrics=metrics)
+        problem, v = matrix_model.build_hub_problem(devs, param, dem)
+        results.append({"mode": mode,
+                        "rows": problem.num_rows,
+                        "cols": problem.num_vars,
+                        "build_time": metrics["build"]["time"] + metrics["model"]["time"],
+                        "solve_time": metrics["solve"]["time"],
+                        "peak_memory_MB": max(phase["peak_memory_MB"] for phase in metrics.values()),
+                        "tac": result["Total Costs"]["Total annualized costs"] if result else float("nan")})
+
+    for res in results:
+        print("%-12s %7d rows %7d cols | build %7.3f s | solve %8.2f s | peak memory %7.1f MB | tac %10.2f (%+.2f %%)"
+              % (res["mode"], res["rows"], res["cols"], res["build_time"], res["solve_time"], res["peak_memory_MB"],
+                 res["tac"], 100 * (res["tac"] / results[-1]["tac"] - 1)))
+    return results
+
+
+# Buildings with demand files in input_data: roof area and heat supply as in run_optim.py
+shipped_buildings = ["ac_istzustand", "ac_sanierterzustand", "pmh_istzustand", "pmh_sanierterzustand",
+                     "hnbk_istzustand", "sk_istzustand"]
+roof_areas = {"ac": 152, "pmh": 123, "hnbk": 1600, "sk": 0, "quart": 100000}
+
+
+def bench_solvers(buildings=shipped_buildings, solver_names=("gurobi", "highs")):
+    """
+    Gurobi vs. HiGHS for the shipped buildings: design day clustering
+    (load_params), model set-up and solution time and objective value.
+    """
+    results = []
+    for building in buildings:
+        for solver in solver_names:
+            start = time.perf_counter()
+            param, devs, dem, result_dict = _load(building, solver)
+            clustering_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            problem, v = matrix_model.build_hub_problem(devs, param, dem)
+            build_time = time.perf_counter() - start
+
+            result = solvers.solve(problem, solver, mip_gap=0.02)
+
+            results.append({"building": building,
+                            "solver": solver,
+                            "clustering_time": clustering_time,
+                            "build_time": build_time,
+                            "solve_time": result.runtime,
+                            "status": result.status,
+                            "obj": result.obj})
+
+    for res in results:
+        print("%-20s %-7s clustering %7.2f s | build %6.3f s | solve %8.3f s | %-10s | tac %.2f"
+              % (res["building"], res["solver"], res["clustering_time"], res["build_time"],
+                 res["solve_time"], res["status"], res["obj"]))
+    return results
+
+
+def bench_refinement(building="ac_sanierterzustand", solver="gurobi", k_start=4, k_step=2, k_max=12):
+    """
+    Design day refinement (refinement.refine) without and with warm start: solve
+    time and total annualized costs of every step. The design days of all steps
+    are clustered before, and every step is solved (no convergence check).
+    """
+    loaded = {k: _load(building, solver, n_clusters=k) for k in range(k_start, k_max + 1, k_step)}
+
+    def load(n_clusters):
+        return copy.deepcopy(loaded[n_clusters])
+
+    results = []
+    for warm_start in [False, True]:
+        refined = refinement.refine(load, k_start, k_step, k_max, tac_tol=0, cap_tol=0, cap_abs_tol=0,
+                                    warm_start=warm_start, solver=solver)
+        results += [dict(step, warm_start=warm_start) for step in refined["history"]]
+
+    for res in results:
+        print("warm start %-5s | design days %2d | %8.2f s | tac %.2f"
+              % (res["warm_start"], res["n_clusters"], res["time"], res["tac"]))
+    for warm_start in [False, True]:
+        print("warm start %-5s | total %8.2f s" % (warm_start, sum(res["time"] for res in results
+                                                                 if res["warm_start"] == warm_start)))
+    return results
+
+
+def _load(building, solver="gurobi", full_year=False, n_clusters=8):
+    size = "zent" if building.startswith("quart") else "dez"
+    devices = ["HP", "BOI", "EB", "CHP", "BCHP", "PV", "STC", "BAT", "TES"]
+    if building.startswith("pmh"):
+        devices = [dev for dev in devices if dev not in ("CHP", "BCHP")]
+    param, devs, dem, result_dict = load_params.load_params(building, size, devices, solver, full_year=full_year,
+                                                            n_clusters=n_clusters)
+    param["roof_area"] = roof_areas.get(building.split("_")[0], 152)
+    if building.startswith(("ac", "pmh")):
+        param["enable_supply_heat"] = True
+    if building.startswith(("hnbk", "sk")):
+        param["enable_supply_heat"] = False
+    return param, devs, dem, result_dict
+
+
+if __name__ == "__main__":
+
+    task = sys.argv[1] if len(sys.argv) > 1 else "builders"
+    building = sys.argv[2] if len(sys.argv) > 2 else "ac_sanierterzustand"
+
+    if task == "solvers":
+        bench_solvers(shipped_buildings if len(sys.argv) <= 2 else sys.argv[2:])
+        sys.exit()
+    if task == "full_year":
+        bench_full_year(building, sys.argv[3] if len(sys.argv) > 3 else "gurobi")
+        sys.exit()
+    if task == "profiles":
+        bench_profiles()
+        sys.exit()
+    if task == "distances":
+        bench_distances()
+        sys.exit()
+    if task == "refinement":
+        bench_refinement(building, sys.argv[3] if len(sys.argv) > 3 else "gurobi")
+        sys.exit()
+    if task == "clustering":
+        bench_clustering(building, solver=sys.argv[3] if len(sys.argv) > 3 else "gurobi")
+        sys.exit()
+
+    param, devs, dem, result_dict = _load(building)
+
+    if task == "builders":
+        bench_builders(devs, param, dem)
+    elif task == "session":
+        bench_session(devs, param, dem, result_dict)
+    elif task == "prune":
+        bench_prune(devs, param, dem)
+    elif task == "storage":
+        bench_storage(devs, param, dem)
+    elif task == "pareto":
+        bench_pareto(devs, param, dem, result_dict)
+    elif task == "portfolio":
+        bench_portfolio(devs, param, dem, result_dict, sys.argv[3] if len(sys.argv) > 3 else "gurobi")
+    elif task == "bounds":
+        bench_bounds(devs, param, dem, result_dict, sys.argv[3] if len(sys.argv) > 3 else "gurobi")
+    elif task == "scaling":
+        bench_scaling(devs, param, dem, sys.argv[3] if len(sys.argv) > 3 else "gurobi")
+    elif task == "lp":
+        bench_lp(devs, param, dem, sys.argv[3] if len(sys.argv) > 3 else "gurobi")
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Tight upper bounds of the device capacities and grid limits:
+
+- the default bounds (devs[dev]["max_cap"], e.g. 10000 kW, and unlimited grid
+  limits) are replaced by estimates derived from the peak demands, the roof
+  area and the conversion efficiencies of the devices,
+- the estimates are checked after the solve: if a capacity or grid flow reaches
+  its estimated bound, the bound is dropped and the model is solved again.
+
+With fixed purchase decisions (the default), the model is an LP, and a
+solution at which no estimated bound is active is also optimal without the
+bounds. With param["free_portfolio"] (MIP), this is not guaranteed: another
+device selection could need a capacity above an estimated bound. The result
+is then the optimum of the bounded model.
+
+The bounds are opt-in: run_optim solves without them, they are only applied
+by run_tightened (or by apply_bounds before calling run_optim).
+
+"""
+
+import copy
+import numpy as np
+
+import optim_model
+
+
+margin = 2  # ---, safety factor of the estimated bounds
+
+heat_devs = ["EB", "BOI", "GHP", "BBOI", "WBOI"]
+chp_devs = ["CHP", "BCHP", "WCHP"]
+storage_carriers = {"TES": "heat", "CTES": "cool", "BAT": "power", "GS": "gas", "H2S": "hydrogen"}
+
+
+def _annual(series, param):
+    """Annual sum of a design-day time series."""
+    return float(np.sum(np.asarray(series).sum(axis=1) * param["day_weights"]))
+
+
+def estimate_bounds(devs, param, dem, margin=margin):
+    """
+    Upper estimates of the capacities of the feasible devices and of the grid limits.
+
+    Peak demands of the carriers including the conversion of the devices (e.g.
+    heat for the absorption chiller, electricity for heat pump and electric
+    boiler) are multiplied by margin. Storages are bounded by the annual
+    energy of their carrier (chain storage model: storage over the year).
+    PV and STC are bounded by the roof area (exact, no margin). Infeasible
+    devices are not bounded (their capacity is fixed to min_cap).
+
+    Returns {"cap": {dev: kW or kWh}, "area": {dev: m2}, "grid": {"el": kW, "gas": kW, "heat": kW}}.
+    """
+    feasible = [dev for dev in devs if devs[dev]["feasible"]]
+
+    def use(dev, value):
+        return value if dev in feasible else 0
+
+    # Peak loads of the carriers (kW): demands and consumption of the converting devices
+    cool = param["peak_cool"]
+    heat = param["peak_heat"] + use("AC", cool / devs["AC"]["eta_th"])
+    cop_hp = float(np.min(devs["HP"]["COP"]))
+    power = (param["peak_power"]
+             + use("HP", max(heat / cop_hp, cool / max(cop_hp - 1, 1)))
+             + use("EB", heat / devs["EB"]["eta_th"])
+             + use("CC", cool / devs["CC"]["COP"]))
+    gas = (use("BOI", heat / devs["BOI"]["eta_th"])
+           + use("GHP", heat / devs["GHP"]["COP"])
+           + use("CHP", heat / devs["CHP"]["eta_th"]))
+    hydrogen = (param["peak_hydrogen"]
+                + use("FC", power / devs["FC"]["eta_el"])
+                + use("SAB", gas / devs["SAB"]["eta"]))
+
+    cap = {}
+    for dev in heat_devs:
+        cap[dev] = margin * heat
+    for dev in chp_devs:
+        cap[dev] = margin * heat * max(1, devs[dev]["eta_el"] / devs[dev]["eta_th"])
+    cap["HP"] = margin * max(heat, cool)
+    cap["CC"] = margin * cool
+    cap["AC"] = margin * cool
+    for dev in ["WT", "WAT", "FC"]:
+        cap[dev] = margin * power
+    cap["ELYZ"] = margin * hydrogen / devs["ELYZ"]["eta_el"]
+    cap["SAB"] = margin * gas
+
+    area = {}
+    for dev in ["PV", "STC"]:
+        area[dev] = min(devs[dev]["max_area"], param["roof_area"])
+        cap[dev] = area[dev] * devs[dev]["G_stc"] * devs[dev]["eta"]
+
+    # Annual energy of the carriers (kWh)
+    hours = 8760
+    energy = {"heat": _annual(dem["heat"], param) + use("AC", _annual(dem["cool"], param) / devs["AC"]["eta_th"]),
+              "cool": _annual(dem["cool"], param),
+              "power": _annual(dem["power"], param) + (power - param["peak_power"]) * hours,
+              "gas": gas * hours,
+              "hydrogen": _annual(dem["hydrogen"], param) + (hydrogen - param["peak_hydrogen"]) * hours}
+    for dev, carrier in storage_carriers.items():
+        cap[dev] = margin * energy[carrier]
+
+    power_generation = sum(use(dev, cap[dev]) for dev in ["PV", "WT", "WAT", "FC"] + chp_devs)
+    grid = {"el": max(margin * power, power_generation),
+            "gas": max(margin * gas, use("SAB", cap["SAB"])),
+            "heat": max(margin * heat, sum(use(dev, cap[dev]) for dev in chp_devs))}
+
+    # Devices without a positive estimate (e.g. no hydrogen demand) keep their maximum capacity
+    cap = {dev: value for dev, value in cap.items() if dev in feasible and value > 0}
+    area = {dev: value for dev, value in area.items() if dev in feasible}
+    return {"cap": cap, "area": area, "grid": grid}
+
+
+def apply_bounds(devs, param, bounds):
+    """
+    Copies of devs and param with the bounds (see estimate_bounds) as maximum
+    capacities and grid limits. Bounds never loosen the user input and never
+    fall below the minimum capacities.
+    """
+    devs = copy.deepcopy(devs)
+    param = dict(param)
+    for dev, value in bounds["cap"].items():
+        if dev in bounds["area"]:  # PV and STC: capacity follows from the area
+            continue
+        devs[dev]["max_cap"] = max(min(devs[dev]["max_cap"], value), devs[dev]["min_cap"])
+    for dev, value in bounds["area"].items():
+        devs[dev]["max_area"] = max(min(devs[dev]["max_area"], value), devs[dev]["min_area"])
+    for carrier, value in bounds["grid"].items():
+        if param["enable_cap_limit_" + carrier]:
+            value = min(value, param["cap_limit_" + carrier])
+        param["enable_cap_limit_" + carrier] = True
+        param["cap_limit_" + carrier] = value
+    return devs, param
+
+
+def active_bounds(result_dict, full, bounds, tol=1e-3):
+    """
+    Bounds which are reached by the solution: device capacities and peak grid
+    flows (import or export) within tol (relative) of their bound.
+    Returns {"cap": [devices], "grid": [carriers]}.
+    """
+    active = {"cap": [], "grid": []}
+    for dev, value in bounds["cap"].items():
+        if dev in bounds["area"]:  # roof area, exact bound
+            continue
+        if dev in result_dict["Devices"] and result_dict["Devices"][dev]["cap"] >= value * (1 - tol):
+            active["cap"].append(dev)
+    flows = {"el": "power", "gas": "gas", "heat": "heat"}
+    for carrier, value in bounds["grid"].items():
+        peak = max(full.peak(flows[carrier] + "_" + direction) for direction in ["import", "export"]
+                   if flows[carrier] + "_" + direction in full)
+        if peak >= value * (1 - tol):
+            active["grid"].append(carrier)
+    return active
+
+
+def run_tightened(devs, param, dem, result_dict, margin=margin, **kwargs):
+    """
+    Solve the energy hub model with the estimated bounds (see estimate_bounds).
+    Bounds that are reached by the solution are dropped and the model is solved
+    again, until no estimated bound is active. For the LP (fixed purchase
+    decisions) the optimum is the same as without bounds; with
+    param["free_portfolio"] it is the optimum of the bounded model (see module
+    docstring). kwargs are passed to optim_model.run_optim. Returns result_dict
+    and the number of solves.
+    """
+    bounds = estimate_bounds(devs, param, dem, margin)
+    n_solves = 0
+    while True:
+        devs_tight, param_tight = apply_bounds(devs, param, bounds)
+        result, full = optim_model.run_optim(devs_tight, param_tight, dem, result_dict,
+                                             return_series=True, **kwargs)
+        n_solves += 1
+        if not result:
+            # Infeasible with the bounds: solve without them
+            break
+        active = active_bounds(result, full, bounds)
+        if not active["cap"] and not active["grid"]:
+            return result, n_solves
+        for dev in active["cap"]:
+            del bounds["cap"][dev]
+        for carrier in active["grid"]:
+            del bounds["grid"][carrier]
+
+    return optim_model.run_optim(devs, param, dem, result_dict, **kwargs), n_solves + 1
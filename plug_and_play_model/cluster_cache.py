@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Disk cache of the design day clustering (clustering_medoid.cluster).
+
+The results are stored in <cache_dir>/<key>.npz, the key is a hash of the
+input time series and the clustering settings (number of clusters, norm,
+weights, mip_gap, time_limit, engine). Repeated runs with the same demands and
+weather data load the design days instead of solving the k-medoids problem.
+The day matrix z is stored as the design day of every day (365 integers).
+If the cache is larger than max_size_MB (default 100 MB), the least recently
+used entries are deleted (the newest entry is kept); max_size_MB=0 disables
+the cache: nothing is stored and existing entries are deleted.
+
+    cached_cluster(inputs, 8, norm=2, mip_gap=0.02)   (same arguments as cluster)
+    store(inputs, 8, (scaled_typ_days, nc, z))         (clustering computed elsewhere)
+    invalidate(key)                                    (one entry)
+    invalidate()                                       (whole cache)
+
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+import clustering_medoid as clustering
+
+
+# results/cluster_cache of the repository, independent of the working directory
+default_cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results", "cluster_cache")
+default_max_size_MB = 100
+
+
+def cache_key(inputs, number_clusters, norm=2, time_limit=300, mip_gap=0.0, weights=None, engine="mip"):
+    """Hash of the inputs and settings of the clustering."""
+    inputs = np.ascontiguousarray(inputs, dtype=float)
+    settings = {"shape": inputs.shape,
+                "number_clusters": int(number_clusters),
+                "norm": norm,
+                "time_limit": time_limit,
+                "mip_gap": mip_gap,
+                "weights": None if weights is None else [float(w) for w in weights],
+                "engine": engine}
+    digest = hashlib.sha256(inputs.tobytes())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _day_matrix(assignment):
+    """Day matrix z (z[medoid, day] = 1) from the medoid of every day."""
+    z = np.zeros((assignment.size, assignment.size))
+    z[assignment, np.arange(assignment.size)] = 1
+    return z
+
+
+def _load(path):
+    with np.load(path) as data:
+        clustered_series = list(data["clustered_series"])
+        nc = data["nc"]
+        z = _day_matrix(data["assignment"])
+    os.utime(path)  # time of last use (least recently used entries are removed first)
+    return clustered_series, nc, z
+
+
+def _store(path, clustered_series, nc, assignment, cache_dir, max_size_MB):
+    if max_size_MB > 0:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path[:-len(".npz")] + "." + str(os.getpid()) + ".tmp.npz"  # parallel runs (batch_run.py)
+        np.savez_compressed(tmp_path, clustered_series=np.array(clustered_series), nc=nc, assignment=assignment)
+        os.replace(tmp_path, path)
+    _evict(cache_dir, max_size_MB)
+
+
+def _entries(cache_dir):
+    """Cache files with size and time of last use, least recently used first."""
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npz") and not name.endswith(".tmp.npz"):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    return sorted(entries)
+
+
+def _evict(cache_dir, max_size_MB):
+    entries = _entries(cache_dir)
+    size = sum(entry[1] for entry in entries)
+    if max_size_MB > 0:
+        entries = entries[:-1]  # the newest entry is kept
+    for _, entry_size, name in entries:
+        if size <= max_size_MB * 1e6 and max_size_MB > 0:
+            break
+        os.remove(os.path.join(cache_dir, name))
+        size -= entry_size
+
+
+def cached_cluster(inputs, number_clusters=12, norm=2, time_limit=300, mip_gap=0.0,
+                   weights=None, solver="gurobi", threads=None, engine="mip",
+                   cache_dir=None, max_size_MB=None):
+    """
+    clustering_medoid.cluster with disk cache. Returns (scaled_typ_days, nc, z)
+    like cluster; z contains exact zeros and ones.
+    The solver and the number of threads are not part of the key.
+    cache_dir and max_size_MB default to default_cache_dir and default_max_size_MB.
+    """
+    cache_dir = cache_dir or default_cache_dir
+    max_size_MB = default_max_size_MB if max_size_MB is None else max_size_MB
+    key = cache_key(inputs, number_clusters, norm, time_limit, mip_gap, weights, engine)
+    path = os.path.join(cache_dir, key + ".npz")
+    if max_size_MB > 0 and os.path.exists(path):
+        return _load(path)
+
+    clustered_series, nc, z = clustering.cluster(inputs, number_clusters, norm=norm, time_limit=time_limit,
+                                                 mip_gap=mip_gap, weights=weights, solver=solver, threads=threads,
+                                                 engine=engine)
+    assignment = np.argmax(z, axis=0)
+    _store(path, clustered_series, nc, assignment, cache_dir, max_size_MB)
+    return clustered_series, nc, _day_matrix(assignment)
+
+
+def store(inputs, number_clusters, clustering_result, norm=2, time_limit=300, mip_gap=0.0,
+          weights=None, engine="mip", cache_dir=None, max_size_MB=None):
+    """
+    Store a clustering (scaled_typ_days, nc, z) of cluster with these arguments,
+    e.g. one selected by design_days.select_n_clusters. Returns the key.
+    """
+    cache_dir = cache_dir or default_cache_dir
+    max_size_MB = default_max_size_MB if max_size_MB is None else max_size_MB
+    key = cache_key(inputs, number_clusters, norm, time_limit, mip_gap, weights, engine)
+    clustered_series, nc, z = clustering_result
+    _store(os.path.join(cache_dir, key + ".npz"), clustered_series, nc, np.argmax(z, axis=0),
+           cache_dir, max_size_MB)
+    return key
+
+
+def invalidate(key=None, cache_dir=None):
+    """Delete one cache entry (key, see cache_key) or the whole cache (key=None)."""
+    cache_dir = cache_dir or default_cache_dir
+    names = [key + ".npz"] if key is not None else [entry[2] for entry in _entries(cache_dir)]
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
@@ -20,7 +20,10 @@ import numpy as np
 import math
 import k_medoids
 
-def _distances(values, norm=2):
+# Maximum number of values of the temporary arrays of _distances (8 bytes each)
+max_block_elements = 2**22
+
+def _distances(values, norm=2, block_size=None):
     """
     Compute distance matrix for all data sets (rows of values)
     
@@ -30,33 +33,94 @@ def _distances(values, norm=2):
         Rows represent days and columns values
     norm : integer, optional
         Compute the distance according to this norm. 2 is the standard
-        Euklidean-norm.
+        Euklidean-norm, np.inf the maximum norm.
+    block_size : integer, optional
+        Number of days whose distances are computed at once. By default, the
+        blocks are chosen such that the temporary arrays stay below
+        max_block_elements values (e.g. for multi-year inputs).
     
     Return
     ------
     d : 2-dimensional array
         Distances between each data set
     """
-    # Initialize distance matrix
-    d = np.zeros((values.shape[1], values.shape[1]))
+    # One day per row
+    days = np.asarray(values, dtype=float).T
+    n_days = days.shape[0]
+    d = np.zeros((n_days, n_days))
+
+    if norm == 2:
+        # Gram-matrix identity: |a - b|^2 = |a|^2 + |b|^2 - 2 a.b
+        squared = np.einsum("ij,ij->i", days, days)
+        if block_size is None:
+            block_size = max(1, max_block_elements // max(n_days, 1))
+        for lb in range(0, n_days, block_size):
+            ub = min(lb + block_size, n_days)
+            block = squared[lb:ub, None] + squared[None, :] - 2 * days[lb:ub] @ days.T
+            d[lb:ub] = np.sqrt(np.maximum(block, 0))
+    else:
+        # Broadcasting of a block of days against all days (block x days x values)
+        if block_size is None:
+            block_size = max(1, max_block_elements // max(n_days * days.shape[1], 1))
+        for lb in range(0, n_days, block_size):
+            ub = min(lb + block_size, n_days)
+            diff = np.abs(days[lb:ub, None, :] - days[None, :, :])
+            if np.isinf(norm):
+                d[lb:ub] = diff.max(axis=2)
+            else:
+                d[lb:ub] = np.power(np.sum(np.power(diff, norm), axis=2), 1/norm)
+
+    # Remember: The d matrix is symmetrical (with zeros on the main diagonal)!
+    d = (d + d.T) / 2
+    np.fill_diagonal(d, 0)
+    
+    return d
 
-    # Define a function that computes the distance between two days
-    dist = (lambda day1, day2, r: 
-            math.pow(np.sum(np.power(np.abs(day1 - day2), r)), 1/r))
 
-    # Remember: The d matrix is symmetrical!
-    for i in range(values.shape[1]): # loop over first days
-        for j in range(i+1, values.shape[1]): # loop second days
-            d[i, j] = dist(values[:,i], values[:,j], norm)
+def _transform(inputs, weights=None):
+    """
+    Reshape the inputs to days (columns) and scale each input to values between
+    0 and 1 (times the square root of its weight). Returns the scaled days
+    (all inputs stacked) and the reshaped unscaled inputs.
+    """
+    # Determine time steps per day
+    len_day = int(inputs.shape[1] / 365)
     
-    # Fill the remaining entries
-    d = d + d.T
+    # Set weights if not already given
+    if weights is None:
+        weights = np.ones(inputs.shape[0])
+    elif not sum(weights) == 1: # Rescale weights
+        weights = np.array(weights) / sum(weights)
     
-    return d
+    # Manipulate inputs
+    # Initialize arrays
+    inputsTransformed = []
+    inputsScaledTransformed = []
+    
+    # Fill and reshape
+    # Scaling to values between 0 and 1, thus all inputs shall have the same
+    # weight and will be clustered equally in terms of quality 
+    for i in range(inputs.shape[0]):
+        vals = inputs[i,:]
+        if np.max(vals) == np.min(vals):
+            temp = np.zeros_like(vals)
+        else:
+            temp = ((vals - np.min(vals)) / (np.max(vals) - np.min(vals))
+                    * math.sqrt(weights[i]))
+        inputsScaledTransformed.append(temp.reshape((len_day, 365), order="F"))
+        inputsTransformed.append(vals.reshape((len_day, 365), order="F"))
+
+    # Put the scaled and reshaped inputs together
+    return np.concatenate(tuple(inputsScaledTransformed)), inputsTransformed
+
+
+def day_distances(inputs, norm=2, weights=None):
+    """Distance matrix of the days of inputs (365 x 365) as used by cluster."""
+    return _distances(_transform(inputs, weights)[0], norm)
 
 
 def cluster(inputs, number_clusters=12, norm=2, time_limit=300, mip_gap=0.0,
-            weights=None):
+            weights=None, solver="gurobi", threads=None, engine="mip", distances=None):
     """
     Cluster a set of inputs into clusters by solving a k-medoid problem.
     
@@ -76,6 +140,19 @@ def cluster(inputs, number_clusters=12, norm=2, time_limit=300, mip_gap=0.0,
         Optimality tolerance (0: proven global optimum)
     weights : 1-dimensional array, optional
         Weight for each input. If not provided, all inputs are treated equally.
+    solver : string, optional
+        Solver of the k-medoids problem: "gurobi" or "highs"
+    threads : integer, optional
+        Number of solver threads (default: all cores)
+    engine : string, optional
+        "mip" (exact k-medoids problem, see k_medoids.k_medoids), "reduced"
+        (exact, continuous assignments and FasterPAM start, see
+        k_medoids.k_medoids_reduced) or "pam" (FasterPAM heuristic, see
+        k_medoids.k_medoids_pam; time_limit, mip_gap, solver and threads are
+        not used)
+    distances : 2-dimensional array, optional
+        Distance matrix of the days (see day_distances), e.g. computed once for
+        several numbers of clusters
     
     Returns
     -------
@@ -86,43 +163,22 @@ def cluster(inputs, number_clusters=12, norm=2, time_limit=300, mip_gap=0.0,
     z : 2-dimensional array
         Mapping of each day to the clusters
     """
+    k_medoids.check_engine(engine)
+    
     # Determine time steps per day
     len_day = int(inputs.shape[1] / 365)
     
-    # Set weights if not already given
-    if weights == None:
-        weights = np.ones(inputs.shape[0])
-    elif not sum(weights) == 1: # Rescale weights
-        weights = np.array(weights) / sum(weights)
-    
-    # Manipulate inputs
-    # Initialize arrays
-    inputsTransformed = []
-    inputsScaled = []
-    inputsScaledTransformed = []
-    
-    # Fill and reshape
-    # Scaling to values between 0 and 1, thus all inputs shall have the same
-    # weight and will be clustered equally in terms of quality 
-    for i in range(inputs.shape[0]):
-        vals = inputs[i,:]
-        if np.max(vals) == np.min(vals):
-            temp = np.zeros_like(vals)
-        else:
-            temp = ((vals - np.min(vals)) / (np.max(vals) - np.min(vals))
-                    * math.sqrt(weights[i]))
-        inputsScaled.append(temp)
-        inputsScaledTransformed.append(temp.reshape((len_day, 365), order="F"))
-        inputsTransformed.append(vals.reshape((len_day, 365), order="F"))
-
-    # Put the scaled and reshaped inputs together
-    L = np.concatenate(tuple(inputsScaledTransformed))
-
-    # Compute distances
-    d = _distances(L, norm)
+    # Scaled days and distances
+    L, inputsTransformed = _transform(inputs, weights)
+    d = _distances(L, norm) if distances is None else distances
 
     # Execute optimization model
-    (y, z, obj) = k_medoids.k_medoids(d, number_clusters, time_limit, mip_gap)
+    if engine == "pam":
+        (y, z, obj) = k_medoids.k_medoids_pam(d, number_clusters)
+    elif engine == "reduced":
+        (y, z, obj) = k_medoids.k_medoids_reduced(d, number_clusters, time_limit, mip_gap, solver, threads)
+    else:
+        (y, z, obj) = k_medoids.k_medoids(d, number_clusters, time_limit, mip_gap, solver, threads)
     
     # Section 2.3 and retain typical days
     nc = np.zeros_like(y)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Demand profiles of all buildings in one binary file (input_data/demands.npy).
+
+The text profiles demand_<carrier>_<building>.txt (8760 hourly values) are
+imported once into one record per building (carriers x 8760). The file is
+memory-mapped, so loading the demands of a building takes milliseconds and
+parallel processes (batch_run.py) share the pages. The store is imported
+again if a profile was changed, added or removed. If the store cannot be
+written (e.g. read-only input directory), the profiles read from the text
+files are used.
+
+Every profile has a status: "ok", "missing" (no file) or "invalid" (not
+8760 values or not readable); the status of all profiles is returned by
+import_demands.
+
+    dem_uncl, missing = load_demands("ac_istzustand", input_dir)
+
+"""
+
+import os
+import numpy as np
+
+
+carriers = ["heat", "power", "cool", "hydrogen"]
+file_prefixes = {"heat": "demand_heating_", "power": "demand_electricity_",
+                 "cool": "demand_cooling_", "hydrogen": "demand_hydrogen_"}
+required_carriers = ["heat", "power"]
+store_name = "demands.npy"
+
+n_steps = 8760
+status_codes = {0: "missing", 1: "ok", 2: "invalid"}
+
+
+def _dtype():
+    return np.dtype([("building", "U64"),
+                     ("status", np.int8, (len(carriers),)),
+                     ("source_size", np.int64, (len(carriers),)),
+                     ("source_mtime_ns", np.int64, (len(carriers),)),
+                     ("profiles", float, (len(carriers), n_steps))])
+
+
+def _profile_path(input_dir, carrier, building):
+    return os.path.join(input_dir, file_prefixes[carrier] + building + ".txt")
+
+
+def _source_stamps(input_dir, building):
+    """Size and modification time of the profiles of a building (-1 if missing)."""
+    sizes, mtimes = [], []
+    for carrier in carriers:
+        try:
+            stat = os.stat(_profile_path(input_dir, carrier, building))
+            sizes.append(stat.st_size)
+            mtimes.append(stat.st_mtime_ns)
+        except FileNotFoundError:
+            sizes.append(-1)
+            mtimes.append(-1)
+    return sizes, mtimes
+
+
+def read_profile(path):
+    """Read a text profile (one value per line, UTF-8 or UTF-16 with byte order mark)."""
+    with open(path, "rb") as file:
+        content = file.read()
+    encoding = "utf-16" if content[:2] in (b"\xff\xfe", b"\xfe\xff") else "utf-8-sig"
+    return np.loadtxt(content.decode(encoding).splitlines(), ndmin=1)
+
+
+def buildings(input_dir):
+    """Buildings with at least one demand profile in input_dir."""
+    names = set()
+    for name in os.listdir(input_dir):
+        for prefix in file_prefixes.values():
+            if name.startswith(prefix) and name.endswith(".txt"):
+                names.add(name[len(prefix):-len(".txt")])
+    return sorted(names)
+
+
+def _read_records(input_dir):
+    """Records of all buildings (see _dtype) and {building: {carrier: status}}."""
+    building_list = buildings(input_dir)
+    records = np.zeros(len(building_list), dtype=_dtype())
+    report = {}
+    for i, building in enumerate(building_list):
+        records["building"][i] = building
+        records["source_size"][i], records["source_mtime_ns"][i] = _source_stamps(input_dir, building)
+        report[building] = {}
+        for k, carrier in enumerate(carriers):
+            path = _profile_path(input_dir, carrier, building)
+            if not os.path.exists(path):
+                status = 0
+            else:
+                try:
+                    profile = read_profile(path)
+                    status = 1 if profile.size == n_steps else 2
+                except (ValueError, UnicodeDecodeError):
+                    status = 2
+                if status == 1:
+                    records["profiles"][i, k] = profile
+            records["status"][i, k] = status
+            report[building][carrier] = status_codes[status]
+    return records, report
+
+
+def _write_store(store_file, records):
+    tmp_file = store_file[:-len(".npy")] + "." + str(os.getpid()) + ".tmp.npy"
+    np.save(tmp_file, records)
+    os.replace(tmp_file, store_file)
+
+
+def import_demands(input_dir, store_file=None):
+    """
+    Import the text profiles of all buildings into store_file (default:
+    input_dir/demands.npy). Returns {building: {carrier: status}}.
+    """
+    records, report = _read_records(input_dir)
+    _write_store(store_file or os.path.join(input_dir, store_name), records)
+    return report
+
+
+def _find(records, input_dir, building):
+    """Index of the up-to-date record of a building (None if missing or outdated)."""
+    index = np.flatnonzero(records["building"] == building)
+    if index.size == 0:
+        return None
+    sizes, mtimes = _source_stamps(input_dir, building)
+    if list(records["source_size"][index[0]]) != sizes or list(records["source_mtime_ns"][index[0]]) != mtimes:
+        return None
+    return int(index[0])
+
+
+def load_demands(building, input_dir, store_file=None):
+    """
+    Demand profiles of a building: {carrier: array of 8760 values (read-only,
+    memory-mapped)} and the list of carriers without profile (zeros).
+    Raises KeyError if input_dir has no profile of the building and ValueError
+    if a profile is invalid or heat or power are missing.
+    """
+    if all(size == -1 for size in _source_stamps(input_dir, building)[0]):
+        raise KeyError(f"No demand profiles for building {building} in {input_dir}.")
+
+    store_file = store_file or os.path.join(input_dir, store_name)
+    index = None
+    if os.path.exists(store_file):
+        records = np.load(store_file, mmap_mode="r")
+        index = _find(records, input_dir, building)
+    if index is None:
+        records, _ = _read_records(input_dir)
+        try:
+            _write_store(store_file, records)
+            records = np.load(store_file, mmap_mode="r")
+        except OSError:  # e.g. read-only input directory: the parsed data is used
+            pass
+        index = _find(records, input_dir, building)
+    if index is None:
+        raise ValueError(f"Demand profiles of building {building} changed during the import.")
+
+    status = records["status"][index]
+    invalid = [carrier for k, carrier in enumerate(carriers) if status[k] == 2]
+    if invalid:
+        raise ValueError(f"Invalid demand profiles of building {building} (not {n_steps} values "
+                         f"or not readable): {', '.join(invalid)}.")
+    missing = [carrier for k, carrier in enumerate(carriers) if status[k] == 0]
+    if any(carrier in required_carriers for carrier in missing):
+        raise ValueError(f"Missing demand profiles of building {building}: {', '.join(missing)}.")
+
+    profiles = records["profiles"][index]
+    return {carrier: profiles[k] for k, carrier in enumerate(carriers)}, missing
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Selection of the number of design days. The time series are clustered for a
+range of numbers of clusters in a process pool (one distance matrix for all of
+them, see clustering_medoid.day_distances). Each clustering is scored by how
+well the design days represent the year, per time series:
+
+    rmse           : root mean square error of the hourly values
+    peak           : deviation of the maximum
+    duration_curve : root mean square error of the sorted hourly values
+    annual_sum     : deviation of the annual sum (relative to the annual sum)
+
+rmse, peak and duration_curve are relative to the range (max - min) of the
+time series. The smallest number of clusters whose errors are within the
+tolerances for all time series is selected.
+
+The default acceptance criteria are reduced to duration_curve (0.035) and
+annual_sum (0.01): single-hour peaks are rarely part of a medoid day, so peak
+(and rmse) hardly decrease with more design days (for ac_sanierterzustand, the
+peak deviation of the heat and power demand stays at about 0.6 up to 24 design
+days), and tolerances on them would always select the largest number. The
+selected design days therefore do not guarantee the peak values. rmse and peak
+are still checked against report_tolerances (0.15 and 0.1), and violations are
+reported for the selected number. With the default tolerances, 6 to 13 design
+days are selected for the ac and pmh buildings. Example:
+
+    k, (clustered_series, nc, z), scores = select_n_clusters(inputs, range(4, 17))
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+import clustering_medoid as clustering
+
+
+error_names = ["rmse", "peak", "duration_curve", "annual_sum"]
+
+default_tolerances = {"duration_curve": 0.035, "annual_sum": 0.01}
+report_tolerances = {"rmse": 0.15, "peak": 0.1}
+
+
+def design_day_sigma(z):
+    """Design day of every day (index in the design days of cluster) from the day matrix z."""
+    medoids = np.flatnonzero(np.sum(z, axis=1) > 0)
+    return np.searchsorted(medoids, np.argmax(z, axis=0))
+
+
+def representation_errors(inputs, clustered_series, z):
+    """
+    Errors of the design days (clustered_series and z, see clustering_medoid.cluster)
+    for every time series of inputs: {error name: array (number of time series)}.
+    """
+    sigma = design_day_sigma(z)
+    errors = {name: np.zeros(len(inputs)) for name in error_names}
+    for j, series in enumerate(inputs):
+        series = np.asarray(series, dtype=float)
+        year = np.asarray(clustered_series[j])[sigma].ravel()
+        value_range = np.max(series) - np.min(series)
+        if value_range > 0:
+            errors["rmse"][j] = np.sqrt(np.mean((year - series) ** 2)) / value_range
+            errors["peak"][j] = abs(np.max(year) - np.max(series)) / value_range
+            errors["duration_curve"][j] = np.sqrt(np.mean((np.sort(year) - np.sort(series)) ** 2)) / value_range
+        if np.sum(series) != 0:
+            errors["annual_sum"][j] = abs(np.sum(year) / np.sum(series) - 1)
+    return errors
+
+
+def meets_tolerances(errors, tolerances):
+    """True if the errors of all time series are within the tolerances (missing names are not checked)."""
+    return all(np.max(errors[name]) <= tol for name, tol in tolerances.items())
+
+
+def violations(errors, tolerances):
+    """Time series whose errors exceed the tolerances: {error name: indices}, only names with violations."""
+    exceeded = {name: np.flatnonzero(errors[name] > tol) for name, tol in tolerances.items()}
+    return {name: indices for name, indices in exceeded.items() if indices.size}
+
+
+def _cluster(inputs, number_clusters, distances, options):
+    clustering_result = clustering.cluster(inputs, number_clusters, distances=distances, **options)
+    return number_clusters, clustering_result
+
+
+def select_n_clusters(inputs, k_range=range(4, 25), tolerances=None, norm=2, weights=None, engine="pam",
+                      workers=None, report=None, **options):
+    """
+    Cluster inputs (see clustering_medoid.cluster) for every number of clusters
+    of k_range and select the smallest one whose representation errors are
+    within tolerances (default: default_tolerances). If no number of clusters
+    meets the tolerances, the largest one is selected. Errors of the selected
+    number above report (default: report_tolerances) are printed.
+
+    workers : Number of worker processes (default: number of cores, 1: no process
+              pool). The cores are split between the workers (solver threads of
+              the MIP engines).
+    options : Passed to clustering_medoid.cluster (e.g. solver, mip_gap, time_limit).
+
+    Returns the number of clusters, its clustering (clustered_series, nc, z) and
+    the errors of all numbers of clusters {k: {error name: array}}.
+    """
+    tolerances = default_tolerances if tolerances is None else tolerances
+    report = report_tolerances if report is None else report
+    inputs = np.asarray(inputs, dtype=float)
+    distances = clustering.day_distances(inputs, norm, weights)
+    options = dict(options, norm=norm, weights=weights, engine=engine)
+
+    k_range = sorted(k_range)
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, len(k_range))
+    if workers == 1:
+        results = dict(_cluster(inputs, k, distances, options) for k in k_range)
+    else:
+        if options.get("threads") is None:
+            options["threads"] = max(1, cores // workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = dict(pool.map(_cluster, [inputs] * len(k_range), k_range,
+                                    [distances] * len(k_range), [options] * len(k_range)))
+
+    scores = {}
+    for k in k_range:
+        clustered_series, _, z = results[k]
+        scores[k] = representation_errors(inputs, clustered_series, z)
+    selected = next((k for k in k_range if meets_tolerances(scores[k], tolerances)), None)
+    if selected is None:
+        selected = k_range[-1]
+        print("No number of design days from %d to %d meets the tolerances, %d is used."
+              % (k_range[0], k_range[-1], selected))
+    for name, indices in violations(scores[selected], report).items():
+        print("%d design days: %s error above %g for time series %s (max %.3f)."
+              % (selected, name, report[name], ", ".join(map(str, indices)), np.max(scores[selected][name])))
+    return selected, results[selected], scores
@@ -18,6 +18,8 @@ Contact:        Marco Wirtz
 from __future__ import division
 import gurobipy as gp
 import numpy as np
+from sparse_model import LinearProblem
+import solvers
 
 # Implementation of the k-medoids problem, as it is applied in 
 # Selection of typical demand days for CHP optimization
@@ -33,7 +35,25 @@ import numpy as np
 # pp. 506-519
 # Stable URL: http://www.jstor.org/stable/2283635
 
-def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001):
+# Heuristic engine (FasterPAM, hereafter referred to as [2]):
+
+# Fast and eager k-medoids clustering: O(k) runtime improvement of the PAM,
+# CLARA, and CLARANS algorithms
+# Erich Schubert, Peter J. Rousseeuw
+# Information Systems. Vol. 101 (November 2021), 101804
+
+# Engines of the k-medoids problem: exact MIP (k_medoids), exact MIP with continuous
+# assignments (k_medoids_reduced) or FasterPAM (k_medoids_pam)
+engines = ["mip", "reduced", "pam"]
+
+
+def check_engine(engine):
+    if engine not in engines:
+        raise ValueError(f"Unknown clustering engine {engine}, use one of {engines}.")
+
+
+def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001, solver="gurobi",
+              threads=None):
     """
     Parameters
     ----------
@@ -44,8 +64,15 @@ def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001):
         Given number of clusters.
     timelimit : integer
         Maximum time limit for the optimization.
+    solver : string
+        "gurobi" (default) or "highs" (see solvers.py).
+    threads : integer
+        Number of solver threads (default: all cores).
     """
     
+    if solver != "gurobi":
+        return _k_medoids_matrix(distances, number_clusters, timelimit, mipgap, solver, threads)
+    
     # Distances is a symmetrical matrix, extract its length
     length = distances.shape[0]
     
@@ -94,6 +121,8 @@ def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001):
     model.Params.TimeLimit = timelimit
     model.Params.MIPGap = mipgap  
     model.Params.OutputFlag = False # no console printing
+    if threads is not None:
+        model.Params.Threads = threads
     
     # Solve the model
     model.optimize()
@@ -106,4 +135,173 @@ def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001):
 
     r_obj = model.ObjVal
     
-    return (r_y, r_x.T, r_obj)
\ No newline at end of file
+    return (r_y, r_x.T, r_obj)
+
+
+def _k_medoids_matrix(distances, number_clusters, timelimit, mipgap, solver, threads=None):
+    """Same model as k_medoids, assembled as sparse matrix and solved with the given solver."""
+    
+    length = distances.shape[0]
+    
+    problem = LinearProblem("k-Medoids-Problem")
+    y = problem.add_var((length,), ub=1, vtype="B",
+                        name=["y_"+str(j) for j in range(length)])
+    x = problem.add_var((length, length), ub=1, vtype="B",
+                        name=[["x_"+str(i)+"_"+str(j) for j in range(length)] for i in range(length)])
+    diagonal = x[np.arange(length), np.arange(length)]
+    
+    problem.set_objective(x * distances)
+    problem.add_constr(x.sum(axis=1), "=", 1)                  # equation 2.2, [1]
+    problem.add_constr(y.sum(), "=", number_clusters)           # equation 2.3, [1]
+    problem.add_constr(x - y[None, :], "<", 0)                  # equation 2.4, [1]
+    problem.add_constr(diagonal - y, ">", 0)
+    problem.add_constr(diagonal.sum(), "=", number_clusters)
+    
+    result = solvers.solve(problem, solver, mip_gap=mipgap, time_limit=timelimit, threads=threads)
+    
+    r_x = result.x[x.idx]
+    r_y = result.x[y.idx]
+    
+    return (r_y, r_x.T, result.obj)
+
+
+
+def k_medoids_reduced(distances, number_clusters, timelimit=100, mipgap=0.0001, solver="gurobi",
+                      threads=None, start=True):
+    """
+    Exact k-medoids problem with binary y and continuous assignments x (for
+    fixed medoids, assigning every node to its nearest medoid is optimal, i.e. x
+    is integral anyway). Assembled as sparse matrix and solved with the given
+    solver (see solvers.py). With start=True, the FasterPAM solution
+    (k_medoids_pam) is the MIP start. Returns (y, z, obj) like k_medoids; the
+    nodes are assigned to the nearest chosen medoid.
+    """
+    
+    distances = np.asarray(distances, dtype=float)
+    length = distances.shape[0]
+    
+    problem = LinearProblem("k-Medoids-Problem")
+    y = problem.add_var((length,), ub=1, vtype="B",
+                        name=["y_"+str(j) for j in range(length)])
+    x = problem.add_var((length, length), ub=1,
+                        name=[["x_"+str(i)+"_"+str(j) for j in range(length)] for i in range(length)])
+    
+    problem.set_objective(x * distances)
+    problem.add_constr(x.sum(axis=1), "=", 1)                  # equation 2.2, [1]
+    problem.add_constr(y.sum(), "=", number_clusters)           # equation 2.3, [1]
+    problem.add_constr(x - y[None, :], "<", 0)                  # equation 2.4, [1]
+    
+    initial = None
+    if start:
+        r_y, r_z, _ = k_medoids_pam(distances, number_clusters)
+        initial = np.zeros(problem.num_vars)
+        initial[y.idx] = r_y
+        initial[x.idx] = r_z.T
+    
+    result = solvers.solve(problem, solver, mip_gap=mipgap, time_limit=timelimit, threads=threads,
+                           start=initial)
+    if result.x is None:
+        raise RuntimeError(f"No solution of the k-medoids problem found (status {result.status}).")
+    
+    medoids = np.flatnonzero(result.x[y.idx] > 0.5)
+    return _medoid_result(distances, medoids)
+
+
+def k_medoids_pam(distances, number_clusters, max_passes=100):
+    """
+    Heuristic solution of the k-medoids problem with FasterPAM [2]: greedy
+    initialization (BUILD), then eager swaps of a medoid and a non-medoid as
+    long as the total distance decreases. The days are visited in a fixed order,
+    i.e. the result is deterministic. Returns (y, z, obj) like k_medoids.
+    
+    Parameters
+    ----------
+    distances : 2d array
+        Distances between each pair of node points (symmetrical).
+    number_clusters : integer
+        Given number of clusters.
+    max_passes : integer
+        Maximum number of passes over all nodes (usually, a few are needed).
+    """
+    
+    distances = np.asarray(distances, dtype=float)
+    length = distances.shape[0]
+    
+    # BUILD: add the medoid that reduces the total distance most
+    medoids = [int(np.argmin(distances.sum(axis=0)))]
+    nearest_dist = distances[:, medoids[0]].copy()
+    for _ in range(1, number_clusters):
+        total = np.minimum(nearest_dist[:, None], distances).sum(axis=0)
+        total[medoids] = np.inf
+        medoids.append(int(np.argmin(total)))
+        nearest_dist = np.minimum(nearest_dist, distances[:, medoids[-1]])
+    medoids = np.array(medoids)
+    
+    # Eager swaps, see algorithm 2, page 5, [2]
+    nearest = np.zeros(length, dtype=int)
+    if number_clusters > 1:
+        nearest, nearest_dist, second_dist, removal_loss = _pam_assignment(distances, medoids)
+        is_medoid = np.zeros(length, dtype=bool)
+        is_medoid[medoids] = True
+        tolerance = 1e-12 * max(nearest_dist.sum(), 1)
+        candidate = 0
+        since_swap = 0
+        for _ in range(max_passes * length):
+            if since_swap >= length:
+                break
+            since_swap += 1
+            if not is_medoid[candidate]:
+                dist = distances[:, candidate]
+                closer = dist < nearest_dist
+                second = ~closer & (dist < second_dist)
+                # Change of the total distance if medoid i is replaced by the candidate
+                delta = (removal_loss
+                         + np.bincount(nearest[closer], (nearest_dist - second_dist)[closer], number_clusters)
+                         + np.bincount(nearest[second], (dist - second_dist)[second], number_clusters)
+                         + np.sum(dist[closer] - nearest_dist[closer]))
+                i = int(np.argmin(delta))
+                if delta[i] < -tolerance:
+                    is_medoid[medoids[i]] = False
+                    is_medoid[candidate] = True
+                    medoids[i] = candidate
+                    nearest, nearest_dist, second_dist, removal_loss = _pam_assignment(distances, medoids)
+                    since_swap = 1
+            candidate = (candidate + 1) % length
+    
+    return _medoid_result(distances, medoids, nearest)
+
+
+def _medoid_result(distances, medoids, nearest=None):
+    """
+    (y, z, obj) like k_medoids for the given medoids. Every node is assigned to
+    its nearest medoid (nearest: index in medoids), every medoid to itself
+    (as x[j,j] >= y[j] in k_medoids).
+    """
+    length = distances.shape[0]
+    if nearest is None:
+        nearest = np.argmin(distances[:, medoids], axis=1)
+    nearest = nearest.copy()
+    nearest[medoids] = np.arange(len(medoids))
+    
+    r_y = np.zeros(length)
+    r_y[medoids] = 1
+    r_z = np.zeros((length, length))
+    r_z[medoids[nearest], np.arange(length)] = 1
+    r_obj = float(np.sum(distances[medoids[nearest], np.arange(length)]))
+    
+    return (r_y, r_z, r_obj)
+
+
+def _pam_assignment(distances, medoids):
+    """
+    Nearest medoid (index in medoids) of every node, distance to the nearest and
+    second nearest medoid and loss of removing each medoid.
+    """
+    medoid_dist = distances[:, medoids]
+    order = np.argsort(medoid_dist, axis=1, kind="stable")
+    rows = np.arange(distances.shape[0])
+    nearest = order[:, 0]
+    nearest_dist = medoid_dist[rows, nearest]
+    second_dist = medoid_dist[rows, order[:, 1]]
+    removal_loss = np.bincount(nearest, second_dist - nearest_dist, len(medoids))
+    return nearest, nearest_dist, second_dist, removal_loss
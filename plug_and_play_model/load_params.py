@@ -3,12 +3,18 @@ import json
 import numpy as np
 import math
 import clustering_medoid as clustering
+import cluster_cache
+import design_days
 import time
 import os
 import csv
-import solar_modeling
+import profiles
+import weather
+import demands
 from optim_model import run_optim  # Ensure this import is at the top of your fileE
 
+default_input_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input_data")
+
 def update_dict_recursively(dict1, dict2):
     """
     Recursively updates dict1 with values from dict2.
@@ -20,14 +26,33 @@ def update_dict_recursively(dict1, dict2):
             dict1[key] = value
     return dict1
 
-def load_params(building, size, devices_to_use):
+def load_params(building, size, devices_to_use, solver="gurobi", threads=None, use_cache=True,
+                full_year=False, cluster_engine="mip", n_clusters=8, input_dir=None):
+    """
+    Load all parameters of a building. The design day clustering is solved with
+    solver (and threads), its results are cached on disk (see cluster_cache.py,
+    use_cache=False solves the clustering every time). cluster_engine is one of
+    k_medoids.engines: "mip" (k-medoids MIP), "reduced" (exact MIP with
+    continuous assignments) or "pam" (FasterPAM heuristic).
+    n_clusters is the number of design days; with n_clusters="auto", the
+    smallest number that represents the year within the default tolerances
+    is selected (see design_days.select_n_clusters; the selected clustering is
+    cached).
+    With full_year=True, the clustering is skipped and every day of the year is
+    a design day (365 x 24 time steps, weight 1, sigma is the identity), e.g. to
+    validate the clustering error. The model has to be solved with
+    builder="matrix" (see optim_model.run_optim).
+    input_dir is the directory of the input data (default: input_data next to
+    this module); the binary copies of the weather and demand files are
+    written there (see weather.py and demands.py).
+    """
 
     result_dict = {}
     param = {}  # general parameters
 
     param_uncl = {}  # unclustered time series for weather data
 
-    path_input_data = ".\\plug_and_play_model\\input_data\\"
+    path_input_data = input_dir or default_input_dir
 
     current_working_directory = os.getcwd()
     # print(f"Current working directory: {current_working_directory}")
@@ -41,20 +66,10 @@ def load_params(building, size, devices_to_use):
     #################################################################
     #%%  LOAD WEATHER DATA
 
-    header = {}
-    with open(os.path.join(path_input_data, "DEU_Dusseldorf.104000_IWEC.epw"), newline="", errors="ignore") as csvfile:
-        csvreader = csv.reader(csvfile, delimiter=",", quotechar='"')
-        for row in csvreader:
-            if row[0].isdigit():
-                break
-            else:
-                header[row[0]]=row[1:]
-
-    timezone = float(header["LOCATION"][7])
-    altitude = float(header["LOCATION"][8])
-
-    file = open(os.path.join(path_input_data, "DEU_Dusseldorf.104000_IWEC.epw"), "rb")
-    T_air, GHI, DHI, wind_speed = np.loadtxt(file, delimiter=",", skiprows=8, usecols=[6,13,15,21], unpack=True)
+    weather_data = weather.load_weather(os.path.join(path_input_data, "DEU_Dusseldorf.104000_IWEC.epw"))
+    timezone = weather_data["timezone"]
+    altitude = weather_data["altitude"]
+    T_air, GHI, DHI, wind_speed = (weather_data[k] for k in ["T_air", "GHI", "DHI", "wind_speed"])
 
     param_uncl["T_air"] = T_air
     param_uncl["GHI"] = GHI
@@ -64,20 +79,8 @@ def load_params(building, size, devices_to_use):
     ################################################################
     #%%  LOAD DEMANDS
 
-    dem_uncl = {}
-
-    dem_uncl["heat"] = np.loadtxt(os.path.join(path_input_data, "demand_heating_"+building+".txt"))
-    dem_uncl["power"] = np.loadtxt(os.path.join(path_input_data, "demand_electricity_"+building+".txt"))
-
-    
-    try:
-        dem_uncl["cool"] = np.loadtxt(os.path.join(path_input_data, "demand_cooling_"+building+".txt"))
-    except:
-        dem_uncl["cool"] = np.zeros(8760)
-    try:
-        dem_uncl["hydrogen"] = np.loadtxt(os.path.join(path_input_data, "demand_hydrogen_"+building+".txt"))
-    except:
-        dem_uncl["hydrogen"] = np.zeros(8760)
+    # Demand profiles from the binary demand store (see demands.py); carriers without profile are zero
+    dem_uncl, param["missing_demands"] = demands.load_demands(building, path_input_data)
 
     for k in ["heat", "cool", "power", "hydrogen"]:
         param["peak_"+k] = np.max(dem_uncl[k])
@@ -86,53 +89,87 @@ def load_params(building, size, devices_to_use):
     ################################################################
     #%%  DESIGN DAY CLUSTERING
 
-    param["n_clusters"] = 8  # Number of design days
-
-    # Collect the time series to be clustered
-    time_series = [dem_uncl["heat"], dem_uncl["cool"], dem_uncl["power"], dem_uncl["hydrogen"], param_uncl["T_air"], param_uncl["GHI"], param_uncl["DHI"], param_uncl["wind_speed"]]
-    # Only building demands and weather data are clustered using k-medoids algorithm; secondary time series are clustered manually according to k-medoids result
-    inputs_clustering = np.array(time_series)
-    # Execute k-medoids algorithm
-    start = time.time()
-    (clustered_series, nc, z) = clustering.cluster(inputs_clustering,
-                                     param["n_clusters"],
-                                     norm = 2,
-                                     mip_gap = 0.02,
-                                     )
-    # print("Design day clustering finished. (" + str(time.time()-start) + ")\n")
-
-    # Observation time
-
-    # Save clustered time series
-
-    dem = {}
-    dem["heat"] = clustered_series[0]
-    dem["cool"] = clustered_series[1]
-    dem["power"] = clustered_series[2]
-    dem["hydrogen"] = clustered_series[3]
-    param["T_air"] = clustered_series[4]
-    param["GHI"] = clustered_series[5]
-    param["DHI"] = clustered_series[6]
-    param["wind_speed"] = clustered_series[7]
-
-    # Save number of design days and design-day matrix
-    param["day_weights"] = nc
-    param["day_matrix"] = z
-
-    # Get sigma-function: for each day of the year, find the corresponding design day
-    # Get list of days which are used as design days
-    typedays = np.zeros(param["n_clusters"], dtype = np.int32)
-    n = 0
-    for d in range(365):
-        if any(z[d]):
-            typedays[n] = d
-            n += 1
-    # Assign each day of the year to its design day
-    sigma = np.zeros(365, dtype = np.int32)
-    for day in range(len(sigma)):
-        d = np.where(z[:,day] == 1 )[0][0]
-        sigma[day] = np.where(typedays == d)[0][0]
-    param["sigma"] = sigma
+    param["full_year"] = full_year
+
+    if full_year:
+        # No clustering: every day of the year is a design day
+        param["n_clusters"] = 365
+        dem = {k: np.array(dem_uncl[k]).reshape(365, 24) for k in ["heat", "cool", "power", "hydrogen"]}
+        for k in ["T_air", "GHI", "DHI", "wind_speed"]:
+            param[k] = np.array(param_uncl[k]).reshape(365, 24)
+        param["day_weights"] = np.ones(365, dtype=np.int32)
+        param["day_matrix"] = np.eye(365)
+        param["sigma"] = np.arange(365, dtype=np.int32)
+
+    else:
+        # Collect the time series to be clustered
+        time_series = [dem_uncl["heat"], dem_uncl["cool"], dem_uncl["power"], dem_uncl["hydrogen"], param_uncl["T_air"], param_uncl["GHI"], param_uncl["DHI"], param_uncl["wind_speed"]]
+        # Only building demands and weather data are clustered using k-medoids algorithm; secondary time series are clustered manually according to k-medoids result
+        inputs_clustering = np.array(time_series)
+        # Execute k-medoids algorithm
+        start = time.time()
+        selected = None
+        if n_clusters == "auto":
+            # Smallest number of design days within the default tolerances. Its clustering is
+            # stored in the cache and loaded from there like a clustering with a fixed number
+            (n_clusters, selected, _) = design_days.select_n_clusters(
+                                         inputs_clustering,
+                                         norm = 2,
+                                         mip_gap = 0.02,
+                                         solver = solver,
+                                         threads = threads,
+                                         engine = cluster_engine,
+                                         )
+            if use_cache:
+                cluster_cache.store(inputs_clustering, n_clusters, selected, norm = 2, mip_gap = 0.02,
+                                    engine = cluster_engine)
+        param["n_clusters"] = n_clusters  # Number of design days
+        if selected is not None and not use_cache:
+            (clustered_series, nc, z) = selected
+        else:
+            cluster = cluster_cache.cached_cluster if use_cache else clustering.cluster
+            (clustered_series, nc, z) = cluster(inputs_clustering,
+                                             param["n_clusters"],
+                                             norm = 2,
+                                             mip_gap = 0.02,
+                                             solver = solver,
+                                             threads = threads,
+                                             engine = cluster_engine,
+                                             )
+        # print("Design day clustering finished. (" + str(time.time()-start) + ")\n")
+
+        # Observation time
+
+        # Save clustered time series
+
+        dem = {}
+        dem["heat"] = clustered_series[0]
+        dem["cool"] = clustered_series[1]
+        dem["power"] = clustered_series[2]
+        dem["hydrogen"] = clustered_series[3]
+        param["T_air"] = clustered_series[4]
+        param["GHI"] = clustered_series[5]
+        param["DHI"] = clustered_series[6]
+        param["wind_speed"] = clustered_series[7]
+
+        # Save number of design days and design-day matrix
+        param["day_weights"] = nc
+        param["day_matrix"] = z
+
+        # Get sigma-function: for each day of the year, find the corresponding design day
+        # Get list of days which are used as design days
+        typedays = np.zeros(param["n_clusters"], dtype = np.int32)
+        n = 0
+        for d in range(365):
+            if any(z[d]):
+                typedays[n] = d
+                n += 1
+        # Assign each day of the year to its design day
+        sigma = np.zeros(365, dtype = np.int32)
+        for day in range(len(sigma)):
+            d = np.where(z[:,day] == 1 )[0][0]
+            sigma[day] = np.where(typedays == d)[0][0]
+        param["sigma"] = sigma
 
     # Cluster secondary time series
     #for k in ["T_air", "GHI", "wind_speed"]:
@@ -173,13 +210,13 @@ def load_params(building, size, devices_to_use):
     devs = {}
     
 
-    data_devs_reference_path = ".\\plug_and_play_model\\input_data\\devs_ref.json"
+    data_devs_reference_path = os.path.join(path_input_data, "devs_ref.json")
     with open(data_devs_reference_path, 'r') as file:
         data_devs_reference = json.load(file)
     
     devs = data_devs_reference
 
-    devs_path = ".\\plug_and_play_model\\input_data\\devs_"+size+".json"
+    devs_path = os.path.join(path_input_data, "devs_" + size + ".json")
     with open(devs_path, 'r') as file:
         data_devs = json.load(file)
 
@@ -198,31 +235,12 @@ def load_params(building, size, devices_to_use):
             devs[device]["feasible"] = True
 
     
-    devs["PV"]["norm_power"] = solar_modeling.pv_system(direct_tilted_irrad = param["GHI"] - param["DHI"],
-                                                 diffuse_tilted_irrad = param["DHI"],
-                                                 theta = 0,
-                                                 T_air = param["T_air"],
-                                                 wind_speed = param["wind_speed"]
-                                                 )/1e3  # in kW/kWp
-
-    devs["WT"]["norm_power"] = calc_WT_power(devs, param) # relative power between 0 and 1
-
-    devs["STC"]["specific_heat"] = solar_modeling.collector_system(direct_tilted_irrad = param["GHI"] - param["DHI"],
-                                                              diffuse_tilted_irrad = param["DHI"],
-                                                              theta = 0,
-                                                              T_air = param["T_air"]
-                                                              )/1e3
-
-
-    eta_carnot = devs["HP"]["eta_carnot"]
-    supply_temp = devs["HP"]["supply_temp"]
-
-    COP = np.zeros((param["n_clusters"], 24))
-    for d in range(param["n_clusters"]):
-        for t in range(24):
-            COP[d][t] = eta_carnot * (supply_temp+273.15)/(supply_temp-param["T_air"][d][t])
-    
-    devs["HP"]["COP"] = COP
+    # Weather-dependent device parameters (arrays of shape n_clusters x 24)
+    device_profiles = profiles.device_profiles(devs, param["T_air"], param["GHI"], param["DHI"], param["wind_speed"])
+    devs["PV"]["norm_power"] = device_profiles["norm_power_PV"]  # in kW/kWp
+    devs["WT"]["norm_power"] = device_profiles["norm_power_WT"]  # relative power between 0 and 1
+    devs["STC"]["specific_heat"] = device_profiles["specific_heat_STC"]  # in kW/m2
+    devs["HP"]["COP"] = device_profiles["COP_HP"]
         
 
     deltaT = 40
@@ -242,7 +260,7 @@ def load_params(building, size, devices_to_use):
     #%%  LOAD MODEL PARAMETERS
 
 
-    param_path = ".\\plug_and_play_model\\input_data\\param.json"
+    param_path = os.path.join(path_input_data, "param.json")
     with open(param_path, 'r') as file:
         data_param = json.load(file)
 
@@ -292,52 +310,16 @@ def calc_monthly_dem(dem_uncl, param_uncl, result_dict):
 
 def calc_WT_power(devs, param):
     """
-    According to data sheet of wind turbine Enercon E40.
+    According to data sheet of wind turbine Enercon E40 (see profiles.wt_norm_power).
     """
-
-    power_curve = {0:  (0.0,    0.00),
-                   1:  (2.4,    0.00),
-                   2:  (2.5,    1.14),
-                   3:  (3.0,    4.37),
-                   4:  (3.5,   10.64),
-                   5:  (4.0,   18.87),
-                   6:  (4.5,   29.77),
-                   7:  (5.0,   40.39),
-                   8:  (5.5,   52.85),
-                   9:  (6.0,   69.36),
-                   10: (6.5,   88.02),
-                   11: (7,    112.19),
-                   12: (7.5,  134.67),
-                   13: (8,    165.38),
-                   14: (8.5,  197.08),
-                   15: (9,    236.89),
-                   16: (9.5,  279.46),
-                   17: (10,   328.00),
-                   18: (10.5, 362.93),
-                   19: (11,   396.64),
-                   20: (11.5, 435.27),
-                   21: (12,   465.15),
-                   22: (12.5, 483.63),
-                   23: (13,   495.95),
-                   24: (14,   500.00),
-                   25: (25,   500.00),
-                   26: (25.1,   0.00),
-                   27: (1000,   0.00),
-                   }
-
-    wind_speed_corr = param["wind_speed"]*(devs["WT"]["hub_h"]/devs["WT"]["ref_h"]) ** devs["WT"]["h_coeff"]  # kW
-
-    WT_power = np.zeros(np.shape(wind_speed_corr))
-    for d in range(param["n_clusters"]):
-        for t in range(24):
-            WT_power[d][t] = get_turbine_power(wind_speed_corr[d][t], power_curve)
-
-    WT_power_norm = WT_power / 500  # power_curve with 500 kW as maximum output
-
-    return WT_power_norm
+    return profiles.wt_norm_power(param["wind_speed"], devs["WT"]["hub_h"], devs["WT"]["ref_h"], devs["WT"]["h_coeff"])
 
 
 def get_turbine_power(wind_speed, power_curve):
+    """
+    Power (kW) of one wind speed by linear interpolation of power_curve
+    {k: (wind speed, power)}. Scalar reference of profiles.wt_norm_power.
+    """
     if wind_speed <= 0:
         return 0
     if wind_speed > power_curve[len(power_curve)-1][0]:
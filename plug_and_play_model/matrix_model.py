@@ -0,0 +1,713 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Matrix build path of the energy hub model. Builds the same variables and
+constraints as the dict-based builder in optim_model.py, but every
+carrier/device flow is one array variable of shape (n_clusters, 24) and
+every constraint family is added as one sparse matrix block.
+
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+from sparse_model import LinearProblem, LinExpr, Var
+
+
+# Create set for devices
+all_devs = ["PV", "WT", "STC", "WAT",
+            "HP", "EB", "CC", "AC",
+            "CHP", "BOI", "GHP",
+            "BCHP", "BBOI", "WCHP", "WBOI",
+            "ELYZ", "FC", "H2S", "SAB",
+            "TES", "CTES", "BAT", "GS",
+            ]
+
+# Devices connected to each carrier (same sets as in the dict-based builder)
+flow_devs = {
+    "gas":      ["CHP", "BOI", "GHP", "SAB", "import", "export"],
+    "power":    ["PV", "WT", "WAT", "HP", "EB", "CC", "CHP", "BCHP", "WCHP", "ELYZ", "FC", "import", "export"],
+    "heat":     ["STC", "HP", "EB", "AC", "CHP", "BOI", "GHP", "BCHP", "BBOI", "WCHP", "WBOI", "FC", "import", "export"],
+    "cool":     ["CC", "AC", "HP"],
+    "hydrogen": ["ELYZ", "FC", "SAB", "import"],
+    "biom":     ["BCHP", "BBOI", "import"],
+    "waste":    ["WCHP", "WBOI", "import"],
+}
+
+storage_devs = ["TES", "CTES", "BAT", "H2S", "GS"]
+
+# Scalar variables in the order in which they are created
+cost_vars = [("inv", "investment_costs_"), ("c_inv", "annual_investment_costs_"),
+             ("c_om", "om_costs_"), ("c_dem", "demand_related_costs_"),
+             ("c_total", "total_annual_costs_")]
+
+total_vars = ["grid_limit_el", "grid_limit_gas", "grid_limit_heat",
+              "el_import_total", "el_export_total",
+              "gas_import_total", "gas_export_total",
+              "heat_import_total", "heat_export_total",
+              "biom_import_total", "waste_import_total", "hydrogen_import_total",
+              "rev_feed_in_gas", "rev_feed_in_el",
+              "supply_costs_el", "cap_costs_el", "supply_costs_gas", "cap_costs_gas",
+              "supply_costs_heat", "cap_costs_heat", "supply_costs_biom",
+              "supply_costs_waste", "supply_costs_hydrogen"]
+
+
+def _names(prefix, n_days):
+    return np.array([[prefix + "_d" + str(d) + "_t" + str(t) for t in range(24)]
+                     for d in range(n_days)], dtype=object)
+
+
+class _ExprValue:
+    """
+    Array of linear expressions of the MVar x (e.g. the state of charge of
+    storages with the superposition model). getValue returns the values of the
+    current solution, like gurobipy's MLinExpr.getValue.
+    """
+    def __init__(self, expr, x):
+        self.expr = expr
+        self.x = x
+
+    def getValue(self):
+        return self.expr.value(self.x.X)
+
+
+def pruned_devices(devs):
+    """
+    Devices that are not feasible and whose capacity is fixed to zero. All flows
+    of these devices are zero in the full model, so they can be left out.
+    """
+    return [dev for dev in all_devs if devs[dev]["feasible"] != True
+            and (dev in ["PV", "STC"] or not devs[dev]["min_cap"])]
+
+
+class _Reads(Mapping):
+    """Read-only view of a (nested) dict that records the keys of all values read in keys."""
+
+    def __init__(self, data, keys, prefix):
+        self._data = data
+        self._keys = keys
+        self._prefix = prefix
+
+    def __getitem__(self, key):
+        if isinstance(self._data.get(key), dict):
+            return _Reads(self._data[key], self._keys, self._prefix + (key,))
+        self._keys.add(self._prefix + (key,))
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _tracked(devs, param, dem, keys):
+    return _Reads(devs, keys, ("devs",)), _Reads(param, keys, ("param",)), _Reads(dem, keys, ("dem",))
+
+
+def _device_constr(p, pruned):
+    def add_device_constr(dev, lhs, sense, rhs, name):
+        # constraints of a pruned device only contain its (zero) flows
+        if dev not in pruned:
+            p.add_constr(lhs, sense, rhs, name=name)
+    return add_device_constr
+
+
+def build_hub_problem(devs, param, dem, prune=False, trace=None):
+    """
+    Assemble the energy hub model as a sparse LinearProblem.
+
+    Returns the problem and a dict with the variable blocks, keyed like the
+    variable dicts of optim_model.run_optim (e.g. v["gas"]["CHP"] is a Var of
+    shape (n_clusters, 24), v["cap"]["HP"] a scalar Var).
+
+    Storages are modeled according to devs[dev]["storage_model"]:
+        "chain"         : one state of charge per hour of the year (365 x 24), chained over all days.
+        "superposition" : intra-day state of charge per design day (n_clusters x 24) and one
+                          inter-day state per calendar day (365), see Kotzur et al. (2018), Time series
+                          aggregation for energy system design: Modeling seasonal storage. The state of
+                          charge soc(d, t) = soc_inter(d) * (1-loss)^(t+1) + soc_intra(sigma(d), t) is
+                          an expression (v["soc"][dev] is a LinExpr), and its bounds are enforced
+                          conservatively via the minimum and maximum intra-day state of each design day.
+
+    prune : If True, the flow and storage variables of the devices returned by
+            pruned_devices are not created; in v they are replaced by arrays of
+            zeros, and all constraints that only concern these devices are left
+            out. Purchase, capacity and cost variables are kept for all devices.
+    trace : If a dict, it is filled with {part: (keys, blocks)} for the variables
+            ("variables") and every constraint section of hub_sections: the keys of
+            devs, param and dem that were read, e.g. ("param", "co2_tax") or
+            ("devs", "HP", "COP"), and the names of the constraint blocks that were
+            added (see build_hub_sections).
+    """
+    p = LinearProblem("Energy_hub_model")
+    data = (devs, param, dem)
+    if trace is not None:
+        trace["variables"] = (set(), [])
+        data = _tracked(devs, param, dem, trace["variables"][0])
+    pruned = pruned_devices(data[0]) if prune else []
+    v = _hub_variables(p, data[0], data[1], pruned)
+    _add_sections(p, v, devs, param, dem, pruned, [name for name, _ in hub_sections], trace)
+    return p, v
+
+
+def build_hub_sections(num_vars, v, devs, param, dem, sections, prune=False, trace=None):
+    """
+    Constraint blocks of the given sections (names of hub_sections) only, for the
+    variables v of a problem with num_vars columns built by build_hub_problem.
+    Returns a LinearProblem without variables whose rows are numbered from 0
+    (blocks keep their names). For prune and trace see build_hub_problem.
+    """
+    p = LinearProblem("Energy_hub_model")
+    p.num_vars = num_vars
+    pruned = pruned_devices(devs) if prune else []
+    _add_sections(p, v, devs, param, dem, pruned, sections, trace)
+    return p
+
+
+def _add_sections(p, v, devs, param, dem, pruned, sections, trace=None):
+    for name, section in hub_sections:
+        if name not in sections:
+            continue
+        data = (devs, param, dem)
+        if trace is not None:
+            trace[name] = (set(), [])
+            data = _tracked(devs, param, dem, trace[name][0])
+        first = len(p.blocks)
+        section(p, v, *data, pruned)
+        if trace is not None:
+            trace[name][1].extend(list(p.blocks)[first:])
+
+
+def _hub_variables(p, devs, param, pruned):
+    """Variable blocks of the energy hub model (see build_hub_problem)."""
+    n_days = param["n_clusters"]
+    shape = (n_days, 24)
+    sigma = np.asarray(param["sigma"])
+    v = {}
+
+    #%% VARIABLES
+
+    # Purchase decision binary variables (1 if device is installed, 0 otherwise)
+    v["x"] = {dev: p.add_var(vtype="B", name="x_" + dev) for dev in all_devs}
+
+    # Device's capacity (i.e. rated power)
+    v["cap"] = {dev: p.add_var(name="nominal_capacity_" + dev) for dev in all_devs}
+
+    # Roof area used for PV and solar thermal collector installation
+    v["area"] = {dev: p.add_var(name="roof_area_" + dev) for dev in ["PV", "STC"]}
+
+    # Energy flows to/from devices, one block of shape (n_clusters, 24) per device
+    for m in ["gas", "power", "heat", "cool", "hydrogen", "biom", "waste"]:
+        v[m] = {dev: np.zeros(shape) if dev in pruned else p.add_var(shape, name=_names(m + "_" + dev, n_days))
+                for dev in flow_devs[m]}
+
+    # Storage variables: ch is positive if storage is charged, and negative if storage is discharged
+    v["ch"] = {}
+    v["soc"] = {}
+    for key in ["soc_intra", "soc_inter", "soc_min", "soc_max"]:
+        v[key] = {}
+    for dev in storage_devs:
+        if dev in pruned:
+            v["ch"][dev] = np.zeros(shape)
+            v["soc"][dev] = np.zeros((365, 24))
+        elif devs[dev]["storage_model"] == "chain":
+            v["ch"][dev] = p.add_var(shape, lb=-np.inf, name=_names("ch_" + dev, n_days))
+            v["soc"][dev] = p.add_var((365, 24), name=_names("soc_" + dev, 365))
+        elif devs[dev]["storage_model"] == "superposition":
+            v["ch"][dev] = p.add_var(shape, lb=-np.inf, name=_names("ch_" + dev, n_days))
+            v["soc_intra"][dev] = p.add_var(shape, lb=-np.inf, name=_names("soc_intra_" + dev, n_days))
+            v["soc_inter"][dev] = p.add_var((365,), name=["soc_inter_" + dev + "_d" + str(d) for d in range(365)])
+            v["soc_min"][dev] = p.add_var((n_days,), lb=-np.inf, name=["soc_min_" + dev + "_d" + str(d) for d in range(n_days)])
+            v["soc_max"][dev] = p.add_var((n_days,), lb=-np.inf, name=["soc_max_" + dev + "_d" + str(d) for d in range(n_days)])
+            decay = (1 - devs[dev]["sto_loss"]) ** np.arange(1, 25)
+            v["soc"][dev] = v["soc_inter"][dev][:, None] * decay + v["soc_intra"][dev][sigma]
+        else:
+            raise ValueError(f"Unknown storage model {devs[dev]['storage_model']} of {dev}.")
+
+    # Variables for annual device costs
+    for key, prefix in cost_vars:
+        v[key] = {dev: p.add_var(name=prefix + dev) for dev in all_devs}
+
+    # Grid connections, total energy amounts, revenues and supply costs
+    for key in total_vars:
+        lb = -np.inf if key == "supply_costs_waste" else 0.0
+        name = "supply_costs_biomass" if key == "supply_costs_biom" else key
+        v[key] = p.add_var(lb=lb, name=name)
+
+    # Objectives
+    v["obj"] = {"tac": p.add_var(lb=-np.inf, name="total_annualized_costs"),
+                "co2": p.add_var(lb=-np.inf, name="total_CO2")}
+
+    return v
+
+
+def _objectives(p, v, devs, param, dem, pruned):
+    """Total annualized costs (objective) and CO2 emissions."""
+    obj = v["obj"]
+
+    p.add_constr(obj["tac"], "=",
+                 sum(v["c_total"][dev] for dev in all_devs)
+                 + v["supply_costs_gas"] + v["cap_costs_gas"]
+                 + v["supply_costs_el"] + v["cap_costs_el"]
+                 + v["supply_costs_heat"] + v["cap_costs_heat"]
+                 - v["rev_feed_in_el"] - v["rev_feed_in_gas"]
+                 + v["supply_costs_biom"] + v["supply_costs_waste"] + v["supply_costs_hydrogen"]
+                 + (v["gas_import_total"] * param["co2_gas"]
+                    + v["el_import_total"] * param["co2_el"]
+                    + v["heat_import_total"] * param["co2_heat"]
+                    + v["biom_import_total"] * param["co2_biom"]
+                    + v["waste_import_total"] * param["co2_waste"]) * param["co2_tax"],
+                 name="tac")
+
+    p.add_constr(obj["co2"], "=",
+                 v["el_import_total"] * param["co2_el"]
+                 + v["gas_import_total"] * param["co2_gas"]
+                 + v["heat_import_total"] * param["co2_heat"]
+                 + v["biom_import_total"] * param["co2_biom"]
+                 + v["waste_import_total"] * param["co2_waste"]
+                 + v["hydrogen_import_total"] * param["co2_hydrogen"]
+                 - v["el_export_total"] * param["co2_el_feed_in"]
+                 - v["gas_export_total"] * param["co2_gas_feed_in"],
+                 name="co2")
+
+    p.set_objective(obj["tac"])
+    # Carbon neutrality (1e-6) unless another limit is given. With co2_limit None or inf, the
+    # row is kept with an infinite right-hand side (see HubModel.pareto).
+    co2_limit = param.get("co2_limit", 1e-6)
+    p.add_constr(obj["co2"], "<", np.inf if co2_limit is None else co2_limit, name="co2_limit")
+
+
+def _device_selection(p, v, devs, param, dem, pruned):
+    """Purchase decisions and capacity limits."""
+    x, cap = v["x"], v["cap"]
+
+    for dev in all_devs:
+        if devs[dev]["feasible"] == True and param.get("free_portfolio", False):
+            # Purchase decision: capacity is 0 or between minimum and maximum capacity
+            if dev not in ["PV", "STC"]:
+                p.add_constr(cap[dev] - x[dev] * devs[dev]["min_cap"], ">", 0, name="min_cap_" + dev)
+                p.add_constr(cap[dev] - x[dev] * devs[dev]["max_cap"], "<", 0, name="max_cap_" + dev)
+        elif devs[dev]["feasible"] == True:
+            p.add_constr(x[dev], "=", 1, name="x_" + dev)
+            if dev not in ["PV", "STC"]:
+                p.add_constr(cap[dev], ">", devs[dev]["min_cap"], name="min_cap_" + dev)
+                p.add_constr(cap[dev], "<", devs[dev]["max_cap"], name="max_cap_" + dev)
+        else:
+            p.add_constr(x[dev], "=", 0, name="x_" + dev)
+            if dev not in ["PV", "STC"]:
+                p.add_constr(cap[dev], "=", devs[dev]["min_cap"], name="min_cap_" + dev)
+
+
+def _sizing(p, v, devs, param, dem, pruned):
+    """Flows, grid connections, roof areas and states of charge within the capacities."""
+    x, cap, area = v["x"], v["cap"], v["area"]
+    gas, power, heat, cool = v["gas"], v["power"], v["heat"], v["cool"]
+    soc = v["soc"]
+    sigma = np.asarray(param["sigma"])
+    add_device_constr = _device_constr(p, pruned)
+
+    for dev in ["STC", "EB", "HP", "BOI", "GHP", "BBOI", "WBOI", "CHP", "BCHP", "WCHP"]:
+        add_device_constr(dev, heat[dev] - cap[dev], "<", 0, name="cap_heat_" + dev)
+    for dev in ["PV", "WT", "WAT", "CHP", "BCHP", "WCHP", "ELYZ", "FC"]:
+        add_device_constr(dev, power[dev] - cap[dev], "<", 0, name="cap_power_" + dev)
+    for dev in ["CC", "AC", "HP"]:
+        add_device_constr(dev, cool[dev] - cap[dev], "<", 0, name="cap_cool_" + dev)
+    add_device_constr("SAB", gas["SAB"] - cap["SAB"], "<", 0, name="cap_gas_SAB")
+
+    # Limitation of power from and to grid
+    for dev in ["import", "export"]:
+        p.add_constr(power[dev] - v["grid_limit_el"], "<", 0, name="grid_limit_el_" + dev)
+        p.add_constr(gas[dev] - v["grid_limit_gas"], "<", 0, name="grid_limit_gas_" + dev)
+        p.add_constr(heat[dev] - v["grid_limit_heat"], "<", 0, name="grid_limit_heat_" + dev)
+
+    # PV and STC: minimum area < used roof area <= maximum area
+    for dev in ["PV", "STC"]:
+        p.add_constr(area[dev] - x[dev] * devs[dev]["min_area"], ">", 0, name="min_area_" + dev)
+        p.add_constr(area[dev] - x[dev] * devs[dev]["max_area"], "<", 0, name="max_area_" + dev)
+    p.add_constr(area["PV"] + area["STC"], "<", param["roof_area"], name="roof_area")
+
+    # Correlation between area and peak power; cap is only needed for calculating investment costs
+    for dev in ["PV", "STC"]:
+        p.add_constr(cap[dev] - area[dev] * (devs[dev]["G_stc"] * devs[dev]["eta"]), "=", 0, name="area_" + dev)
+
+    # state of charge < storage capacity
+    for dev in storage_devs:
+        if dev in pruned:
+            continue
+        if devs[dev]["storage_model"] == "superposition":
+            # 0 <= soc_inter * (1-loss)^24 + soc_min  and  soc_inter * (1-loss) + soc_max <= cap
+            soc_intra, soc_inter = v["soc_intra"][dev], v["soc_inter"][dev]
+            soc_min, soc_max = v["soc_min"][dev], v["soc_max"][dev]
+            loss = devs[dev]["sto_loss"]
+            p.add_constr(soc_intra - soc_min[:, None], ">", 0, name="soc_min_" + dev)
+            p.add_constr(soc_intra - soc_max[:, None], "<", 0, name="soc_max_" + dev)
+            p.add_constr(soc_inter * (1 - loss) ** 24 + soc_min[sigma], ">", 0, name="soc_lower_" + dev)
+            p.add_constr(soc_inter * (1 - loss) + soc_max[sigma] - cap[dev], "<", 0, name="soc_cap_" + dev)
+        else:
+            p.add_constr(soc[dev] - cap[dev], "<", 0, name="soc_cap_" + dev)
+
+
+def _input_output(p, v, devs, param, dem, pruned):
+    """Conversion of the devices."""
+    cap, area = v["cap"], v["area"]
+    gas, power, heat, cool = v["gas"], v["power"], v["heat"], v["cool"]
+    hydrogen, biom, waste = v["hydrogen"], v["biom"], v["waste"]
+    shape = (param["n_clusters"], 24)
+    add_device_constr = _device_constr(p, pruned)
+
+    GHI = np.asarray(param["GHI"])
+    COP = np.asarray(devs["HP"]["COP"])
+
+    # Photovoltaics, wind turbine, hydropower and solar thermal collector
+    add_device_constr("PV", power["PV"] - area["PV"] * (GHI / 1e3 * devs["PV"]["eta"]), "<", 0, name="io_PV")
+    add_device_constr("WT", power["WT"] - cap["WT"] * np.asarray(devs["WT"]["norm_power"]), "<", 0, name="io_WT")
+    add_device_constr("WAT", power["WAT"], "<", np.full(shape, devs["WAT"]["potential"], dtype=float), name="io_WAT")
+    add_device_constr("STC", heat["STC"] - area["STC"] * (GHI / 1e3 * devs["STC"]["eta"]), "<", 0, name="io_STC")
+
+    # Electric heat pump
+    add_device_constr("HP", heat["HP"] - power["HP"] * COP, "=", 0, name="io_HP_heat")
+    add_device_constr("HP", cool["HP"] - power["HP"] * (COP - 1), "=", 0, name="io_HP_cool")
+
+    # Electric boiler, compression and absorption chiller
+    add_device_constr("EB", heat["EB"] - power["EB"] * devs["EB"]["eta_th"], "=", 0, name="io_EB")
+    add_device_constr("CC", cool["CC"] - power["CC"] * devs["CC"]["COP"], "=", 0, name="io_CC")
+    add_device_constr("AC", cool["AC"] - heat["AC"] * devs["AC"]["eta_th"], "=", 0, name="io_AC")
+
+    # Gas, biomass and waste CHPs
+    for dev, fuel in [("CHP", gas), ("BCHP", biom), ("WCHP", waste)]:
+        add_device_constr(dev, power[dev] - fuel[dev] * devs[dev]["eta_el"], "=", 0, name="io_" + dev + "_power")
+        add_device_constr(dev, heat[dev] - fuel[dev] * devs[dev]["eta_th"], "=", 0, name="io_" + dev + "_heat")
+
+    # Gas, biomass and waste boilers, gas heat pump
+    add_device_constr("BOI", heat["BOI"] - gas["BOI"] * devs["BOI"]["eta_th"], "=", 0, name="io_BOI")
+    add_device_constr("GHP", heat["GHP"] - gas["GHP"] * devs["GHP"]["COP"], "=", 0, name="io_GHP")
+    add_device_constr("BBOI", heat["BBOI"] - biom["BBOI"] * devs["BBOI"]["eta_th"], "=", 0, name="io_BBOI")
+    add_device_constr("WBOI", heat["WBOI"] - waste["WBOI"] * devs["WBOI"]["eta_th"], "=", 0, name="io_WBOI")
+
+    # Electrolyzer
+    add_device_constr("ELYZ", hydrogen["ELYZ"] - power["ELYZ"] * devs["ELYZ"]["eta_el"], "=", 0, name="io_ELYZ")
+
+    # Fuel cell (heat can also be dissipated if enabled, otherwise heat must be used)
+    add_device_constr("FC", power["FC"] - hydrogen["FC"] * devs["FC"]["eta_el"], "=", 0, name="io_FC_power")
+    add_device_constr("FC", heat["FC"] - hydrogen["FC"] * devs["FC"]["eta_th"],
+                      "<" if devs["FC"]["enable_heat_diss"] else "=", 0, name="io_FC_heat")
+
+    # Sabatier reactor
+    add_device_constr("SAB", gas["SAB"] - hydrogen["SAB"] * devs["SAB"]["eta"], "=", 0, name="io_SAB")
+
+
+def _balances(p, v, devs, param, dem, pruned):
+    """Energy balances of all carriers."""
+    gas, power, heat, cool = v["gas"], v["power"], v["heat"], v["cool"]
+    hydrogen, biom, waste = v["hydrogen"], v["biom"], v["waste"]
+    ch = v["ch"]
+
+    p.add_constr(heat["STC"] + heat["HP"] + heat["EB"] + heat["CHP"] + heat["BOI"] + heat["GHP"]
+                 + heat["BCHP"] + heat["BBOI"] + heat["WCHP"] + heat["WBOI"] + heat["FC"] + heat["import"]
+                 - heat["AC"] - ch["TES"], "=", dem["heat"], name="balance_heat")
+
+    p.add_constr(power["PV"] + power["WT"] + power["WAT"] + power["CHP"] + power["BCHP"] + power["WCHP"]
+                 + power["FC"] + power["import"]
+                 - power["HP"] - power["EB"] - power["CC"] - power["ELYZ"] - ch["BAT"] - power["export"],
+                 "=", dem["power"], name="balance_power")
+
+    p.add_constr(cool["AC"] + cool["CC"] + cool["HP"] - ch["CTES"], "=", dem["cool"], name="balance_cool")
+
+    p.add_constr(gas["import"] + gas["SAB"] - gas["CHP"] - gas["BOI"] - gas["GHP"] - ch["GS"] - gas["export"],
+                 "=", 0, name="balance_gas")
+
+    p.add_constr(hydrogen["ELYZ"] + hydrogen["import"] - hydrogen["FC"] - hydrogen["SAB"] - ch["H2S"],
+                 "=", dem["hydrogen"], name="balance_hydrogen")
+
+    p.add_constr(biom["import"] - biom["BCHP"] - biom["BBOI"], "=", 0, name="balance_biom")
+    p.add_constr(waste["import"] - waste["WCHP"] - waste["WBOI"], "=", 0, name="balance_waste")
+
+
+def _peak_demands(p, v, devs, param, dem, pruned):
+    """Capacities for the peak demands of the unclustered time series."""
+    cap = v["cap"]
+
+    p.add_constr(cap["HP"] + cap["EB"]
+                 + cap["CHP"] / devs["CHP"]["eta_el"] * devs["CHP"]["eta_th"]
+                 + cap["BOI"]
+                 + cap["GHP"]
+                 + cap["BCHP"] / devs["BCHP"]["eta_el"] * devs["BCHP"]["eta_th"]
+                 + cap["BBOI"]
+                 + cap["WCHP"] / devs["WCHP"]["eta_el"] * devs["WCHP"]["eta_th"]
+                 + cap["WBOI"]
+                 + cap["FC"] / devs["FC"]["eta_el"] * devs["FC"]["eta_th"] + v["grid_limit_heat"],
+                 ">", param["peak_heat"], name="peak_heat")
+
+    p.add_constr(cap["CC"] + cap["AC"] + cap["HP"], ">", param["peak_cool"], name="peak_cool")
+
+    p.add_constr(cap["PV"] + cap["WT"] + cap["WAT"] + cap["CHP"] + cap["BCHP"] + cap["WCHP"] + cap["FC"]
+                 + v["grid_limit_el"], ">", param["peak_power"], name="peak_power")
+
+    if (param["enable_supply_hydrogen"] == False) and devs["ELYZ"]["feasible"]:
+        p.add_constr(cap["ELYZ"], ">", param["peak_hydrogen"], name="peak_hydrogen")
+
+
+def _storages(p, v, devs, param, dem, pruned):
+    """State of charge of the storages."""
+    ch, soc = v["ch"], v["soc"]
+    sigma = np.asarray(param["sigma"])
+
+    # Chain model: soc(t) = soc(t-1) * (1 - loss) + charge - discharge, chained over all days of the year;
+    # the first time step of the year follows the last one (cyclic year condition)
+    # Superposition model: the intra-day state starts at zero on every design day, the inter-day
+    # state is the state of charge at the end of the previous day (again cyclic over the year)
+    for dev in storage_devs:
+        if dev in pruned:
+            continue
+        loss = devs[dev]["sto_loss"]
+        if devs[dev]["storage_model"] == "superposition":
+            soc_intra, soc_inter = v["soc_intra"][dev], v["soc_inter"][dev]
+            soc_inter_next = Var(np.roll(soc_inter.idx, -1))
+            p.add_constr(soc_intra[:, 0] - ch[dev][:, 0], "=", 0, name="storage_intra_start_" + dev)
+            p.add_constr(soc_intra[:, 1:] - soc_intra[:, :-1] * (1 - loss) - ch[dev][:, 1:],
+                         "=", 0, name="storage_intra_" + dev)
+            p.add_constr(soc_inter_next - soc_inter * (1 - loss) ** 24 - soc_intra[sigma, 23],
+                         "=", 0, name="storage_inter_" + dev)
+        else:
+            soc_prev = Var(np.roll(soc[dev].idx.ravel(), 1).reshape(365, 24))
+            p.add_constr(soc[dev] - soc_prev * (1 - loss) - ch[dev][sigma],
+                         "=", 0, name="storage_" + dev)
+
+
+def _totals(p, v, devs, param, dem, pruned):
+    """Annual totals, supply costs and revenues, supply limitations."""
+    gas, power, heat = v["gas"], v["power"], v["heat"]
+    hydrogen, biom, waste = v["hydrogen"], v["biom"], v["waste"]
+    ch = v["ch"]
+    weights = np.asarray(param["day_weights"])[:, None]
+
+    for total, m, dev in [("gas_import_total", gas, "import"), ("gas_export_total", gas, "export"),
+                          ("el_import_total", power, "import"), ("el_export_total", power, "export"),
+                          ("heat_import_total", heat, "import"), ("biom_import_total", biom, "import"),
+                          ("waste_import_total", waste, "import"), ("hydrogen_import_total", hydrogen, "import")]:
+        p.add_constr(v[total] - (m[dev] * weights).sum(), "=", 0, name=total)
+
+    ### Costs ###
+    p.add_constr(v["supply_costs_el"] - v["el_import_total"] * param["price_supply_el"], "=", 0, name="supply_costs_el")
+    p.add_constr(v["cap_costs_el"] - v["grid_limit_el"] * param["price_cap_el"], "=", 0, name="cap_costs_el")
+    p.add_constr(v["rev_feed_in_el"] - v["el_export_total"] * param["revenue_feed_in_el"], "=", 0, name="rev_feed_in_el")
+    p.add_constr(v["rev_feed_in_el"], "<", param["revenue_feed_in_el"] * param["feed_in_el_limit"], name="feed_in_el_limit")
+
+    p.add_constr(v["supply_costs_gas"] - v["gas_import_total"] * param["price_supply_gas"], "=", 0, name="supply_costs_gas")
+    p.add_constr(v["cap_costs_gas"] - v["grid_limit_gas"] * param["price_cap_gas"], "=", 0, name="cap_costs_gas")
+    p.add_constr(v["rev_feed_in_gas"] - v["gas_export_total"] * param["revenue_feed_in_gas"], "=", 0, name="rev_feed_in_gas")
+
+    p.add_constr(v["supply_costs_heat"] - v["heat_import_total"] * param["price_supply_heat"], "=", 0, name="supply_costs_heat")
+    p.add_constr(v["cap_costs_heat"] - v["grid_limit_heat"] * param["price_cap_heat"], "=", 0, name="cap_costs_heat")
+
+    p.add_constr(v["supply_costs_biom"] - v["biom_import_total"] * param["price_biomass"], "=", 0, name="supply_costs_biom")
+    p.add_constr(v["supply_costs_waste"] - v["waste_import_total"] * param["price_waste"], "=", 0, name="supply_costs_waste")
+    p.add_constr(v["supply_costs_hydrogen"] - v["hydrogen_import_total"] * param["price_hydrogen"], "=", 0, name="supply_costs_hydrogen")
+
+    ### Supply limitations ###
+
+    # Forbid/allow feed-in (user input)
+    if param["enable_feed_in_el"] == False:
+        p.add_constr(v["el_export_total"], "=", 0, name="no_feed_in_el")
+        p.add_constr(power["PV"] + power["WT"] + power["WAT"] + power["CHP"] + power["BCHP"] + power["WCHP"]
+                     + power["FC"] - power["HP"] - power["EB"] - power["CC"] - power["ELYZ"] - ch["BAT"],
+                     "=", dem["power"], name="no_feed_in_el_balance")
+    if param["enable_feed_in_gas"] == False:
+        p.add_constr(v["gas_export_total"], "=", 0, name="no_feed_in_gas")
+        p.add_constr(gas["import"] + gas["SAB"] - gas["CHP"] - gas["BOI"] - gas["GHP"] - ch["GS"],
+                     "=", 0, name="no_feed_in_gas_balance")
+
+    # Limitation of electricity, gas, heat, biomass, waste and hydrogen supply (user input)
+    for carrier, total, grid, limit_key in [("el", "el_import_total", "grid_limit_el", "el"),
+                                            ("gas", "gas_import_total", "grid_limit_gas", "gas"),
+                                            ("heat", "heat_import_total", "grid_limit_heat", "heat")]:
+        if param["enable_supply_" + carrier] == False:
+            p.add_constr(v[total], "=", 0, name="no_supply_" + carrier)
+        if param["enable_cap_limit_" + carrier] == True:
+            p.add_constr(v[grid], "<", param["cap_limit_" + carrier], name="cap_limit_" + carrier)
+        if param["enable_supply_limit_" + limit_key] == True:
+            p.add_constr(v[total], "<", param["supply_limit_" + limit_key], name="supply_limit_" + carrier)
+
+    for carrier, total, enable_key in [("biom", "biom_import_total", "biomass"),
+                                       ("waste", "waste_import_total", "waste"),
+                                       ("hydrogen", "hydrogen_import_total", "hydrogen")]:
+        if param["enable_supply_" + enable_key] == False:
+            p.add_constr(v[total], "=", 0, name="no_supply_" + carrier)
+        if param["enable_supply_limit_" + carrier] == True:
+            p.add_constr(v[total], "<", param["supply_limit_" + carrier], name="supply_limit_" + carrier)
+
+
+def _investment_costs(p, v, devs, param, dem, pruned):
+    """Annual investment, operation and demand related costs of the devices."""
+    x, cap = v["x"], v["cap"]
+    gas, power = v["gas"], v["power"]
+    n_days = param["n_clusters"]
+
+    t_clc = param["observation_time"]
+    rate = param["interest_rate"]
+
+    q = 1 + rate
+    crf = (q ** t_clc * rate) / (q ** t_clc - 1)  # Capital recovery factor
+
+    gas_prices = [130, 106, 104, 103, 116]
+    el_prices = [340, 349, 303, 302, 322]
+
+    prChange = {"el"   : (el_prices[-1]/el_prices[0])**(1/(2040-2024)),  # Price change factors per year for electricity
+                "gas"  : (gas_prices[-1]/gas_prices[0])**(1/(2040-2024)),  # Price change factors per year for natural gas
+                "infl" : 1.017}  # Price change factors per year for inflation
+
+    b = {key: (1 - (prChange[key] / q) ** t_clc) / (q - prChange[key])
+         for key in prChange.keys()}
+
+    dt = 1
+    n_months = min(12, n_days)  # demand related costs are summed over the first (up to) 12 design days
+
+    for dev in all_devs:
+
+        life_time = devs[dev]["life_time"]
+        n = int(t_clc / life_time)  # Number of replacements
+        r = 0.1
+        rval = sum((rate/q)**(i * life_time) for i in range(0, n+1)) - ((r**(n * life_time) * ((n+1) * life_time - t_clc)) / (life_time * q**t_clc))
+
+        # Annual investment costs (variable costs and fixed costs of a purchased device)
+        p.add_constr(v["c_inv"][dev] - cap[dev] * (crf * rval) * devs[dev]["inv_var"]
+                     - x[dev] * (crf * rval) * devs[dev].get("inv_fix", 0), "=", 0, name="c_inv_" + dev)
+
+        # Operation and maintenance costs
+        p.add_constr(v["c_om"][dev], "=", crf * b["infl"] * devs[dev]["cost_om"] * devs[dev]["inv_var"], name="c_om_" + dev)
+
+        # Demand related costs
+        if dev in ["CHP", "BOI", "GHP", "SAB"]:
+            p.add_constr(v["c_dem"][dev] - gas[dev][:n_months].sum() * (crf * b["gas"] * param["price_supply_gas"] * dt),
+                         "=", 0, name="c_dem_" + dev)
+        if dev in ["HP", "EB", "CC", "ELYZ", "FC"]:
+            p.add_constr(v["c_dem"][dev] - power[dev][:n_months].sum() * (crf * b["el"] * param["price_supply_el"] * dt),
+                         "=", 0, name="c_dem_" + dev)
+
+        # Total annual costs
+        p.add_constr(v["c_total"][dev] - v["c_inv"][dev] - v["c_om"][dev] - v["c_dem"][dev], "=", 0, name="c_total_" + dev)
+
+    # CO2 feed_in constraint
+    p.add_constr(v["el_export_total"] * param["co2_el_feed_in"] + v["gas_export_total"] * param["co2_gas_feed_in"],
+                 "<", param["co2_feed_in_limit"], name="co2_feed_in_limit")
+
+
+# Constraint sections of the energy hub model in the order in which they are added
+hub_sections = [("objectives", _objectives), ("device_selection", _device_selection), ("sizing", _sizing),
+                ("input_output", _input_output), ("balances", _balances), ("peak_demands", _peak_demands),
+                ("storages", _storages), ("totals", _totals), ("investment_costs", _investment_costs)]
+
+
+def map_vars(v, func):
+    """Apply func to every Var in the (nested) variable dict v."""
+    if isinstance(v, dict):
+        return {key: map_vars(val, func) for key, val in v.items()}
+    return func(v)
+
+
+def gurobi_vars(v, x):
+    """
+    Translate the Var blocks of v into gurobipy Var objects of the MVar x,
+    structured like the dicts of the dict-based builder (v["gas"]["CHP"][d][t], v["cap"]["HP"], ...).
+    """
+    gvars = np.empty(x.shape[0], dtype=object)
+    gvars[:] = x.tolist()
+
+    def to_gurobi(var):
+        if isinstance(var, LinExpr):  # state of charge of the superposition storage model
+            return _ExprValue(var, x)
+        if not isinstance(var, Var):  # zero flows of a pruned device
+            return var
+        return gvars[var.idx] if var.shape else gvars[int(var.idx)]
+
+    return map_vars(v, to_gurobi)
+
+
+def solution_values(v, x):
+    """
+    Solution values of the variable dict v for the solution vector x of the
+    problem: floats for scalar variables and arrays for blocks.
+    """
+    def value(var):
+        if isinstance(var, LinExpr):
+            return var.value(x)
+        if not isinstance(var, Var):  # zero flows of a pruned device
+            return np.asarray(var, dtype=float)
+        return x[var.idx] if var.shape else float(x[int(var.idx)])
+
+    return map_vars(v, value)
+
+
+# Variable blocks with one row per design day (the other blocks are scalars or calendar days)
+design_day_keys = list(flow_devs) + ["ch", "soc_intra", "soc_min", "soc_max"]
+
+
+class WarmStart:
+    """
+    Solution of a solved energy hub model as start of the next solve, which may
+    have other design days (same devices and switches), e.g.
+
+        warm_start = matrix_model.WarmStart()
+        optim_model.run_optim(devs, param_8, dem_8, result_dict, builder="matrix", warm_start=warm_start)
+        optim_model.run_optim(devs, param_12, dem_12, result_dict, builder="matrix", warm_start=warm_start)
+
+    The first run stores its solution, the second one starts from it. Design day
+    blocks take the values of the previous design day of the calendar day of each
+    new design day; all other variables keep their values. The start is complete
+    (one value per column), but not necessarily feasible.
+    """
+
+    def __init__(self):
+        self.values = None
+        self.sigma = None
+
+    def store(self, values, param):
+        """Store the solution values (see solution_values) of a model built with param."""
+        self.values = values
+        self.sigma = np.asarray(param["sigma"])
+
+    def vector(self, problem, v, param):
+        """Start vector for the problem (variables v) built with param, None if nothing is stored."""
+        if self.values is None:
+            return None
+        design_days = np.flatnonzero(np.sum(param["day_matrix"], axis=1) > 0)
+        previous_day = self.sigma[design_days]  # previous design day of every new design day
+        start = np.zeros(problem.num_vars)
+
+        def fill(var, value, key):
+            if not isinstance(var, Var):  # zero flows of pruned devices, superposition state of charge
+                return
+            value = np.asarray(value, dtype=float)
+            if key in design_day_keys:
+                value = value[previous_day]
+            start[var.idx] = value
+
+        for key, block in v.items():
+            if isinstance(block, dict):
+                for dev, var in block.items():
+                    fill(var, self.values[key][dev], key)
+            else:
+                fill(block, self.values[key], key)
+        return np.clip(start, problem.lb, problem.ub)
+
+
+def build_gurobi_model(devs, param, dem, prune=False):
+    """
+    Build the energy hub model with the matrix API. Returns the gurobipy model
+    and the variables as gurobipy Var objects (see gurobi_vars).
+    """
+    problem, v = build_hub_problem(devs, param, dem, prune)
+    model, x = problem.to_gurobi()
+    return model, gurobi_vars(v, x)
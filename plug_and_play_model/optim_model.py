@@ -14,19 +14,33 @@ Contact:        Marco Wirtz
 
 """
 
+import copy
 import math
 import gurobipy as gp
 import numpy as np
 import time
-import os
+import matrix_model
+import sparse_model
+import artifacts
+import solvers
+import scaling
+from year_series import YearSeries
+from run_metrics import RunMetrics
 #from optim_app.help_functions import create_excel_file
 
 
-def run_optim(devs, param, dem, result_dict):
+def _build_dict_model(devs, param, dem, metrics=None):
+    """
+    Build the energy hub model variable by variable and constraint by constraint.
+    Returns the gurobipy model and a dict with all variable dicts.
+    The phases "variables", "constraints" and "objective" are recorded in metrics (RunMetrics).
+    """
+
+    if metrics is None:
+        metrics = RunMetrics()
 
     #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
     # Load model parameters
-    start_time = time.time()
 
     days = range(param["n_clusters"])
     time_steps = range(24)
@@ -205,57 +219,19 @@ def run_optim(devs, param, dem, result_dict):
     # Update the model to integrate the new variables
     model.update()
 
-    # Add constraints for total annualized costs
-    model.addConstr(obj["tac"] == (
-        sum(c_total[dev] for dev in all_devs) +  # annualized investments
-        supply_costs_gas + cap_costs_gas +       # gas costs
-        supply_costs_el + cap_costs_el + 
-        supply_costs_heat + cap_costs_heat-         # electricity costs
-        rev_feed_in_el - rev_feed_in_gas +       # revenues
-        supply_costs_biom +                      # biomass
-        supply_costs_waste +                     # waste
-        supply_costs_hydrogen +                  # hydrogen
-        (gas_import_total * param["co2_gas"] +
-         el_import_total * param["co2_el"] +
-         heat_import_total * param["co2_heat"] +
-        biom_import_total * param["co2_biom"] +
-        waste_import_total * param["co2_waste"]) * param["co2_tax"])  # CO2 tax
-    )
-
-    # Add constraints for total CO2 emissions
-    model.addConstr(obj["co2"] == (
-        el_import_total * param["co2_el"] +
-        gas_import_total * param["co2_gas"] +
-        heat_import_total * param["co2_heat"] +
-        biom_import_total * param["co2_biom"] +
-        waste_import_total * param["co2_waste"] +
-        hydrogen_import_total * param["co2_hydrogen"] -
-        el_export_total * param["co2_el_feed_in"] -
-        gas_export_total * param["co2_gas_feed_in"]
-    ))
-
-    # Set the primary objective to minimize the total annualized costs
-    model.setObjective(obj["tac"], gp.GRB.MINIMIZE)
-    model.addConstr(obj["co2"] <= 1e-6)
-
-    # If the observation time is less than 16, set a secondary objective to minimize CO2 emissions
-    # if param["observation_time"] < 16:
-    #     model.setObjectiveN(obj["co2"], index=1, priority=2)
-    # else:f
-    #     # Ensure CO2 emissions are below or equal to 0 if observation time is 16 or more
-    #     model.addConstr(obj["co2"] <= 1e-6)
-
-    # model.addConstr(obj["co2"] <= 1e-6)
-    # Optimize the model
-    model.optimize()
-
+    metrics.lap("variables")
 
 
     #%% Constraints
 
 
     for device in all_devs:
-        if devs[device]["feasible"] == True:
+        if devs[device]["feasible"] == True and param.get("free_portfolio", False):
+            # Purchase decision: capacity is 0 or between minimum and maximum capacity
+            if device not in ["PV", "STC"]:
+                model.addConstr(cap[device] >= devs[device]["min_cap"] * x[device])
+                model.addConstr(cap[device] <= devs[device]["max_cap"] * x[device])
+        elif devs[device]["feasible"] == True:
             model.addConstr(x[device] == 1)
             if device not in ["PV", "STC"]:
                 model.addConstr(cap[device] >= devs[device]["min_cap"])
@@ -605,7 +581,8 @@ def run_optim(devs, param, dem, result_dict):
         # Annual investment costs
         for device in all_devs:
             # INFO: BuildingOT - inv[device] e specific
-            model.addConstr(c_inv[device] == crf * rval[device] * cap[device] * devs[device]["inv_var"])
+            model.addConstr(c_inv[device] == crf * rval[device] * (cap[device] * devs[device]["inv_var"]
+                                                                   + x[device] * devs[device].get("inv_fix", 0)))
             
         # Operation and maintenance costs
         for device in all_devs:    
@@ -673,7 +650,7 @@ def run_optim(devs, param, dem, result_dict):
         else:
             ann_factor = ( 1 + invest_replacements - res_value) * CRF 
         for device in all_devs:
-            model.addConstr(inv[device] == devs[device]["inv_var"] * cap[device])  
+            model.addConstr(inv[device] == devs[device]["inv_var"] * cap[device] + devs[device].get("inv_fix", 0) * x[device])
             
         # Annual investment costs
         for device in all_devs:
@@ -698,453 +675,965 @@ def run_optim(devs, param, dem, result_dict):
         "co2_feed_in_limit"
     )
 
-    
+    model.update()
+    metrics.lap("constraints")
 
 
-    #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # Set model parameters and execute calculation
+    #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+    # Objective
 
-    print("Precalculation and model set up done in %f seconds."  % (time.time() - start_time))
+    # Add constraints for total annualized costs
+    model.addConstr(obj["tac"] == (
+        sum(c_total[dev] for dev in all_devs) +  # annualized investments
+        supply_costs_gas + cap_costs_gas +       # gas costs
+        supply_costs_el + cap_costs_el + 
+        supply_costs_heat + cap_costs_heat-         # electricity costs
+        rev_feed_in_el - rev_feed_in_gas +       # revenues
+        supply_costs_biom +                      # biomass
+        supply_costs_waste +                     # waste
+        supply_costs_hydrogen +                  # hydrogen
+        (gas_import_total * param["co2_gas"] +
+         el_import_total * param["co2_el"] +
+         heat_import_total * param["co2_heat"] +
+        biom_import_total * param["co2_biom"] +
+        waste_import_total * param["co2_waste"]) * param["co2_tax"])  # CO2 tax
+    )
 
-    # Set solver parameters
-    model.Params.MIPGap   = 0.02  # ---,   gap for branch-and-bound algorithm
-    # model.Params.method = 2     # ---,   -1: default, 0: primal simplex, 1: dual simplex, 2: barrier, etc.
+    # Add constraints for total CO2 emissions
+    model.addConstr(obj["co2"] == (
+        el_import_total * param["co2_el"] +
+        gas_import_total * param["co2_gas"] +
+        heat_import_total * param["co2_heat"] +
+        biom_import_total * param["co2_biom"] +
+        waste_import_total * param["co2_waste"] +
+        hydrogen_import_total * param["co2_hydrogen"] -
+        el_export_total * param["co2_el_feed_in"] -
+        gas_export_total * param["co2_gas_feed_in"]
+    ))
 
-    # Execute calculation
-    start_time = time.time()
-    model.setParam('OutputFlag', 0)
-    model.optimize()
-    print("Optimization done. (%f seconds.)" % (time.time() - start_time))
+    # Set the primary objective to minimize the total annualized costs
+    model.setObjective(obj["tac"], gp.GRB.MINIMIZE)
+    co2_limit = param.get("co2_limit", 1e-6)  # carbon neutrality unless another limit is given
+    if co2_limit is not None and co2_limit < np.inf:
+        model.addConstr(obj["co2"] <= co2_limit)
 
+    # If the observation time is less than 16, set a secondary objective to minimize CO2 emissions
+    # if param["observation_time"] < 16:
+    #     model.setObjectiveN(obj["co2"], index=1, priority=2)
+    # else:f
+    #     # Ensure CO2 emissions are below or equal to 0 if observation time is 16 or more
+    #     model.addConstr(obj["co2"] <= 1e-6)
 
-    #%% Check and save results
+    model.update()
+    metrics.lap("objective")
+
+    v = {"x": x, "cap": cap, "area": area,
+         "gas": gas, "power": power, "heat": heat, "cool": cool,
+         "hydrogen": hydrogen, "biom": biom, "waste": waste,
+         "ch": ch, "soc": soc,
+         "inv": inv, "c_inv": c_inv, "c_om": c_om, "c_dem": c_dem, "c_total": c_total,
+         "grid_limit_el": grid_limit_el, "grid_limit_gas": grid_limit_gas, "grid_limit_heat": grid_limit_heat,
+         "el_import_total": el_import_total, "el_export_total": el_export_total,
+         "gas_import_total": gas_import_total, "gas_export_total": gas_export_total,
+         "heat_import_total": heat_import_total, "heat_export_total": heat_export_total,
+         "biom_import_total": biom_import_total, "waste_import_total": waste_import_total,
+         "hydrogen_import_total": hydrogen_import_total,
+         "rev_feed_in_gas": rev_feed_in_gas, "rev_feed_in_el": rev_feed_in_el,
+         "supply_costs_el": supply_costs_el, "cap_costs_el": cap_costs_el,
+         "supply_costs_gas": supply_costs_gas, "cap_costs_gas": cap_costs_gas,
+         "supply_costs_heat": supply_costs_heat, "cap_costs_heat": cap_costs_heat,
+         "supply_costs_biom": supply_costs_biom, "supply_costs_waste": supply_costs_waste,
+         "supply_costs_hydrogen": supply_costs_hydrogen,
+         "obj": obj}
+
+    return model, v
+
+
+def run_optim(devs, param, dem, result_dict, builder="dict", prune=False,
+              artifact_policy="full", run_name="model", compress=False, solver="gurobi",
+              threads=None, metrics=None, fix_binaries=False, lp_method=None, crossover=True,
+              return_series=False, scale=False, warm_start=None):
+    """
+    Build and solve the energy hub model and write the results into result_dict.
+
+    builder : "dict" (default) builds the model variable by variable,
+              "matrix" assembles it with the gurobipy matrix API (see matrix_model.py).
+    With param["free_portfolio"] = True (default False), the purchase decisions x of
+    the feasible devices are optimized: a device is either not installed or sized
+    between min_cap and max_cap (min_area and max_area for PV and STC), and its fixed
+    investment costs devs[device]["inv_fix"] (default 0) are paid if installed (see
+    portfolio.py). The CO2 emissions are limited to param["co2_limit"] (default 1e-6,
+    i.e. carbon neutrality); with co2_limit None or inf, they are not limited.
+    prune   : Leave out the flow and storage variables of infeasible devices
+              (matrix builder only, see matrix_model.pruned_devices). The
+              result_dict has the same entries; flows of these devices are zero.
+    artifact_policy : Files written after the solve: "full" (default, results/<run_name>.sol
+                      and .lp), "solution" (only .sol) or "off".
+    run_name        : File name of the solution and model file (default "model").
+    compress        : Write gzip-compressed files (.sol.gz, .lp.gz).
+    Solution files can be loaded with artifacts.read_solution.
+    solver          : "gurobi" (default) or "highs" (open source, matrix builder only).
+    threads         : Number of solver threads (default: solver default, i.e. all cores).
+    metrics         : RunMetrics (see run_metrics.py) in which the wall time and memory
+                      of every phase (model set-up, solve, result extraction) are recorded.
+    fix_binaries    : The purchase decisions x are fixed by devs[device]["feasible"]. With
+                      fix_binaries=True, fixed binaries are turned into continuous variables
+                      with fixed bounds, so the model is solved as LP. Default: False (the
+                      MIP presolve of HiGHS removes the fixed binaries and was faster than
+                      its LP solvers; for Gurobi, the LP has not been measured, see
+                      benchmark.py lp).
+    lp_method       : LP algorithm: "barrier", "dual" (dual simplex) or None (solver default).
+    crossover       : crossover=False solves the LP with the barrier method without crossover
+                      (faster; objective value and capacities are exact, the hourly
+                      flows are an interior solution).
+    return_series   : Return the full-year time series (YearSeries) as well, i.e.
+                      (result_dict, full); full is None if no feasible solution was found.
+    scale           : Solve the scaled model (units per variable block, see scaling.py;
+                      matrix builder only). The results are in the original units, the
+                      coefficient ranges before and after scaling are printed.
+    warm_start      : matrix_model.WarmStart (matrix builder only). If it contains the
+                      solution of a previous run (e.g. with fewer design days), Gurobi
+                      starts from it: MIP start for MIPs, primal start of the simplex
+                      for LPs. HiGHS solves without it (its start solution made the
+                      solves slower). The solution of this run is stored in it afterwards.
+    With param["full_year"] = True (see load_params), all 365 days are modeled
+    without clustering; this requires builder="matrix".
+    """
 
-    # Check if optimal solution was found
-    if model.Status in (3, 4) or model.SolCount == 0:  # "INFEASIBLE" or "INF_OR_UNBD"
+    #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+    # Load model parameters
 
-        print("Optimization: No feasible solution found.")
-        try:
-            # print("Try to calculate IIS.")
-            # model.computeIIS()
-            # model.write("model.ilp")
-            # print("IIS was calculated and saved as model.ilp")
-            pass
+    artifacts.check_policy(artifact_policy)
+    solvers.check_solver(solver)
+    solvers.check_lp_method(lp_method)
+    if param.get("full_year") and builder != "matrix":
+        raise ValueError("The full-year mode requires builder='matrix'.")
+    if warm_start is not None and builder != "matrix":
+        raise ValueError("Warm starts require builder='matrix'.")
 
-        except:
-            print("Could not calculate IIS.")
-        return {}
+    if metrics is None:
+        metrics = RunMetrics()
+    metrics.start()
 
+    #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+    # Set up model
+
+    if solver != "gurobi" or scale:
+        if builder != "matrix":
+            raise ValueError(("Scaling" if scale else f"The solver {solver}") + " requires builder='matrix'.")
+        problem, v = matrix_model.build_hub_problem(devs, param, dem, prune)
+        if fix_binaries:
+            problem.fix_integers()
+        metrics.lap("build")
+        return _optimize_problem(problem, v, devs, param, dem, result_dict, solver, return_series,
+                                 artifact_policy=artifact_policy, run_name=run_name, compress=compress,
+                                 threads=threads, metrics=metrics, lp_method=lp_method, crossover=crossover,
+                                 scale=scale, warm_start=warm_start)
+
+    if builder == "matrix":
+        problem, v = matrix_model.build_hub_problem(devs, param, dem, prune)
+        if fix_binaries:
+            problem.fix_integers()
+        metrics.lap("build")
+        model, x = problem.to_gurobi()
+        if warm_start is not None:
+            solvers.set_gurobi_start(model, x, warm_start.vector(problem, v, param))
+        v = matrix_model.gurobi_vars(v, x)
+        metrics.lap("model")
+    elif prune:
+        raise ValueError("Pruning infeasible devices requires builder='matrix'.")
+    elif builder == "dict":
+        if any(devs[dev]["storage_model"] != "chain" for dev in matrix_model.storage_devs):
+            raise ValueError("The dict builder only supports the chain storage model.")
+        model, v = _build_dict_model(devs, param, dem, metrics)
+        if fix_binaries:
+            _fix_binaries(model)
+            metrics.lap("fix_binaries")
     else:
-        result_dir = "results"
-        if not os.path.exists(result_dir):
-            os.makedirs(result_dir)
-            
-        model.write(os.path.join(result_dir, "model.sol"))
-        model.write(os.path.join(result_dir, "model.lp"))
-
-        used_devices = [dev for dev in all_devs if cap[dev].X > 0.1]
+        raise ValueError(f"Unknown model builder {builder}.")
 
-        
-        result_dict.update({
-            "Devices": {}
-        })
+    return _optimize(model, v, devs, param, dem, result_dict, return_series,
+                     artifact_policy=artifact_policy, run_name=run_name, compress=compress,
+                     threads=threads, metrics=metrics, lp_method=lp_method, crossover=crossover,
+                     warm_start=warm_start)
 
 
-        for k in used_devices:
-            
-            result_dict["Devices"][k] = {"cap": round(cap[k].X, 2)}
+def _fix_binaries(model):
+    """
+    Turn binary variables which are fixed by an equality row (e.g. x == 1) into
+    continuous variables with fixed bounds (see sparse_model.fixed_integer_columns).
+    If all binaries are fixed, the model is an LP afterwards. Returns the number
+    of fixed variables.
+    """
+    model.update()
+    variables = model.getVars()
+    constrs = model.getConstrs()
+    cols, values = sparse_model.fixed_integer_columns(
+        model.getA(), model.getAttr("Sense", constrs), model.getAttr("RHS", constrs),
+        model.getAttr("VType", variables), model.getAttr("LB", variables), model.getAttr("UB", variables))
+    fixed = [variables[col] for col in cols]
+    model.setAttr("LB", fixed, values.tolist())
+    model.setAttr("UB", fixed, values.tolist())
+    model.setAttr("VType", fixed, ["C"] * len(fixed))
+    model.update()
+    return len(fixed)
+
+
+def _block_values(model, block):
+    """
+    Solution values of a variable block as array: nested dicts block[d][t] of the
+    dict builder, arrays of gurobipy variables of the matrix builder, expressions
+    with a getValue method, or constant arrays (devices left out by pruning).
+    """
+    if isinstance(block, dict):
+        variables = [var for day in block.values() for var in day.values()]
+        return np.reshape(model.getAttr("X", variables), (len(block), -1))
+    if hasattr(block, "getValue"):
+        return block.getValue()
+    block = np.asarray(block)
+    if block.dtype != object:
+        return block.astype(float)
+    if block.ndim == 0:  # scalar variable
+        return block.item().X
+    return np.reshape(model.getAttr("X", block.ravel().tolist()), block.shape)
+
+
+def _solution_values(model, v):
+    """Solution values of all variables in v: floats for scalar variables, arrays for blocks."""
+    values = {}
+    for key, block in v.items():
+        if isinstance(block, dict):
+            values[key] = {k: _block_values(model, b) for k, b in block.items()}
+        else:
+            values[key] = block.X
+    return values
+
+
+def _weighted_sum(series, weights):
+    """
+    sum(sum(series[d][t] for t) * weights[d] for d), with the additions in the same
+    order as in the Python loop (np.sum adds pairwise and may round differently).
+    """
+    return np.cumsum(np.cumsum(series, axis=1)[:, -1] * np.asarray(weights))[-1]
+
+
+def _extract_results(val, devs, param, dem, result_dict):
+    """
+    Write the results of a solved energy hub model into result_dict. val contains
+    the solution values of all variables (see _solution_values), floats for scalar
+    variables and arrays for time series. Returns result_dict and the full-year
+    time series (YearSeries).
+    """
+
+    x, cap, area = val["x"], val["cap"], val["area"]
+    c_inv, c_om, c_total = val["c_inv"], val["c_om"], val["c_total"]
+    el_import_total, el_export_total = val["el_import_total"], val["el_export_total"]
+    gas_import_total, gas_export_total = val["gas_import_total"], val["gas_export_total"]
+    heat_import_total = val["heat_import_total"]
+    biom_import_total, waste_import_total = val["biom_import_total"], val["waste_import_total"]
+    hydrogen_import_total = val["hydrogen_import_total"]
+    rev_feed_in_gas, rev_feed_in_el = val["rev_feed_in_gas"], val["rev_feed_in_el"]
+    supply_costs_el, cap_costs_el = val["supply_costs_el"], val["cap_costs_el"]
+    supply_costs_gas, cap_costs_gas = val["supply_costs_gas"], val["cap_costs_gas"]
+    supply_costs_heat, cap_costs_heat = val["supply_costs_heat"], val["cap_costs_heat"]
+    supply_costs_biom, supply_costs_waste = val["supply_costs_biom"], val["supply_costs_waste"]
+    supply_costs_hydrogen = val["supply_costs_hydrogen"]
+    obj = val["obj"]
+    all_devs = list(cap.keys())
+    weights = param["day_weights"]
+
+    used_devices = [dev for dev in all_devs if cap[dev] > 0.1]
 
+    
+    result_dict.update({
+        "Devices": {}
+    })
 
-        co2_emissions = el_import_total.X * param["co2_el"] + gas_import_total.X * param["co2_gas"] + heat_import_total.X * param["co2_heat"] + biom_import_total.X * param["co2_biom"] + waste_import_total.X * param["co2_waste"] + hydrogen_import_total.X * param["co2_hydrogen"] - el_export_total.X * param["co2_el_feed_in"] - gas_export_total.X * param["co2_gas_feed_in"]
 
-        result_dict["CO2 Emissions"] = {
+    for k in used_devices:
+        
+        result_dict["Devices"][k] = {"cap": round(cap[k], 2)}
 
-            "Total emissions": int(co2_emissions),
-  
-            "Onsite": int((gas_import_total.X * param["co2_gas"] + biom_import_total.X * param["co2_biom"] + waste_import_total.X * param["co2_waste"])),
-            "Feed-in Credit": int((el_export_total.X * param["co2_el_feed_in"] + gas_export_total.X * param["co2_gas_feed_in"])),
-
-            "Generated due to electricity import": int(el_import_total.X * param["co2_el"]),
-            "Won due to electricity export": int(el_export_total.X * param["co2_el_feed_in"]),
-            "Generated due to gas import": int(gas_import_total.X * param["co2_gas"]),
-            "Won due to gas export": int(gas_export_total.X * param["co2_gas_feed_in"]),
-            "Generated due to heat import": int(heat_import_total.X * param["co2_heat"]),
-            "Generated due to biom import": int(biom_import_total.X * param["co2_biom"]),
-            "Generated due to waste import": int(waste_import_total.X * param["co2_waste"]),
-            "Generated due to hydrogen import": int(hydrogen_import_total.X * param["co2_hydrogen"])
-        }
 
+    co2_emissions = el_import_total * param["co2_el"] + gas_import_total * param["co2_gas"] + heat_import_total * param["co2_heat"] + biom_import_total * param["co2_biom"] + waste_import_total * param["co2_waste"] + hydrogen_import_total * param["co2_hydrogen"] - el_export_total * param["co2_el_feed_in"] - gas_export_total * param["co2_gas_feed_in"]
 
-        # Total investment costs in EUR
+    result_dict["CO2 Emissions"] = {
 
-        result_dict["Total Costs"] = {
-            "Total annualized costs": int(obj["tac"].X),
-            "Total device costs": 
+        "Total emissions": int(co2_emissions),
+  
+        "Onsite": int((gas_import_total * param["co2_gas"] + biom_import_total * param["co2_biom"] + waste_import_total * param["co2_waste"])),
+        "Feed-in Credit": int((el_export_total * param["co2_el_feed_in"] + gas_export_total * param["co2_gas_feed_in"])),
+
+        "Generated due to electricity import": int(el_import_total * param["co2_el"]),
+        "Won due to electricity export": int(el_export_total * param["co2_el_feed_in"]),
+        "Generated due to gas import": int(gas_import_total * param["co2_gas"]),
+        "Won due to gas export": int(gas_export_total * param["co2_gas_feed_in"]),
+        "Generated due to heat import": int(heat_import_total * param["co2_heat"]),
+        "Generated due to biom import": int(biom_import_total * param["co2_biom"]),
+        "Generated due to waste import": int(waste_import_total * param["co2_waste"]),
+        "Generated due to hydrogen import": int(hydrogen_import_total * param["co2_hydrogen"])
+    }
+
+
+    # Total investment costs in EUR
+
+    result_dict["Total Costs"] = {
+        "Total annualized costs": int(obj["tac"]),
+        "Total device costs": 
+        {
+            "Total O&M costs": int(sum(c_om[k] for k in cap.keys())),
+            "Total investment costs": int(sum(c_inv[k] for k in cap.keys())),
+        },
+        "CO2 Tax": round(result_dict["CO2 Emissions"]["Onsite"] * param["co2_tax"],2),
+        "Supply costs":
+        {
+            "Total Costs": round(supply_costs_el + supply_costs_gas + supply_costs_heat + supply_costs_biom + supply_costs_waste + supply_costs_hydrogen - rev_feed_in_el - rev_feed_in_gas,2),
+
+            "Electricity": 
             {
-                "Total O&M costs": int(sum(c_om[k].X for k in cap.keys())),
-                "Total investment costs": int(sum(c_inv[k].X for k in cap.keys())),
+                "Supply costs": int(supply_costs_el),
+                "Cap costs": int(cap_costs_el),
+                "Feed-in revenues": int(rev_feed_in_el),
             },
-            "CO2 Tax": round(result_dict["CO2 Emissions"]["Onsite"] * param["co2_tax"],2),
-            "Supply costs":
+            "Gas":
             {
-                "Total Costs": round(supply_costs_el.X + supply_costs_gas.X + supply_costs_heat.X + supply_costs_biom.X + supply_costs_waste.X + supply_costs_hydrogen.X - rev_feed_in_el.X - rev_feed_in_gas.X,2),
-
-                "Electricity": 
-                {
-                    "Supply costs": int(supply_costs_el.X),
-                    "Cap costs": int(cap_costs_el.X),
-                    "Feed-in revenues": int(rev_feed_in_el.X),
-                },
-                "Gas":
-                {
-                    "Supply costs": int(supply_costs_gas.X),
-                    "Cap costs": int(cap_costs_gas.X),
-                    "Feed-in revenues": int(rev_feed_in_gas.X),
-                },
-                "Heat":
-                {
-                    "Supply costs": int(supply_costs_heat.X),
-                    "Cap costs": int(cap_costs_heat.X),
-                },
-                "Biomass": round(supply_costs_biom.X,2),
-                "Waste": round(supply_costs_waste.X,2),
-                "Hydrogen": round(supply_costs_hydrogen.X,2)
-            }
-
+                "Supply costs": int(supply_costs_gas),
+                "Cap costs": int(cap_costs_gas),
+                "Feed-in revenues": int(rev_feed_in_gas),
+            },
+            "Heat":
+            {
+                "Supply costs": int(supply_costs_heat),
+                "Cap costs": int(cap_costs_heat),
+            },
+            "Biomass": round(supply_costs_biom,2),
+            "Waste": round(supply_costs_waste,2),
+            "Hydrogen": round(supply_costs_hydrogen,2)
         }
+
+    }
    
-        
+    
 
-        # Grid flows (in and out) in MWh
-        result_dict["Grid Flows"] = {  
-            "Total electricity import"  : int(el_import_total.X)  ,  
-            "Total electricity export"    : int(el_export_total.X)  , 
-            "Total gas import" : int(gas_import_total.X)  , 
-            "Total gas export"   : int(gas_export_total.X)  ,
-            "Total heat import": int(heat_import_total.X) , 
-            "Total biomass import"   : int(biom_import_total.X)  ,   
-            "Total waste import"  : int(waste_import_total.X)  ,  
-            "Total hydrogen import": int(hydrogen_import_total.X) 
-        }
+    # Grid flows (in and out) in MWh
+    result_dict["Grid Flows"] = {  
+        "Total electricity import"  : int(el_import_total)  ,  
+        "Total electricity export"    : int(el_export_total)  , 
+        "Total gas import" : int(gas_import_total)  , 
+        "Total gas export"   : int(gas_export_total)  ,
+        "Total heat import": int(heat_import_total) , 
+        "Total biomass import"   : int(biom_import_total)  ,   
+        "Total waste import"  : int(waste_import_total)  ,  
+        "Total hydrogen import": int(hydrogen_import_total) 
+    }
 
-        
+    
 
-        
+    
 
-        # Calculate maximum grid flows (electricity, gas and heat)
+    # Calculate maximum grid flows (electricity, gas and heat)
 
-        # for k in ["import", "export"]:
+    # for k in ["import", "export"]:
 
-        #     result_dict["Grid Flows"]["max_el_" + k] = 0
-        #     result_dict["Grid Flows"]["max_gas_" + k] = 0
-        #     result_dict["Grid Flows"]["max_heat_" + k] = 0
+    #     result_dict["Grid Flows"]["max_el_" + k] = 0
+    #     result_dict["Grid Flows"]["max_gas_" + k] = 0
+    #     result_dict["Grid Flows"]["max_heat_" + k] = 0
 
-        #     for d in days:
-        #         for t in time_steps:
+    #     for d in days:
+    #         for t in time_steps:
 
-        #             if power[k][d][t].X > result_dict["grid_flows"]["max_el_" + k]:
-        #                 result_dict["grid_flows"]["max_el_" + k] = power[k][d][t].X
+    #             if power[k][d][t] > result_dict["grid_flows"]["max_el_" + k]:
+    #                 result_dict["grid_flows"]["max_el_" + k] = power[k][d][t]
 
-        #             if gas[k][d][t].X > result_dict["grid_flows"]["max_gas_" + k]:
-        #                 result_dict["grid_flows"]["max_gas_" + k] = gas[k][d][t].X
+    #             if gas[k][d][t] > result_dict["grid_flows"]["max_gas_" + k]:
+    #                 result_dict["grid_flows"]["max_gas_" + k] = gas[k][d][t]
 
-        #             if heat[k][d][t].X > result_dict["grid_flows"]["max_heat_" + k]:
-        #                 result_dict["grid_flows"]["max_heat_" + k] = heat[k][d][t].X
+    #             if heat[k][d][t] > result_dict["grid_flows"]["max_heat_" + k]:
+    #                 result_dict["grid_flows"]["max_heat_" + k] = heat[k][d][t]
+
+    #     result_dict["grid_flows"]["max_el_" + k] = int(result_dict["grid_flows"]["max_el_" + k])
+    #     result_dict["grid_flows"]["max_gas_" + k] = int(result_dict["grid_flows"]["max_gas_" + k])
+    #     result_dict["grid_flows"]["max_heat_" + k] = int(result_dict["grid_flows"]["max_heat_" + k])
+
+    # result_dict["grid_flows"]["max_biom"] = 0
+    # result_dict["grid_flows"]["max_waste"] = 0
+    # result_dict["grid_flows"]["max_hydrogen"] = 0
+    
+    # for d in days:
+    #     for t in time_steps:
+    #         if biom["import"][d][t] > result_dict["grid_flows"]["max_biom"]:
+    #             result_dict["grid_flows"]["max_biom"] = biom["import"][d][t]
 
-        #     result_dict["grid_flows"]["max_el_" + k] = int(result_dict["grid_flows"]["max_el_" + k])
-        #     result_dict["grid_flows"]["max_gas_" + k] = int(result_dict["grid_flows"]["max_gas_" + k])
-        #     result_dict["grid_flows"]["max_heat_" + k] = int(result_dict["grid_flows"]["max_heat_" + k])
+    #         if waste["import"][d][t] > result_dict["grid_flows"]["max_waste"]:\
+    #             result_dict["grid_flows"]["max_waste"] = waste["import"][d][t]  
 
-        # result_dict["grid_flows"]["max_biom"] = 0
-        # result_dict["grid_flows"]["max_waste"] = 0
-        # result_dict["grid_flows"]["max_hydrogen"] = 0
+    #         if hydrogen["import"][d][t] > result_dict["grid_flows"]["max_hydrogen"]:
+    #             result_dict["grid_flows"]["max_hydrogen"] = hydrogen["import"][d][t]        
         
-        # for d in days:
-        #     for t in time_steps:
-        #         if biom["import"][d][t].X > result_dict["grid_flows"]["max_biom"]:
-        #             result_dict["grid_flows"]["max_biom"] = biom["import"][d][t].X
+    # result_dict["grid_flows"]["max_biom"] = int(result_dict["grid_flows"]["max_biom"])
+    # result_dict["grid_flows"]["max_waste"] = int(result_dict["grid_flows"]["max_waste"])
+    # result_dict["grid_flows"]["max_hydrogen"] = int(result_dict["grid_flows"]["max_hydrogen"])
+
+
+    # Prepare time series of renewable curtailment
+    curtail = {
+        "power_PV_curtail": np.asarray(devs["PV"]["norm_power"]) * devs["PV"]["G_stc"] * devs["PV"]["eta"] * area["PV"] - val["power"]["PV"],
+        "power_WT_curtail": np.asarray(devs["WT"]["norm_power"]) * cap["WT"] - val["power"]["WT"],
+        "power_WAT_curtail": np.min([cap["WAT"], devs["WAT"]["potential"]]) - val["power"]["WAT"],
+        "heat_STC_curtail": np.asarray(devs["STC"]["specific_heat"]) * area["STC"] - val["heat"]["STC"],
+    }
+
+    if "PV" in used_devices:
+        result_dict["Devices"]["PV"]["curtailed"] = int(_weighted_sum(curtail["power_PV_curtail"], weights)/1000)
+    if "WT" in used_devices:
+        result_dict["Devices"]["WT"]["curtailed"] = int(_weighted_sum(curtail["power_WT_curtail"], weights)/1000)
+    if "WAT" in used_devices:
+        result_dict["Devices"]["WAT"]["curtailed"] = int(_weighted_sum(curtail["power_WAT_curtail"], weights)/1000)
+    if "STC" in used_devices:
+        result_dict["Devices"]["STC"]["curtailed"] = int(_weighted_sum(curtail["heat_STC_curtail"], weights)/1000)
+
+
+    # Calculate generation in kWh
+    eps = 0.01
+    for k in used_devices:
+        # Initialize the 'generated' key for the current device
+        result_dict["Devices"][k]["generated"] = 0
+
+        if k in ["STC", "HP", "EB", "BOI", "GHP", "BBOI", "WBOI"]:
+            result_dict["Devices"][k]["generated"] = int(_weighted_sum(val["heat"][k], weights))
+            if k == "HP":
+                generated = {   
+                    "heat": int(_weighted_sum(val["heat"][k], weights)),
+                    "cool": int(_weighted_sum(val["cool"][k], weights))
+                } 
+                result_dict["Devices"][k]["generated"] = generated
+        elif k in ["CC", "AC"]: 
+            result_dict["Devices"][k]["generated"] = int(_weighted_sum(val["cool"][k], weights))
+        elif k in ["PV", "WT", "WAT", "CHP", "BCHP", "WCHP", "ELYZ", "FC"]:
+            result_dict["Devices"][k]["generated"] = int(_weighted_sum(val["power"][k], weights))
+            if k in ["CHP", "BCHP", "WCHP"]:
+              generated = {
+                    "power": int(_weighted_sum(val["power"][k], weights)),
+                    "heat": int(_weighted_sum(val["heat"][k], weights))
+              }
+              result_dict["Devices"][k]["generated"] = generated
+        
+        # Calculate full load hours
+        if cap[k] > eps:
 
-        #         if waste["import"][d][t].X > result_dict["grid_flows"]["max_waste"]:\
-        #             result_dict["grid_flows"]["max_waste"] = waste["import"][d][t].X  
+            if k in ["CHP", "BCHP", "WCHP"]:
+                total_generated = result_dict["Devices"][k]["generated"]["power"] + result_dict["Devices"][k]["generated"]["heat"]
+                result_dict["Devices"][k]["full_load_hours"] = int(total_generated / cap[k])
+            elif k == "HP":
+                total_generated = result_dict["Devices"][k]["generated"]["heat"] + result_dict["Devices"][k]["generated"]["cool"]
+                result_dict["Devices"][k]["full_load_hours"] = int(total_generated / cap[k])
+            else:
+                result_dict["Devices"][k]["full_load_hours"] = int(result_dict["Devices"][k]["generated"] / cap[k])
+        else:
+            result_dict["Devices"][k]["full_load_hours"] = 0
 
-        #         if hydrogen["import"][d][t].X > result_dict["grid_flows"]["max_hydrogen"]:
-        #             result_dict["grid_flows"]["max_hydrogen"] = hydrogen["import"][d][t].X        
-            
-        # result_dict["grid_flows"]["max_biom"] = int(result_dict["grid_flows"]["max_biom"])
-        # result_dict["grid_flows"]["max_waste"] = int(result_dict["grid_flows"]["max_waste"])
-        # result_dict["grid_flows"]["max_hydrogen"] = int(result_dict["grid_flows"]["max_hydrogen"])
+    # result_dict["ELYZ"]["generated"] = int(sum(sum(power["ELYZ"][d][t] * devs["ELYZ"]["eta_el"]for t in time_steps) * param["day_weights"][d] for d in days)) 
 
+    # result_dict["SAB"]["generated"] = sum(sum(gas[k][d][t] for t in time_steps) * param["day_weights"][d] for d in days)  
 
-        # Prepare time series of renewable curtailment
-        power["PV_curtail"] = {}
-        power["WT_curtail"] = {}
-        power["WAT_curtail"] = {}
-        heat["STC_curtail"] = {}
-        for d in days:
-            power["PV_curtail"][d] = {}
-            power["WT_curtail"][d] = {}
-            power["WAT_curtail"][d] = {}
-            heat["STC_curtail"][d] = {}
-            for t in time_steps:
-                power["PV_curtail"][d][t] = devs["PV"]["norm_power"][d][t] * devs["PV"]["G_stc"] * devs["PV"]["eta"] * area["PV"].X - power["PV"][d][t].X
-                power["WT_curtail"][d][t] = devs["WT"]["norm_power"][d][t] * cap["WT"].X - power["WT"][d][t].X
-                power["WAT_curtail"][d][t] = np.min([cap["WAT"].X, devs["WAT"]["potential"]]) - power["WAT"][d][t].X
-                heat["STC_curtail"][d][t] = devs["STC"]["specific_heat"][d][t] * area["STC"].X - heat["STC"][d][t].X
-
-
-        if "PV" in used_devices:
-            result_dict["Devices"]["PV"]["curtailed"] = int((sum(sum(power["PV_curtail"][d][t] for t in time_steps) * param["day_weights"][d] for d in days))/1000)
-        if "WT" in used_devices:
-            result_dict["Devices"]["WT"]["curtailed"] = int((sum(sum(power["WT_curtail"][d][t] for t in time_steps) * param["day_weights"][d] for d in days))/1000)
-        if "WAT" in used_devices:
-            result_dict["Devices"]["WAT"]["curtailed"] = int((sum(sum(power["WAT_curtail"][d][t] for t in time_steps) * param["day_weights"][d] for d in days))/1000)
-        if "STC" in used_devices:
-            result_dict["Devices"]["STC"]["curtailed"] = int((sum(sum(heat["STC_curtail"][d][t] for t in time_steps) * param["day_weights"][d] for d in days))/1000)
-
-
-        # Calculate generation in kWh
-        eps = 0.01
-        for k in used_devices:
-            # Initialize the 'generated' key for the current device
-            result_dict["Devices"][k]["generated"] = 0
-
-            if k in ["STC", "HP", "EB", "BOI", "GHP", "BBOI", "WBOI"]:
-                result_dict["Devices"][k]["generated"] = int(sum(sum(heat[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days))
-                if k == "HP":
-                    generated = {   
-                        "heat": int(sum(sum(heat[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days)),
-                        "cool": int(sum(sum(cool[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days))
-                    } 
-                    result_dict["Devices"][k]["generated"] = generated
-            elif k in ["CC", "AC"]: 
-                result_dict["Devices"][k]["generated"] = int(sum(sum(cool[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days))
-            elif k in ["PV", "WT", "WAT", "CHP", "BCHP", "WCHP", "ELYZ", "FC"]:
-                result_dict["Devices"][k]["generated"] = int(sum(sum(power[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days))
-                if k in ["CHP", "BCHP", "WCHP"]:
-                  generated = {
-                        "power": int(sum(sum(power[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days)),
-                        "heat": int(sum(sum(heat[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days))
-                  }
-                  result_dict["Devices"][k]["generated"] = generated
-            
-            # Calculate full load hours
-            if cap[k].X > eps:
-
-                if k in ["CHP", "BCHP", "WCHP"]:
-                    total_generated = result_dict["Devices"][k]["generated"]["power"] + result_dict["Devices"][k]["generated"]["heat"]
-                    result_dict["Devices"][k]["full_load_hours"] = int(total_generated / cap[k].X)
-                elif k == "HP":
-                    total_generated = result_dict["Devices"][k]["generated"]["heat"] + result_dict["Devices"][k]["generated"]["cool"]
-                    result_dict["Devices"][k]["full_load_hours"] = int(total_generated / cap[k].X)
-                else:
-                    result_dict["Devices"][k]["full_load_hours"] = int(result_dict["Devices"][k]["generated"] / cap[k].X)
+    # Area of PV and STC
+    
+    if "PV" in used_devices:
+        result_dict["Devices"]["PV"]["area"] = int(area["PV"])
+    if "STC" in used_devices:
+        result_dict["Devices"]["STC"]["area"] = int(area["STC"])
+    
+
+    # Calculate charge cycles of storages
+    for k in used_devices:
+        if k in ["TES", "CTES", "BAT", "H2S", "GS"]:
+            if cap[k] > eps:
+                result_dict["Devices"][k]["charge_cycles"] = int(_weighted_sum(np.abs(val["ch"][k])/2, weights) / cap[k])
             else:
-                result_dict["Devices"][k]["full_load_hours"] = 0
+                result_dict["Devices"][k]["charge_cycles"] = 0
 
-        # result_dict["ELYZ"]["generated"] = int(sum(sum(power["ELYZ"][d][t].X * devs["ELYZ"]["eta_el"]for t in time_steps) * param["day_weights"][d] for d in days)) 
+        # Calculate volume of thermal storages
+        if k in ["TES", "CTES"]:
+            result_dict["Devices"][k]["volume"] = round(cap[k] / (param["c_w"] * param["rho_w"] * devs[k]["delta_T"]) * 3600, 1)
+    
 
-        # result_dict["SAB"]["generated"] = sum(sum(gas[k][d][t].X for t in time_steps) * param["day_weights"][d] for d in days)  
+    # Print cost of all devices
 
-        # Area of PV and STC
-        
-        if "PV" in used_devices:
-            result_dict["Devices"]["PV"]["area"] = int(area["PV"].X)
-        if "STC" in used_devices:
-            result_dict["Devices"]["STC"]["area"] = int(area["STC"].X)
-        
+    for k in used_devices:
+        result_dict["Devices"][k]["cost"] = int(c_total[k])
 
-        # Calculate charge cycles of storages
-        for k in used_devices:
-            if k in ["TES", "CTES", "BAT", "H2S", "GS"]:
-                if cap[k].X > eps:
-                    result_dict["Devices"][k]["charge_cycles"] = int(sum(sum(abs(ch[k][d][t].X)/2 for t in time_steps) * param["day_weights"][d] for d in days) / cap[k].X)
-                else:
-                    result_dict["Devices"][k]["charge_cycles"] = 0
+    # Calculate share of renewables
 
-            # Calculate volume of thermal storages
-            if k in ["TES", "CTES"]:
-                result_dict["Devices"][k]["volume"] = round(cap[k].X / (param["c_w"] * param["rho_w"] * devs[k]["delta_T"]) * 3600, 1)
-        
+    # shared_renew = 0
 
-        # Print cost of all devices
+    # for k in ["PV", "WT", "WAT", "STC"]:
+    #     if k in used_devices:
+    #         shared_renew += result_dict["Devices"][k]["generated"]
 
-        for k in used_devices:
-            result_dict["Devices"][k]["cost"] = int(c_total[k].X)
+    # shared_renew = shared_renew/(shared_renew + el_import_total + gas_import_total + biom_import_total + waste_import_total + hydrogen_import_total + heat_import_total) * 100
 
-        # Calculate share of renewables
 
-        # shared_renew = 0
 
-        # for k in ["PV", "WT", "WAT", "STC"]:
-        #     if k in used_devices:
-        #         shared_renew += result_dict["Devices"][k]["generated"]
+    # result_dict["Percent of renewable energies"] = round(shared_renew, 1)
+    
+    ### REWRITE DESIGN DAYS IN FULL YEAR ###
 
-        # shared_renew = shared_renew/(shared_renew + el_import_total.X + gas_import_total.X + biom_import_total.X + waste_import_total.X + hydrogen_import_total.X + heat_import_total.X) * 100
+    tech_list = ["power_PV", "power_PV_curtail",
+                    "power_WT", "power_WT_curtail",
+                    "power_WAT", "power_WAT_curtail",
+                    "heat_STC", "heat_STC_curtail",
 
+                    "heat_HP", "cool_HP", "power_HP",
+                    "heat_EB", "power_EB",
+                    "cool_CC", "power_CC", 
+                    "cool_AC", "heat_AC",
 
+                    "power_CHP", "heat_CHP", "gas_CHP",
+                    "heat_BOI", "gas_BOI",
+                    "heat_GHP", "gas_GHP",
 
-        # result_dict["Percent of renewable energies"] = round(shared_renew, 1)
-        
-        ### REWRITE DESIGN DAYS IN FULL YEAR ###
-
-        tech_list = ["power_PV", "power_PV_curtail",
-                        "power_WT", "power_WT_curtail",
-                        "power_WAT", "power_WAT_curtail",
-                        "heat_STC", "heat_STC_curtail",
-
-                        "heat_HP", "cool_HP", "power_HP",
-                        "heat_EB", "power_EB",
-                        "cool_CC", "power_CC", 
-                        "cool_AC", "heat_AC",
-
-                        "power_CHP", "heat_CHP", "gas_CHP",
-                        "heat_BOI", "gas_BOI",
-                        "heat_GHP", "gas_GHP",
-
-                        "power_BCHP", "heat_BCHP", "biom_BCHP",
-                        "heat_BBOI", "biom_BBOI",
-                        "power_WCHP", "heat_WCHP", "waste_WCHP",
-                        "heat_WBOI", "waste_WBOI",
-
-                        "power_ELYZ", "hydrogen_ELYZ",
-                        "power_FC", "heat_FC", "hydrogen_FC",
-                        "hydrogen_SAB", "gas_SAB",
-
-                        "ch_TES", "ch_CTES", "ch_BAT", "ch_GS", "ch_H2S",
-
-                        "dem_heat", "dem_cool", "dem_power", "dem_hydrogen",
-
-                        "biom_import", "waste_import", "hydrogen_import", "power_export", "power_import", "gas_import", "gas_export", "heat_import"
-                        ]
-
-        soc_list = ["soc_TES", "soc_CTES", "soc_BAT", "soc_GS", "soc_H2S"]
-
-        # Arrange full time series with 8760 steps
-        full = {}
-        for item in tech_list:
-            full[item] = np.zeros(8760)
-        # Get list of days used as type days
-        z = param["day_matrix"]
-        typedays = []
-        for d in range(365):
-            if any(z[d]):
-                typedays.append(d)
-        # Arrange time series
-        for d in range(365):
-            match = np.where(z[:,d] == 1)[0][0]
-            typeday = np.where(typedays == match)[0][0]
-            for item in tech_list:
-                m, tech = item.split("_", 1)
-                if not m == "soc":
-                    if m == "power":
-                        m_arr = power
-                    elif m == "heat":
-                        m_arr = heat
-                    elif m == "cool":
-                        m_arr = cool
-                    elif m == "hydrogen":
-                        m_arr = hydrogen
-                    elif m == "gas":
-                        m_arr = gas
-                    elif m == "biom":
-                        m_arr = biom
-                    elif m == "waste":
-                        m_arr = waste
-                    elif m == "ch":
-                        m_arr = ch
-                    elif m == "dem":
-                        m_arr = dem
-                    for t in range(24):
-                        if m == "dem" or tech == "PV_curtail" or tech == "STC_curtail" or tech == "WT_curtail" or tech == "WAT_curtail":
-                            full[item][24*d+t] = m_arr[tech][typeday][t]
-                        else:
-                            full[item][24*d+t] = m_arr[tech][typeday][t].X
-                        # print("full["+item+"][" + str(24*d+t) + "] = m_arr["+tech+"]["+str(typeday)+"]["+str(t)+"].X)")
-
-        for item in soc_list:
-            m, tech = item.split("_", 1)
-            if m == "soc":
-                full[item] = np.zeros(8760)
-                for d in range(365):
-                    for t in range(24):
-                        full[item][24*d+t] = soc[tech][d][t].X
-
-        ### CALC MONTHLY VALS ###
-        month_tuple = ("Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec")
-        days_sum = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]
-
-        # Calc ambient heat and mean COP
-
-        if "HP" in used_devices:
-            full["amb_heat_HP"] = full["heat_HP"] - full["power_HP"]
-            result_dict["Devices"]["HP"]["mean_COP"] = round(np.sum(full["heat_HP"]) / np.sum(full["power_HP"]),2)
-
-
-        # Remove all devices with generated = 0
-
-        to_remove = []
-        for k in used_devices:
-            if k not in ["BAT", "GS", "H2S", "TES", "CTES"]:
-                if k in ["CHP", "BCHP", "WCHP"]:
-                    if result_dict["Devices"][k]["generated"]["power"] == 0 and result_dict["Devices"][k]["generated"]["heat"] == 0:
-                        to_remove.append(k)
-                else:
-                    if result_dict["Devices"][k]["generated"] == 0:
-                        to_remove.append(k)
-        
-        for k in to_remove:
-            used_devices.remove(k)
-            result_dict["Devices"].pop(k, None)
-                
+                    "power_BCHP", "heat_BCHP", "biom_BCHP",
+                    "heat_BBOI", "biom_BBOI",
+                    "power_WCHP", "heat_WCHP", "waste_WCHP",
+                    "heat_WBOI", "waste_WBOI",
+
+                    "power_ELYZ", "hydrogen_ELYZ",
+                    "power_FC", "heat_FC", "hydrogen_FC",
+                    "hydrogen_SAB", "gas_SAB",
+
+                    "ch_TES", "ch_CTES", "ch_BAT", "ch_GS", "ch_H2S",
+
+                    "dem_heat", "dem_cool", "dem_power", "dem_hydrogen",
+
+                    "biom_import", "waste_import", "hydrogen_import", "power_export", "power_import", "gas_import", "gas_export", "heat_import"
+                    ]
+
+    soc_list = ["soc_TES", "soc_CTES", "soc_BAT", "soc_GS", "soc_H2S"]
 
-        # Calculate the peak_generation of every device
+    # Full time series with 8760 steps, expanded from the design days on access
+    design_days = {}
+    for item in tech_list:
+        m, tech = item.split("_", 1)
+        if item in curtail:
+            design_days[item] = curtail[item]
+        elif m == "dem":
+            design_days[item] = dem[tech]
+        else:
+            design_days[item] = val[m][tech]
+
+    # Calc ambient heat and mean COP
+
+    if "HP" in used_devices:
+        design_days["amb_heat_HP"] = val["heat"]["HP"] - val["power"]["HP"]
+
+    full = YearSeries(design_days, param["sigma"],
+                      full_year={item: val["soc"][item.split("_", 1)[1]] for item in soc_list})
 
-        # peak_generation is the peak generation in kW, not in kWh
+    ### CALC MONTHLY VALS ###
 
-        for k in used_devices:
+    if "HP" in used_devices:
+        result_dict["Devices"]["HP"]["mean_COP"] = round(np.sum(full["heat_HP"]) / np.sum(full["power_HP"]),2)
 
+
+    # Remove all devices with generated = 0
+
+    to_remove = []
+    for k in used_devices:
+        if k not in ["BAT", "GS", "H2S", "TES", "CTES"]:
             if k in ["CHP", "BCHP", "WCHP"]:
-                peak_generation = max(heat[k][d][t].X + power[k][d][t].X for d in days for t in time_steps)
-                result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
-            if k in ["HP"]:
-                peak_generation = max( max(heat[k][d][t].X, cool[k][d][t].X) for d in days for t in time_steps)
-                result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
-            if "generated" in result_dict["Devices"][k]:
-                try:
-                    if k in ["EB", "CC", "ELYZ", "FC", "STC", "AC"]:
-                        peak_generation = max(heat[k][d][t].X for d in days for t in time_steps)
-                        result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
-                    else:
-                        peak_generation = max(power[k][d][t].X for d in days for t in time_steps)
-                        result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
-                except KeyError:
-                    result_dict["Devices"][k]["peak_generation"] = 0
+                if result_dict["Devices"][k]["generated"]["power"] == 0 and result_dict["Devices"][k]["generated"]["heat"] == 0:
+                    to_remove.append(k)
+            else:
+                if result_dict["Devices"][k]["generated"] == 0:
+                    to_remove.append(k)
+    
+    for k in to_remove:
+        used_devices.remove(k)
+        result_dict["Devices"].pop(k, None)
+            
 
-        
+    # Calculate the peak_generation of every device
 
-        """ 
-        monthly_val = {}
-        year_peak = {}
-        year_sum = {}
-        for m in ["power_PV", "power_WT", "power_WAT", "heat_STC", "heat_HP", "amb_heat_HP"]:
-            monthly_val[m] = {}
-            year_peak[m] = int(np.max(full[m]))
-            year_sum[m] = int(np.sum(full[m]))
-            for month in range(12):
-                monthly_val[m][month_tuple[month]] = sum(full[m][t] for t in range(days_sum[month]*24, days_sum[month+1]*24))
-
-        result_dict["monthly_val"] = monthly_val
-        result_dict["year_peak"].update(year_peak)
-        result_dict["year_sum"].update(year_sum)
-        """
+    # peak_generation is the peak generation in kW, not in kWh
+
+    for k in used_devices:
+
+        if k in ["CHP", "BCHP", "WCHP"]:
+            peak_generation = float(np.max(val["heat"][k] + val["power"][k]))
+            result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
+        if k in ["HP"]:
+            peak_generation = float(np.max(np.maximum(val["heat"][k], val["cool"][k])))
+            result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
+        if "generated" in result_dict["Devices"][k]:
+            try:
+                if k in ["EB", "CC", "ELYZ", "FC", "STC", "AC"]:
+                    peak_generation = float(np.max(val["heat"][k]))
+                    result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
+                else:
+                    peak_generation = float(np.max(val["power"][k]))
+                    result_dict["Devices"][k]["peak_generation"] = round(peak_generation, 2)
+            except KeyError:
+                result_dict["Devices"][k]["peak_generation"] = 0
+
+    
+
+    """ 
+    monthly_val = {}
+    year_peak = {}
+    year_sum = {}
+    for m in ["power_PV", "power_WT", "power_WAT", "heat_STC", "heat_HP", "amb_heat_HP"]:
+        year_peak[m] = int(full.peak(m))
+        year_sum[m] = int(full.sum(m))
+        monthly_val[m] = full.monthly_sum(m)
+
+    result_dict["monthly_val"] = monthly_val
+    result_dict["year_peak"].update(year_peak)
+    result_dict["year_sum"].update(year_sum)
+    """
+
+     #  create_excel_file.create_excel_file(full, dem, devs, "45484", time_steps, days)
+
+    # Remove all keys that have "cap" = 0
+    #for k in all_devs:
+    #    if cap[k] < eps:
+    #        result_dict.pop(k, None)
+
+    return result_dict, full
 
-         #  create_excel_file.create_excel_file(full, dem, devs, "45484", time_steps, days)
 
-        # Remove all keys that have "cap" = 0
-        #for k in all_devs:
-        #    if cap[k].X < eps:
-        #        result_dict.pop(k, None)
+def _optimize(model, v, devs, param, dem, result_dict, return_series=False,
+              artifact_policy="full", run_name="model", compress=False, threads=None, metrics=None,
+              lp_method=None, crossover=True, warm_start=None):
+    """
+    Solve a built energy hub model and write the results into result_dict.
+    Returns an empty dict if no feasible solution was found. With return_series,
+    the full-year time series (YearSeries) are returned as well (None if infeasible).
+    The phases "solve", "artifacts" and "extraction" are recorded in metrics (RunMetrics).
+    """
 
+    if metrics is None:
+        metrics = RunMetrics()
+
+    #%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+    # Set model parameters and execute calculation
+
+    # Set solver parameters
+    model.Params.MIPGap   = 0.02  # ---,   gap for branch-and-bound algorithm
+    if threads is not None:
+        model.Params.Threads = threads
+    if not model.IsMIP:
+        solvers.set_gurobi_lp_params(model, lp_method, crossover)
+    # model.Params.method = 2     # ---,   -1: default, 0: primal simplex, 1: dual simplex, 2: barrier, etc.
+
+    # Execute calculation
+    model.setParam('OutputFlag', 0)
+    model.optimize()
+    metrics.lap("solve")
+
+
+    #%% Check and save results
 
+    # Check if optimal solution was found
+    if model.Status in (3, 4) or model.SolCount == 0:  # "INFEASIBLE" or "INF_OR_UNBD"
+
+        print("Optimization: No feasible solution found.")
+        try:
+            # print("Try to calculate IIS.")
+            # model.computeIIS()
+            # model.write("model.ilp")
+            # print("IIS was calculated and saved as model.ilp")
+            pass
+
+        except:
+            print("Could not calculate IIS.")
+        return ({}, None) if return_series else {}
+
+    else:
+        artifacts.write_artifacts(model, artifact_policy, run_name, compress)
+        metrics.lap("artifacts")
+
+        # Solution values of all variables, read with one getAttr call per variable block
+        val = _solution_values(model, v)
+        if warm_start is not None:
+            warm_start.store(val, param)
+        result_dict, full = _extract_results(val, devs, param, dem, result_dict)
+        metrics.lap("extraction")
+
+        if return_series:
+            return result_dict, full
         return result_dict
 
+
+def _optimize_problem(problem, v, devs, param, dem, result_dict, solver, return_series=False,
+                      artifact_policy="full", run_name="model", compress=False, threads=None, metrics=None,
+                      lp_method=None, crossover=True, scale=False, warm_start=None):
+    """
+    Solve a LinearProblem of the matrix builder with a solver from solvers.py and
+    write the results into result_dict (same results and metrics as _optimize).
+    The phases "model" (transfer of the problem to the solver and scaling) and
+    "solve" are measured in solvers.solve.
+    """
+
+    if metrics is None:
+        metrics = RunMetrics()
+
+    start = warm_start.vector(problem, v, param) if warm_start is not None and solver == "gurobi" else None
+    result = solvers.solve(problem, solver, mip_gap=0.02, threads=threads, start=start,
+                           lp_method=lp_method, crossover=crossover, scale=scale, metrics=metrics)
+    if scale:
+        print(scaling.format_ranges(result.coefficient_ranges["original"], result.coefficient_ranges["scaled"]))
+
+    if result.x is None:
+        print("Optimization: No feasible solution found.")
+        return ({}, None) if return_series else {}
+
+    artifacts.write_artifacts(result, artifact_policy, run_name, compress)
+    metrics.lap("artifacts")
+
+    val = matrix_model.solution_values(v, result.x)
+    if warm_start is not None:
+        warm_start.store(val, param)
+    result_dict, full = _extract_results(val, devs, param, dem, result_dict)
+    metrics.lap("extraction")
+
+    if return_series:
+        return result_dict, full
+    return result_dict
+
+
+class HubModel:
+    """
+    Energy hub model session. The model structure is built once (matrix build
+    path) and re-optimized after parameter changes, e.g.
+
+        hub = HubModel(devs, param, dem)
+        result_dict = hub.optimize(result_dict)
+        hub.update_param(price_supply_el=0.35, co2_tax=0.1)
+        hub.update_demand("heat", new_heat_profile)
+        hub.update_device("HP", inv_var=900)
+        result_dict_2 = hub.optimize(result_dict_2)
+
+    Before the next solve, only the constraint sections (see
+    matrix_model.hub_sections) that read a changed parameter are recalculated,
+    and the right-hand sides and coefficients that changed are patched into the
+    existing gurobipy model in bulk. Changes that alter the structure of the
+    model (e.g. the "feasible" flag of a device, one of the "enable_*" switches
+    or the design days) lead to a full rebuild.
+
+    With prune=True, infeasible devices are left out of the model, with
+    fix_binaries=True (default False), fixed purchase decisions are turned into
+    continuous variables (see run_optim).
+    """
+
+    def __init__(self, devs, param, dem, prune=False, fix_binaries=False):
+        self.devs = copy.deepcopy(devs)
+        self.param = copy.deepcopy(param)
+        self.dem = copy.deepcopy(dem)
+        self.prune = prune
+        self.fix_binaries = fix_binaries
+        self.full = None
+        self._build()
+
+    def _build(self):
+        self._trace = {}
+        problem, self._v = matrix_model.build_hub_problem(self.devs, self.param, self.dem, self.prune, self._trace)
+        if self.fix_binaries:
+            problem.fix_integers()
+        self.model, self._x = problem.to_gurobi()
+        self.vars = matrix_model.gurobi_vars(self._v, self._x)
+        self._var_list = self._x.tolist()
+        self._constr_list = self.model.getConstrs()
+        self.problem = problem
+        self._A = problem.A
+        self._data = {"RHS": problem.rhs, "Obj": problem.obj}
+        self._changed = set()
+
+    def update_param(self, **kwargs):
+        """Change entries of param, e.g. update_param(price_supply_el=0.35, observation_time=20)."""
+        self.param.update(kwargs)
+        self._changed.update(("param", key) for key in kwargs)
+
+    def update_demand(self, carrier, profile):
+        """Replace the clustered demand of a carrier ("heat", "cool", "power", "hydrogen")."""
+        if carrier not in self.dem:
+            raise KeyError(f"Unknown demand {carrier}.")
+        self.dem[carrier] = np.asarray(profile, dtype=float)
+        self._changed.add(("dem", carrier))
+
+    def update_device(self, device, **kwargs):
+        """Change device parameters, e.g. update_device("HP", inv_var=900)."""
+        self.devs[device].update(kwargs)
+        self._changed.update(("devs", device, key) for key in kwargs)
+
+    def _touched(self):
+        """Parts of the model (see matrix_model.build_hub_problem, trace) that read a changed key."""
+        return [name for name, (keys, _) in self._trace.items()
+                if any(key[:len(changed)] == changed or changed[:len(key)] == key
+                       for changed in self._changed for key in keys)]
+
+    def _patch(self):
+        touched = self._touched()
+        self._changed = set()
+        if not touched:
+            return
+        if "variables" in touched:
+            self._build()
+            return
+
+        trace = {}
+        part = matrix_model.build_hub_sections(self.problem.num_vars, self._v, self.devs, self.param, self.dem,
+                                               touched, self.prune, trace)
+        if any(trace[section][1] != self._trace[section][1] for section in touched):
+            self._build()
+            return
+        blocks = [name for section in touched for name in trace[section][1]]
+        if not blocks:
+            return
+
+        # Rows of the blocks in the model (old) and in part (new); blocks are contiguous
+        A, new_A = self._A, part.A
+        sense, new_sense = self.problem.sense, part.sense
+        new_rhs = part.rhs
+        coeff_rows, new_coeff_rows, rhs_rows, new_rhs_rows = [], [], [], []
+        for name in blocks:
+            old, new = self.problem.blocks[name].ravel(), part.blocks[name].ravel()
+            if old.size != new.size:
+                self._build()
+                return
+            if old.size == 0:
+                continue
+            a, b, c, d = old[0], old[-1] + 1, new[0], new[-1] + 1
+            counts, new_counts = np.diff(A.indptr[a:b + 1]), np.diff(new_A.indptr[c:d + 1])
+            entries, new_entries = slice(A.indptr[a], A.indptr[b]), slice(new_A.indptr[c], new_A.indptr[d])
+            if (not np.array_equal(sense[a:b], new_sense[c:d]) or not np.array_equal(counts, new_counts)
+                    or not np.array_equal(A.indices[entries], new_A.indices[new_entries])):
+                self._build()
+                return
+            changed = np.repeat(np.arange(b - a), counts)[A.data[entries] != new_A.data[new_entries]]
+            changed = np.unique(changed)
+            coeff_rows.append(a + changed)
+            new_coeff_rows.append(c + changed)
+            changed = np.setdiff1d(np.flatnonzero(self._data["RHS"][a:b] != new_rhs[c:d]), changed)
+            rhs_rows.append(a + changed)
+            new_rhs_rows.append(c + changed)
+            A.data[entries] = new_A.data[new_entries]
+            self._data["RHS"][a:b] = new_rhs[c:d]
+
+        # Right-hand sides with one setAttr call, rows with changed coefficients are replaced
+        # by one matrix constraint (gurobipy has no batch version of chgCoeff)
+        rhs_rows, new_rhs_rows = np.concatenate(rhs_rows), np.concatenate(new_rhs_rows)
+        if rhs_rows.size > 0:
+            self.model.setAttr("RHS", [self._constr_list[row] for row in rhs_rows], new_rhs[new_rhs_rows].tolist())
+        coeff_rows, new_coeff_rows = np.concatenate(coeff_rows), np.concatenate(new_coeff_rows)
+        if coeff_rows.size > 0:
+            self.model.remove([self._constr_list[row] for row in coeff_rows])
+            rows = new_A[new_coeff_rows]
+            rows.eliminate_zeros()
+            constrs = self.model.addMConstr(rows, self._x, new_sense[new_coeff_rows], new_rhs[new_coeff_rows])
+            for row, constr in zip(coeff_rows, constrs.tolist()):
+                self._constr_list[row] = constr
+        self.model.update()
+        self._trace.update(trace)
+
+    def optimize(self, result_dict, artifact_policy="full", run_name="model", compress=False, metrics=None):
+        """
+        Apply pending parameter changes, solve and write the results into result_dict.
+        The full-year time series of the solution are kept in self.full (YearSeries).
+        For the output files and metrics see run_optim; applying the parameter
+        changes is recorded as phase "patch".
+        """
+        artifacts.check_policy(artifact_policy)
+        if metrics is None:
+            metrics = RunMetrics()
+        metrics.start()
+        if self._changed:
+            self._patch()
+            metrics.lap("patch")
+        result_dict, self.full = _optimize(self.model, self.vars, self.devs, self.param, self.dem,
+                                           result_dict, return_series=True, artifact_policy=artifact_policy,
+                                           run_name=run_name, compress=compress, metrics=metrics)
+        return result_dict
+
+    def pareto(self, n_points=10, metrics=None):
+        """
+        Cost-CO2 Pareto front (epsilon constraint method): the total annualized
+        costs are minimized for n_points CO2 limits between the CO2 optimum and
+        the cost optimum, e.g.
+
+            front = hub.pareto(10)
+            front["tac"], front["co2"]      # arrays (n_points)
+            front["cap"]["HP"]              # capacity of the heat pump at every point
+
+        The limits are set as right-hand side of the co2_limit row of the built
+        model (param["co2_limit"] is not changed). The points are solved from the
+        lowest to the highest limit, so the solution of the previous point is
+        feasible and used as MIP start. For models without integer variables,
+        Gurobi continues from the basis of the previous solve.
+        The sweep runs with a MIP gap of 2 % and without solver output; both
+        parameters are reset afterwards. Points without a feasible solution are
+        left out (if the CO2 optimum is not found, only the cost optimum is
+        returned). The time of the sweep is recorded as phase "pareto" in
+        metrics (RunMetrics).
+        """
+        if metrics is None:
+            metrics = RunMetrics()
+        metrics.start()
+        if self._changed:
+            self._patch()
+            metrics.lap("patch")
+
+        model = self.model
+        params = {"MIPGap": model.Params.MIPGap, "OutputFlag": model.Params.OutputFlag}
+        model.Params.MIPGap = 0.02
+        model.setParam("OutputFlag", 0)
+
+        row = int(self.problem.blocks["co2_limit"])
+        limit = self._constr_list[row]
+        co2 = self.vars["obj"]["co2"]
+        devices = list(self.vars["cap"])
+        dtype = [("tac", float), ("co2", float), ("cap", [(dev, float) for dev in devices])]
+
+        def point():
+            return (self.vars["obj"]["tac"].X, co2.X,
+                    tuple(float(_block_values(model, self.vars["cap"][dev])) for dev in devices))
+
+        points = []
+        try:
+            # Cost optimum (no CO2 limit): highest CO2 emissions of the front
+            limit.RHS = gp.GRB.INFINITY
+            model.optimize()
+            if model.SolCount == 0:
+                print("Pareto front: No feasible solution found.")
+                return np.array([], dtype=dtype)
+            cost_optimum = point()
+
+            # CO2 optimum: lowest CO2 emissions of the front
+            model.setAttr("Obj", self._var_list, [0.0] * len(self._var_list))
+            co2.Obj = 1.0
+            model.optimize()
+            if model.SolCount == 0:
+                print("Pareto front: No solution of the CO2 optimum found.")
+                return np.array([cost_optimum], dtype=dtype)
+            co2_min = co2.X
+            start = model.getAttr("X", self._var_list)
+            model.setAttr("Obj", self._var_list, self._data["Obj"].tolist())
+
+            for epsilon in np.linspace(co2_min, cost_optimum[1], n_points)[:-1]:
+                limit.RHS = epsilon
+                model.setAttr("Start", self._var_list, start)
+                model.optimize()
+                if model.SolCount == 0:
+                    continue
+                points.append(point())
+                start = model.getAttr("X", self._var_list)
+            points.append(cost_optimum)
+
+        finally:
+            limit.RHS = self._data["RHS"][row]
+            model.setAttr("Obj", self._var_list, self._data["Obj"].tolist())
+            model.setAttr("Start", self._var_list, [gp.GRB.UNDEFINED] * len(self._var_list))
+            for name, value in params.items():
+                model.setParam(name, value)
+
+        metrics.lap("pareto")
+        return np.array(points, dtype=dtype)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Choice of the device portfolio with minimum sizes of installed devices:
+
+- two-pass workflow of run_optim.py: solve with all devices, remove devices
+  below the minimum sizes and solve again,
+- free portfolio (param["free_portfolio"] = True): the purchase decisions x
+  are part of the optimization, every device is either not installed or at
+  least of minimum size, fixed investment costs (devs[dev]["inv_fix"]) are
+  paid for installed devices. One MIP solve.
+
+"""
+
+import copy
+
+import optim_model
+
+
+# Minimum sizes of installed devices (second run in run_optim.py)
+min_cap = {"CHP": 2.5, "HP": 3.5, "EB": 4, "BAT": 4, "BBOI": 12}  # kW (BAT: kWh)
+min_area = {"PV": 20, "STC": 15}  # m2
+min_vol = {"TES": 5}  # m3
+
+
+def set_min_sizes(devs, param, min_cap=min_cap, min_area=min_area, min_vol=min_vol):
+    """
+    Write the minimum sizes of the feasible devices into devs (min_cap, min_area;
+    volumes are converted to kWh). Infeasible devices keep their capacity of min_cap.
+    """
+    feasible = [dev for dev in devs if devs[dev]["feasible"]]
+    for dev, value in min_cap.items():
+        if dev in feasible:
+            devs[dev]["min_cap"] = value
+    for dev, value in min_area.items():
+        if dev in feasible:
+            devs[dev]["min_area"] = value
+    for dev, value in min_vol.items():
+        if dev in feasible:
+            devs[dev]["min_cap"] = value * param["rho_w"] * param["c_w"] * devs[dev]["delta_T"] / 3600
+    return devs
+
+
+def below_min_size(result_dict, min_cap=min_cap, min_area=min_area, min_vol=min_vol):
+    """Devices of a result_dict which are smaller than the minimum sizes."""
+    devices = []
+    for dev, res in result_dict["Devices"].items():
+        if dev in min_area:
+            small = res.get("area", 0) < min_area[dev]
+        elif dev in min_vol:
+            small = res.get("volume", 0) < min_vol[dev]
+        else:
+            small = dev in min_cap and res["cap"] < min_cap[dev]
+        if small:
+            devices.append(dev)
+    return devices
+
+
+def run_two_pass(devs, param, dem, result_dict, **kwargs):
+    """
+    First run with all feasible devices, second run without the devices below
+    the minimum sizes. kwargs are passed to optim_model.run_optim.
+    Returns the result_dict of the second run and the removed devices.
+    """
+    result_first = optim_model.run_optim(devs, param, dem, copy.deepcopy(result_dict), **kwargs)
+    if not result_first:
+        return result_first, []
+    removed = below_min_size(result_first)
+    devs = copy.deepcopy(devs)
+    for dev in removed:
+        devs[dev]["feasible"] = False
+    return optim_model.run_optim(devs, param, dem, result_dict, **kwargs), removed
+
+
+def run_portfolio(devs, param, dem, result_dict, **kwargs):
+    """
+    One run with free purchase decisions: every feasible device is a candidate
+    which is either not installed or at least of minimum size.
+    kwargs are passed to optim_model.run_optim.
+    """
+    devs = set_min_sizes(copy.deepcopy(devs), param)
+    param = dict(param, free_portfolio=True)
+    return optim_model.run_optim(devs, param, dem, result_dict, **kwargs)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Time-dependent device parameters calculated from weather data:
+COP of the heat pump, normalized wind turbine power, normalized PV power and
+specific STC heat. All functions work on arrays of any shape, e.g. design
+days (n_clusters x 24) or a full year (8760).
+
+"""
+
+import numpy as np
+
+import solar_modeling
+
+
+# Power curve of the wind turbine Enercon E40 (data sheet): wind speed in m/s, power in kW
+wt_curve_speed = np.array([0.0, 2.4, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5, 7, 7.5, 8, 8.5, 9, 9.5,
+                           10, 10.5, 11, 11.5, 12, 12.5, 13, 14, 25, 25.1, 1000])
+wt_curve_power = np.array([0.00, 0.00, 1.14, 4.37, 10.64, 18.87, 29.77, 40.39, 52.85, 69.36, 88.02, 112.19,
+                           134.67, 165.38, 197.08, 236.89, 279.46, 328.00, 362.93, 396.64, 435.27, 465.15,
+                           483.63, 495.95, 500.00, 500.00, 0.00, 0.00])
+wt_rated_power = 500  # kW
+
+
+def hp_cop(T_air, eta_carnot, supply_temp):
+    """COP of the heat pump: Carnot efficiency for supply temperature and air temperature (°C)."""
+    return eta_carnot * (supply_temp + 273.15) / (supply_temp - np.asarray(T_air, dtype=float))
+
+
+def wt_norm_power(wind_speed, hub_h, ref_h, h_coeff):
+    """
+    Power of the wind turbine relative to its rated power (0...1). The wind
+    speed is converted from the reference height to the hub height (power law).
+    """
+    wind_speed_corr = np.asarray(wind_speed, dtype=float) * (hub_h / ref_h) ** h_coeff
+    if np.any(wind_speed_corr > wt_curve_speed[-1]):
+        print("Error: Wind speed exceeds wind power curve table (max. " + str(np.max(wind_speed_corr)) + " m/s).")
+    return np.interp(wind_speed_corr, wt_curve_speed, wt_curve_power, left=0, right=0) / wt_rated_power
+
+
+def pv_norm_power(GHI, DHI, T_air, wind_speed):
+    """PV power in kW/kWp (horizontal modules, see solar_modeling.pv_system)."""
+    GHI, DHI = np.asarray(GHI, dtype=float), np.asarray(DHI, dtype=float)
+    return solar_modeling.pv_system(direct_tilted_irrad=GHI - DHI, diffuse_tilted_irrad=DHI, theta=0,
+                                    T_air=np.asarray(T_air, dtype=float),
+                                    wind_speed=np.asarray(wind_speed, dtype=float)) / 1e3
+
+
+def stc_specific_heat(GHI, DHI, T_air):
+    """Heat of the solar thermal collector in kW/m2 (horizontal, see solar_modeling.collector_system)."""
+    GHI, DHI = np.asarray(GHI, dtype=float), np.asarray(DHI, dtype=float)
+    return solar_modeling.collector_system(direct_tilted_irrad=GHI - DHI, diffuse_tilted_irrad=DHI, theta=0,
+                                           T_air=np.asarray(T_air, dtype=float)) / 1e3
+
+
+def device_profiles(devs, T_air, GHI, DHI, wind_speed):
+    """
+    All weather-dependent device parameters for the weather series (same shape):
+    {"COP_HP", "norm_power_WT", "norm_power_PV", "specific_heat_STC"}.
+    """
+    return {"COP_HP": hp_cop(T_air, devs["HP"]["eta_carnot"], devs["HP"]["supply_temp"]),
+            "norm_power_WT": wt_norm_power(wind_speed, devs["WT"]["hub_h"], devs["WT"]["ref_h"], devs["WT"]["h_coeff"]),
+            "norm_power_PV": pv_norm_power(GHI, DHI, T_air, wind_speed),
+            "specific_heat_STC": stc_specific_heat(GHI, DHI, T_air)}
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Adaptive refinement of the number of design days. The energy hub model is
+solved with few design days, then with k_step more design days at a time, until
+the total annualized costs and the device capacities change less than the
+tolerances between two steps. With warm_start=True, every solve starts from
+the solution of the previous step (see matrix_model.WarmStart, Gurobi only).
+The warm start is off by default: HiGHS was slower with a start (it is not
+passed to HiGHS), and no gain has been measured for Gurobi yet (see
+benchmark.bench_refinement), e.g.
+
+    refined = refine_scenario("ac_sanierterzustand", "dez")
+    refined["n_clusters"], refined["result_dict"], refined["history"]
+
+"""
+
+import time
+
+import optim_model
+import matrix_model
+import batch_run
+
+
+def _caps(result_dict):
+    """Capacities of the used devices of a result_dict."""
+    return {dev: values["cap"] for dev, values in result_dict["Devices"].items()}
+
+
+def converged(result_dict, prev_result_dict, tac_tol=0.005, cap_tol=0.02, cap_abs_tol=1.0):
+    """
+    True if the total annualized costs changed by less than tac_tol (relative)
+    and every device capacity by less than cap_tol (relative to the larger
+    capacity) or cap_abs_tol (absolute, e.g. kW) between two result_dicts.
+    """
+    tac = result_dict["Total Costs"]["Total annualized costs"]
+    prev_tac = prev_result_dict["Total Costs"]["Total annualized costs"]
+    if abs(tac - prev_tac) > tac_tol * abs(prev_tac):
+        return False
+    caps, prev_caps = _caps(result_dict), _caps(prev_result_dict)
+    for dev in set(caps) | set(prev_caps):
+        cap, prev_cap = caps.get(dev, 0), prev_caps.get(dev, 0)
+        if abs(cap - prev_cap) > max(cap_tol * max(cap, prev_cap), cap_abs_tol):
+            return False
+    return True
+
+
+def refine(load, k_start=4, k_step=2, k_max=24, tac_tol=0.005, cap_tol=0.02, cap_abs_tol=1.0, warm_start=False,
+           **options):
+    """
+    Solve the energy hub model with k_start, k_start + k_step, ... design days
+    until the results of two steps agree within the tolerances (see converged)
+    or k_max is reached.
+
+    load    : Function n_clusters -> (param, devs, dem, result_dict), e.g. load_params
+              with the scenario settings.
+    warm_start : Start every solve from the solution of the previous step.
+    options : Passed to optim_model.run_optim (builder defaults to "matrix",
+              artifact_policy to "off").
+
+    Returns {"n_clusters": number of design days of the last step, "result_dict":
+    its results, "converged": bool, "history": [{"n_clusters", "tac", "caps",
+    "time"} of every step]}.
+    """
+    options.setdefault("builder", "matrix")
+    options.setdefault("artifact_policy", "off")
+
+    history = []
+    prev_result_dict = None
+    warm_start = matrix_model.WarmStart() if warm_start else None
+    for k in range(k_start, k_max + 1, k_step):
+        start = time.perf_counter()
+        param, devs, dem, result_dict = load(k)
+        result_dict = optim_model.run_optim(devs, param, dem, result_dict, warm_start=warm_start, **options)
+        if not result_dict:
+            raise RuntimeError(f"No feasible solution with {k} design days.")
+        history.append({"n_clusters": k,
+                        "tac": result_dict["Total Costs"]["Total annualized costs"],
+                        "caps": _caps(result_dict),
+                        "time": time.perf_counter() - start})
+        print("Design days: %2d | tac %12.2f | %7.2f s" % (k, history[-1]["tac"], history[-1]["time"]))
+
+        if prev_result_dict and converged(result_dict, prev_result_dict, tac_tol, cap_tol, cap_abs_tol):
+            return {"n_clusters": k, "result_dict": result_dict, "converged": True, "history": history}
+        prev_result_dict = result_dict
+
+    print("Design days: no convergence up to %d design days." % k_max)
+    return {"n_clusters": history[-1]["n_clusters"], "result_dict": prev_result_dict, "converged": False,
+            "history": history}
+
+
+def refine_scenario(building, size, devices=None, solver="gurobi", threads=None, **options):
+    """refine for a scenario of batch_run.py (building specific parameters of run_optim.py)."""
+    def load(n_clusters):
+        return batch_run.scenario_params(building, size, devices, solver, threads, n_clusters=n_clusters)
+    return refine(load, solver=solver, threads=threads, **options)
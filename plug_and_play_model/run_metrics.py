@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Wall time and memory of the phases of a run (model set-up, solution, result
+extraction).
+
+"""
+
+import sys
+import time
+
+
+def peak_memory():
+    """Peak resident memory of the process in MB (nan if not available, e.g. on Windows)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS, kB on Linux
+        return peak / 1024 ** 2
+    return peak / 1024
+
+
+class RunMetrics(dict):
+    """
+    Metrics of the phases of a run: phase -> {"time": wall time in seconds,
+    "peak_memory_MB": peak memory of the process at the end of the phase}, e.g.
+
+        metrics = RunMetrics()
+        result_dict = optim_model.run_optim(devs, param, dem, result_dict, metrics=metrics)
+        metrics["solve"]["time"]
+        print(metrics.summary())
+
+    Phases of run_optim: "variables", "constraints", "objective" (dict builder)
+    or "build", "model" (matrix builder), then "solve", "artifacts", "extraction".
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.start()
+
+    def start(self):
+        """Start the clock of the next phase."""
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """End a phase: record the time since the end of the last phase (or since start)."""
+        now = time.perf_counter()
+        self[phase] = {"time": now - self._last, "peak_memory_MB": peak_memory()}
+        self._last = now
+
+    def total_time(self):
+        return sum(phase["time"] for phase in self.values())
+
+    def summary(self):
+        lines = ["%-12s %9.3f s | peak memory %8.1f MB" % (phase, values["time"], values["peak_memory_MB"])
+                 for phase, values in self.items()]
+        lines.append("%-12s %9.3f s" % ("total", self.total_time()))
+        return "\n".join(lines)
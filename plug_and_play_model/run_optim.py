@@ -1,5 +1,6 @@
 import load_params
 import optim_model
+from run_metrics import RunMetrics
 import os
 import json
 import numpy as np
@@ -84,7 +85,12 @@ if size == "zent":
 
 # -------------- First Results
 
-result_dict = optim_model.run_optim(devs, param, dem, result_dict)
+metrics = RunMetrics()
+result_dict = optim_model.run_optim(devs, param, dem, result_dict, metrics=metrics)
+print(metrics.summary())
+
+# Alternative to the second run below: one run with free purchase decisions and
+# minimum sizes, see portfolio.run_portfolio (portfolio.run_two_pass for this workflow)
 
 """ # -------------- Second run (with Minimum Capacities)
 
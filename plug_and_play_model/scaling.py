@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Scaling of LinearProblems (matrix build path) before the solve:
+
+- every variable block (one add_var call, e.g. the heat flow of a device or
+  the investment costs of all devices) gets a unit which is a power of ten,
+  e.g. kW -> MW (factor 1000) or EUR -> kEUR,
+- every constraint block is multiplied by a power of ten,
+- the objective is scaled to the order of magnitude 1.
+
+The units are chosen by geometric scaling of the constraint matrix: the
+largest and smallest coefficient of every block are brought close to 1.
+Binary and integer variables are not scaled. The solution is unscaled
+after the solve (see solvers.solve with scale=True). Right-hand sides of
+limits (e.g. supply_limit_el, co2_feed_in_limit) only change with the units
+of their variables.
+
+"""
+
+import copy
+import numpy as np
+
+
+def coefficient_ranges(problem):
+    """
+    Smallest and largest absolute value (without zeros and infinite values) of
+    the constraint matrix, objective, bounds and right-hand sides.
+    Returns {"matrix": (min, max), "objective": ..., "bounds": ..., "rhs": ...}.
+    """
+    def value_range(values):
+        values = np.abs(np.asarray(values, dtype=float))
+        values = values[(values > 0) & np.isfinite(values)]
+        if values.size == 0:
+            return (np.nan, np.nan)
+        return (float(values.min()), float(values.max()))
+
+    return {"matrix": value_range(problem.A.data),
+            "objective": value_range(problem.obj),
+            "bounds": value_range(np.concatenate([problem.lb, problem.ub])),
+            "rhs": value_range(problem.rhs)}
+
+
+def format_ranges(ranges, scaled_ranges=None):
+    """Coefficient ranges (see coefficient_ranges) as text, optionally before and after scaling."""
+    lines = []
+    for key, (low, high) in ranges.items():
+        line = "%-9s range [%.0e, %.0e]" % (key, low, high)
+        if scaled_ranges is not None:
+            line += "  ->  scaled [%.0e, %.0e]" % scaled_ranges[key]
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _group_center(log_values, groups, n_groups):
+    """Mean of the largest and smallest log value of every group (0 for empty groups)."""
+    high = np.full(n_groups, -np.inf)
+    low = np.full(n_groups, np.inf)
+    np.maximum.at(high, groups, log_values)
+    np.minimum.at(low, groups, log_values)
+    center = np.zeros(n_groups)
+    used = np.isfinite(high)
+    center[used] = 0.5 * (high[used] + low[used])
+    return center
+
+
+def scale_problem(problem, passes=4):
+    """
+    Scaled copy of a LinearProblem: A' = R A C, x = C x', objective' = objective / obj_scale.
+
+    R (rows) and C (columns) are powers of ten per constraint block and
+    per variable block (problem.blocks, problem.var_blocks).
+    Returns the scaled problem, the column factors C and obj_scale.
+    """
+    A = problem.A.tocoo()
+    A.eliminate_zeros()
+    n_rows, n_cols = problem.num_rows, problem.num_vars
+
+    row_group = np.zeros(n_rows, dtype=int)
+    for k, rows in enumerate(problem.blocks.values()):
+        row_group[np.asarray(rows).ravel()] = k
+    col_group = np.zeros(n_cols, dtype=int)
+    for k, (start, stop) in enumerate(problem.var_blocks):
+        col_group[start:stop] = k
+    n_row_groups, n_col_groups = len(problem.blocks), len(problem.var_blocks)
+
+    # Integer variables keep their unit
+    integer_groups = np.zeros(n_col_groups, dtype=bool)
+    integer_groups[col_group[problem.vtype != "C"]] = True
+
+    # Geometric scaling (log10 of the factors), alternating rows and columns
+    log_a = np.log10(np.abs(A.data))
+    row_log = np.zeros(n_row_groups)
+    col_log = np.zeros(n_col_groups)
+    for _ in range(passes):
+        row_log -= _group_center(log_a + row_log[row_group[A.row]] + col_log[col_group[A.col]],
+                                 row_group[A.row], n_row_groups)
+        col_step = _group_center(log_a + row_log[row_group[A.row]] + col_log[col_group[A.col]],
+                                 col_group[A.col], n_col_groups)
+        col_step[integer_groups] = 0
+        col_log -= col_step
+
+    row_scale = 10.0 ** np.round(row_log)[row_group]
+    col_scale = 10.0 ** np.round(col_log)[col_group]
+
+    obj = problem.obj * col_scale
+    obj_max = np.max(np.abs(obj))
+    obj_scale = 10.0 ** np.round(np.log10(obj_max)) if obj_max > 0 else 1.0
+
+    scaled = copy.copy(problem)
+    scaled._rows, scaled._cols = [A.row], [A.col]
+    scaled._vals = [A.data * row_scale[A.row] * col_scale[A.col]]
+    scaled._rhs = [problem.rhs * row_scale]
+    scaled._sense = [problem.sense]
+    scaled._lb = [problem.lb / col_scale]
+    scaled._ub = [problem.ub / col_scale]
+    scaled._obj = [obj / obj_scale]
+    scaled._vtype = [problem.vtype]
+    scaled._names = [problem.var_names]
+    return scaled, col_scale, obj_scale
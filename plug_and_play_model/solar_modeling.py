@@ -19,60 +19,34 @@ import os
 import math
 import numpy as np
 import pandas as pd
-import csv
+
+import weather
 
 def load_epw(weather_file):
-    # Import energy plus weather file
-    header = {}
-    with open(os.path.join(weather_file), newline="", errors="ignore") as csvfile:
-        csvreader = csv.reader(csvfile, delimiter=",", quotechar='"')
-        for row in csvreader:
-            if row[0].isdigit():
-                break
-            else:
-                header[row[0]]=row[1:]
-
-    timezone = float(header["LOCATION"][7])
-    altitude = float(header["LOCATION"][8])
+    # Import energy plus weather file (parsed once, then memory-mapped, see weather.py)
+    weather_data = weather.load_weather(weather_file)
 
     param = {}
-
-    file = open(os.path.join(weather_file), "rb")
-    T_air, GHI, DHI, wind_speed = np.loadtxt(file, delimiter=",", skiprows=8, usecols=[6,13,15,21], unpack=True)
-
-    param["T_air"] = T_air
-    param["wind_speed"] = wind_speed
-    param["direct_horiz_irrad"] = GHI - DHI
-    param["diffuse_horiz_irrad"] = DHI
-    param["global_irrad"] = GHI
+    param["T_air"] = weather_data["T_air"]
+    param["wind_speed"] = weather_data["wind_speed"]
+    param["direct_horiz_irrad"] = weather_data["GHI"] - weather_data["DHI"]
+    param["diffuse_horiz_irrad"] = weather_data["DHI"]
+    param["global_irrad"] = weather_data["GHI"]
 
     data = pd.DataFrame(param)
 
-    return timezone, altitude, data
+    return weather_data["timezone"], weather_data["altitude"], data
 
 def load_dwd(weather_file):
-    # Import dwd weather file
-    param = {}
+    # Import dwd weather file (parsed once, then memory-mapped, see weather.py)
+    weather_data = weather.load_weather(weather_file)
 
-    T_air = []
-    wind_speed = []
-    direct_horizontal_irrad = []
-    diffuse_horizontal_irrad = []
-
-    with open(os.path.join(weather_file), "r") as weather_file:
-        file = weather_file.readlines()
-        for line in range(34,len(file)):
-            cleaned_list = [val for val in file[line].split(" ") if val != ""]
-            T_air.append(float(cleaned_list[5]))
-            wind_speed.append(float(cleaned_list[8]))
-            direct_horizontal_irrad.append(float(cleaned_list[12]))
-            diffuse_horizontal_irrad.append(float(cleaned_list[13]))
-
-    param["T_air"] = np.array(T_air)
-    param["wind_speed"] = np.array(wind_speed)
-    param["direct_horiz_irrad"] = np.array(direct_horizontal_irrad)
-    param["diffuse_horiz_irrad"] = np.array(diffuse_horizontal_irrad)
-    param["global_irrad"] = param["direct_horiz_irrad"] + param["diffuse_horiz_irrad"]
+    param = {}
+    param["T_air"] = weather_data["T_air"]
+    param["wind_speed"] = weather_data["wind_speed"]
+    param["direct_horiz_irrad"] = weather_data["GHI"] - weather_data["DHI"]
+    param["diffuse_horiz_irrad"] = weather_data["DHI"]
+    param["global_irrad"] = weather_data["GHI"]
 
     data = pd.DataFrame(param)
 
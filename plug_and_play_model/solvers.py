@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Solver backends for problems assembled with sparse_model.LinearProblem:
+Gurobi (gurobipy) and HiGHS (highspy, open source, no license needed).
+
+"""
+
+import os
+import gzip
+import shutil
+import tempfile
+import numpy as np
+
+import scaling
+from run_metrics import RunMetrics
+
+
+solver_names = ["gurobi", "highs"]
+
+
+def check_solver(solver):
+    if solver not in solver_names:
+        raise ValueError(f"Unknown solver {solver}, use one of {solver_names}.")
+
+
+# Algorithms for LPs (None: solver default)
+lp_methods = [None, "barrier", "dual"]
+
+
+def check_lp_method(lp_method):
+    if lp_method not in lp_methods:
+        raise ValueError(f"Unknown LP method {lp_method}, use one of {lp_methods}.")
+
+
+class Result:
+    """
+    Result of a solve.
+
+    status  : "optimal", "time_limit", "infeasible" or the status name of the solver
+    x       : solution vector (None if no feasible solution was found)
+    obj     : objective value
+    runtime : solution time in seconds
+    metrics : RunMetrics with the phases "model" (transfer of the problem to the
+              solver) and "solve", measured in the solver backend
+    coefficient_ranges : ranges before and after scaling (see scaling.coefficient_ranges),
+                         None if the problem was not scaled
+
+    write(path) writes the solution (.sol) or the model (.lp), optionally
+    gzip-compressed (.sol.gz, .lp.gz), like gurobipy's Model.write.
+    """
+
+    def __init__(self, status, x, obj, runtime, write, metrics=None):
+        self.status = status
+        self.x = x
+        self.obj = obj
+        self.runtime = runtime
+        self.metrics = metrics
+        self._write = write
+        self.coefficient_ranges = None
+
+    def write(self, path):
+        self._write(path)
+
+
+def solve(problem, solver="gurobi", mip_gap=1e-4, time_limit=None, threads=None, output=False,
+          lp_method=None, crossover=True, scale=False, start=None, metrics=None):
+    """
+    Solve the LinearProblem with the given solver. Returns a Result.
+
+    lp_method : Algorithm if the problem is an LP: "barrier", "dual" (dual simplex)
+                or None (solver default).
+    crossover : If False, LPs are solved with the barrier method without crossover:
+                the solution is not a vertex, but objective value and capacities
+                are obtained faster.
+    scale     : Solve the scaled problem (see scaling.py). Solution, objective value
+                and solution files are in the original units, model files (.lp)
+                contain the scaled problem.
+    start     : Start values, one per column (nan: no start value). Used as MIP
+                start for MIPs and as primal start of the simplex for LPs; only
+                complete starts are used for LPs and by HiGHS.
+    metrics   : RunMetrics in which the phases "model" (scaling and transfer of the
+                problem to the solver, since the last phase of metrics) and "solve"
+                are recorded (default: new RunMetrics, see Result.metrics).
+    """
+    check_solver(solver)
+    check_lp_method(lp_method)
+    if metrics is None:
+        metrics = RunMetrics()
+    if scale:
+        return _solve_scaled(problem, solver, mip_gap, time_limit, threads, output, lp_method, crossover, start,
+                             metrics)
+    if solver == "gurobi":
+        return _solve_gurobi(problem, mip_gap, time_limit, threads, output, lp_method, crossover, start, metrics)
+    return _solve_highs(problem, mip_gap, time_limit, threads, output, lp_method, crossover, start, metrics)
+
+
+def _solve_scaled(problem, solver, mip_gap, time_limit, threads, output, lp_method, crossover, start, metrics):
+    scaled, col_scale, obj_scale = scaling.scale_problem(problem)
+    if start is not None:
+        start = np.asarray(start, dtype=float) / col_scale
+    result = solve(scaled, solver, mip_gap, time_limit, threads, output, lp_method, crossover, start=start,
+                   metrics=metrics)
+    if result.x is not None:
+        result.x = result.x * col_scale
+        result.obj = result.obj * obj_scale
+    result.coefficient_ranges = {"original": scaling.coefficient_ranges(problem),
+                                 "scaled": scaling.coefficient_ranges(scaled)}
+
+    write_scaled = result._write
+
+    def write(path):
+        if ".sol" in path:
+            _write_solution(path, problem.name, problem.var_names, result.x, result.obj)
+        else:
+            write_scaled(path)
+
+    result._write = write
+    return result
+
+
+def set_gurobi_lp_params(model, lp_method=None, crossover=True):
+    """Set the LP algorithm of a gurobipy model (see solve)."""
+    if not crossover:
+        model.Params.Method = 2
+        model.Params.Crossover = 0
+    elif lp_method is not None:
+        model.Params.Method = {"barrier": 2, "dual": 1}[lp_method]
+
+
+def set_gurobi_start(model, x, start):
+    """
+    Start of a gurobipy model with one MVar x for all columns (see solve): MIP
+    start (Start) for MIPs, primal start of the simplex (PStart, LPWarmStart=2,
+    i.e. with presolve) for LPs, which needs a value for every column.
+    """
+    if start is None:
+        return
+    import gurobipy as gp
+
+    start = np.asarray(start, dtype=float)
+    if model.IsMIP:
+        x.Start = np.where(np.isnan(start), gp.GRB.UNDEFINED, start)
+    elif not np.any(np.isnan(start)):
+        x.PStart = start
+        model.Params.LPWarmStart = 2
+
+
+def _solve_gurobi(problem, mip_gap, time_limit, threads, output, lp_method, crossover, start, metrics):
+    import gurobipy as gp
+
+    model, x = problem.to_gurobi()
+    set_gurobi_start(model, x, start)
+    model.Params.MIPGap = mip_gap
+    if not problem.is_mip():
+        set_gurobi_lp_params(model, lp_method, crossover)
+    model.Params.OutputFlag = int(output)
+    if time_limit is not None:
+        model.Params.TimeLimit = time_limit
+    if threads is not None:
+        model.Params.Threads = threads
+    metrics.lap("model")
+
+    model.optimize()
+    metrics.lap("solve")
+    runtime = metrics["solve"]["time"]
+
+    status = {gp.GRB.OPTIMAL: "optimal", gp.GRB.TIME_LIMIT: "time_limit",
+              gp.GRB.INFEASIBLE: "infeasible", gp.GRB.INF_OR_UNBD: "infeasible"}.get(model.Status, str(model.Status))
+    if model.SolCount > 0:
+        return Result(status, np.asarray(x.X), model.ObjVal, runtime, model.write, metrics)
+    return Result(status, None, np.nan, runtime, model.write, metrics)
+
+
+def _write_solution(path, name, names, x, obj):
+    """Write a solution file in the format of Gurobi (.sol)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt") as file:
+        file.write("# Solution for model " + name + "\n")
+        file.write("# Objective value = %.16e\n" % obj)
+        file.write("".join("%s %.17g\n" % item for item in zip(names, x)))
+
+
+def _solve_highs(problem, mip_gap, time_limit, threads, output, lp_method, crossover, start, metrics):
+    import highspy
+
+    A = problem.A.tocsc()
+    A.eliminate_zeros()
+    sense, rhs = problem.sense, problem.rhs
+    names = problem.var_names
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = problem.num_vars
+    lp.num_row_ = problem.num_rows
+    lp.col_cost_ = problem.obj
+    binary = problem.vtype == "B"
+    lp.col_lower_ = np.where(binary, np.maximum(problem.lb, 0), problem.lb)
+    lp.col_upper_ = np.where(binary, np.minimum(problem.ub, 1), problem.ub)
+    lp.row_lower_ = np.where(sense == "<", -np.inf, rhs)
+    lp.row_upper_ = np.where(sense == ">", np.inf, rhs)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = A.indptr
+    lp.a_matrix_.index_ = A.indices
+    lp.a_matrix_.value_ = A.data
+    lp.col_names_ = names.tolist()
+    if np.any(problem.vtype != "C"):
+        lp.integrality_ = [highspy.HighsVarType.kContinuous if vtype == "C" else highspy.HighsVarType.kInteger
+                           for vtype in problem.vtype]
+
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", output)
+    h.setOptionValue("mip_rel_gap", mip_gap)
+    if time_limit is not None:
+        h.setOptionValue("time_limit", float(time_limit))
+    if threads is not None:
+        h.setOptionValue("threads", threads)
+    if not problem.is_mip():
+        if not crossover:
+            h.setOptionValue("solver", "ipm")
+            h.setOptionValue("run_crossover", "off")
+        elif lp_method == "barrier":
+            h.setOptionValue("solver", "ipm")
+        elif lp_method == "dual":
+            h.setOptionValue("solver", "simplex")
+            h.setOptionValue("simplex_strategy", 1)
+    h.passModel(lp)
+    if start is not None and not np.any(np.isnan(start)):
+        solution = highspy.HighsSolution()
+        solution.col_value = np.asarray(start, dtype=float).tolist()
+        h.setSolution(solution)
+    metrics.lap("model")
+
+    h.run()
+    metrics.lap("solve")
+    runtime = metrics["solve"]["time"]
+
+    model_status = h.getModelStatus()
+    status = {highspy.HighsModelStatus.kOptimal: "optimal",
+              highspy.HighsModelStatus.kTimeLimit: "time_limit",
+              highspy.HighsModelStatus.kInfeasible: "infeasible",
+              highspy.HighsModelStatus.kUnboundedOrInfeasible: "infeasible"}.get(model_status, h.modelStatusToString(model_status))
+
+    has_solution = h.getInfo().primal_solution_status == highspy.kSolutionStatusFeasible
+    x = np.array(h.getSolution().col_value) if has_solution else None
+    obj = h.getInfo().objective_function_value if has_solution else np.nan
+
+    def write(path):
+        if ".sol" in path:
+            _write_solution(path, problem.name, names, x, obj)
+        elif path.endswith(".gz"):
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp_path = os.path.join(tmp, os.path.basename(path)[:-3])
+                h.writeModel(tmp_path)
+                with open(tmp_path, "rb") as src, gzip.open(path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+        else:
+            h.writeModel(path)
+
+    return Result(status, x, obj, runtime, write, metrics)
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Sparse matrix assembly of linear and mixed-integer programs. Variables are
+created as whole arrays (e.g. one block of shape (n_clusters, 24) per device
+and carrier) and constraints are collected as sparse (row, column, value)
+triplets instead of one Python expression per row.
+
+"""
+
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+
+
+class LinExpr:
+    """
+    Array of linear expressions.
+
+    Entry k of the (flattened) array is sum(vals[rows == k] * x[cols[rows == k]]) + const[k].
+    """
+
+    __array_ufunc__ = None  # numpy arrays defer to the reflected operators (e.g. array + expr)
+
+    def __init__(self, shape, rows, cols, vals, const):
+        self.shape = tuple(shape)
+        self.rows = rows
+        self.cols = cols
+        self.vals = vals
+        self.const = const
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    def broadcast_to(self, shape):
+        """Repeat the expression along new or unit axes (numpy broadcasting rules)."""
+        shape = tuple(shape)
+        if shape == self.shape:
+            return self
+        src = np.broadcast_to(np.arange(self.size).reshape(self.shape), shape).ravel()
+        order = np.argsort(self.rows, kind="stable")
+        counts = np.bincount(self.rows, minlength=self.size)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        n_terms = counts[src]
+        total = int(n_terms.sum())
+        rows = np.repeat(np.arange(src.size), n_terms)
+        offsets = np.arange(total) - np.repeat(np.cumsum(n_terms) - n_terms, n_terms)
+        pos = order[np.repeat(starts[src], n_terms) + offsets]
+        const = np.broadcast_to(self.const, shape).copy()
+        return LinExpr(shape, rows, self.cols[pos], self.vals[pos], const)
+
+    def sum(self, axis=None):
+        """Sum of all entries (a scalar expression) or sum along one axis."""
+        if axis is None:
+            return LinExpr((), np.zeros(self.rows.size, dtype=np.int64), self.cols, self.vals,
+                           np.asarray(np.sum(self.const), dtype=float))
+        index = np.unravel_index(self.rows, self.shape)
+        shape = self.shape[:axis] + self.shape[axis+1:]
+        rows = np.ravel_multi_index(index[:axis] + index[axis+1:], shape)
+        return LinExpr(shape, rows, self.cols, self.vals, np.sum(self.const, axis=axis))
+
+    def __add__(self, other):
+        other = as_expr(other)
+        shape = np.broadcast_shapes(self.shape, other.shape)
+        a = self.broadcast_to(shape)
+        b = other.broadcast_to(shape)
+        return LinExpr(shape,
+                       np.concatenate((a.rows, b.rows)),
+                       np.concatenate((a.cols, b.cols)),
+                       np.concatenate((a.vals, b.vals)),
+                       a.const + b.const)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return LinExpr(self.shape, self.rows, self.cols, -self.vals, -self.const)
+
+    def __sub__(self, other):
+        return self + (-as_expr(other))
+
+    def __rsub__(self, other):
+        return as_expr(other) + (-self)
+
+    def __mul__(self, factor):
+        factor = np.asarray(factor, dtype=float)
+        shape = np.broadcast_shapes(self.shape, factor.shape)
+        expr = self.broadcast_to(shape)
+        factor = np.broadcast_to(factor, shape)
+        return LinExpr(shape, expr.rows, expr.cols, expr.vals * factor.ravel()[expr.rows],
+                       expr.const * factor)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor):
+        return self * (1.0 / np.asarray(divisor, dtype=float))
+
+    def value(self, x):
+        """Values of the expressions for the solution vector x."""
+        values = np.bincount(self.rows, weights=self.vals * x[self.cols], minlength=self.size)
+        return values.reshape(self.shape) + self.const
+
+
+class Var:
+    """
+    Array of model variables, stored as column indices of the problem.
+    Indexing works like numpy indexing and returns a Var again.
+    """
+
+    __array_ufunc__ = None
+
+    def __init__(self, idx):
+        self.idx = np.asarray(idx, dtype=np.int64)
+
+    @property
+    def shape(self):
+        return self.idx.shape
+
+    def __getitem__(self, key):
+        return Var(self.idx[key])
+
+    def expr(self):
+        n = self.idx.size
+        return LinExpr(self.shape, np.arange(n), self.idx.ravel(), np.ones(n), np.zeros(self.shape))
+
+    def sum(self, axis=None):
+        return self.expr().sum(axis)
+
+    def __add__(self, other):
+        return self.expr() + other
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.expr() - other
+
+    def __rsub__(self, other):
+        return as_expr(other) - self.expr()
+
+    def __neg__(self):
+        return -self.expr()
+
+    def __mul__(self, factor):
+        return self.expr() * factor
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor):
+        return self.expr() / divisor
+
+
+def as_expr(obj):
+    """Convert variables and constants (scalars or arrays) into a LinExpr."""
+    if isinstance(obj, LinExpr):
+        return obj
+    if isinstance(obj, Var):
+        return obj.expr()
+    const = np.asarray(obj, dtype=float)
+    empty = np.zeros(0, dtype=np.int64)
+    return LinExpr(const.shape, empty, empty, np.zeros(0), const)
+
+
+def fixed_integer_columns(A, sense, rhs, vtype, lb, ub):
+    """
+    Integer and binary columns which are fixed by an equality row with a single
+    coefficient (e.g. x == 1). Returns the column indices and the fixed values.
+    """
+    A = sp.csr_matrix(A, copy=True)
+    A.eliminate_zeros()
+    rows = np.flatnonzero((np.diff(A.indptr) == 1) & (np.asarray(sense) == "="))
+    cols = A.indices[A.indptr[rows]]
+    values = np.asarray(rhs, dtype=float)[rows] / A.data[A.indptr[rows]]
+    keep = (np.isin(np.asarray(vtype)[cols], ["B", "I"])
+            & np.isclose(values, np.round(values))
+            & (values >= np.asarray(lb)[cols] - 1e-9)
+            & (values <= np.asarray(ub)[cols] + 1e-9))
+    return cols[keep], np.round(values[keep])
+
+
+class LinearProblem:
+    """
+    Linear (mixed-integer) program in sparse matrix form:
+
+        min  obj' x   s.t.   A x (<=, =, >=) rhs,   lb <= x <= ub
+
+    Constraints are stored in blocks; add_constr returns the row indices of the
+    block so that coefficients or right-hand sides can be changed later.
+    var_blocks contains the column range (start, stop) of every add_var call.
+    """
+
+    def __init__(self, name=""):
+        self.name = name
+        self.num_vars = 0
+        self.num_rows = 0
+        self._lb = []
+        self._ub = []
+        self._obj = []
+        self._vtype = []
+        self._names = []
+        self._rows = []
+        self._cols = []
+        self._vals = []
+        self._sense = []
+        self._rhs = []
+        self.blocks = {}
+        self.var_blocks = []
+
+    def add_var(self, shape=(), lb=0.0, ub=np.inf, vtype="C", name=""):
+        """
+        Add an array of variables. `name` is either a string (scalar variable)
+        or an array of names with the given shape.
+        """
+        shape = tuple(shape)
+        n = int(np.prod(shape, dtype=np.int64))
+        idx = np.arange(self.num_vars, self.num_vars + n).reshape(shape)
+        self.var_blocks.append((self.num_vars, self.num_vars + n))
+        self.num_vars += n
+        self._lb.append(np.broadcast_to(np.asarray(lb, dtype=float), shape).ravel())
+        self._ub.append(np.broadcast_to(np.asarray(ub, dtype=float), shape).ravel())
+        self._obj.append(np.zeros(n))
+        self._vtype.append(np.full(n, vtype))
+        self._names.append(np.broadcast_to(np.asarray(name, dtype=object), shape).ravel())
+        return Var(idx)
+
+    def add_constr(self, lhs, sense, rhs=0.0, name=""):
+        """
+        Add the constraint block `lhs sense rhs` with sense one of "<", ">", "=".
+        Returns the row indices of the new constraints (shape of the block).
+        """
+        expr = as_expr(lhs) - rhs
+        n = expr.size
+        rows = np.arange(self.num_rows, self.num_rows + n)
+        self._rows.append(rows[expr.rows])
+        self._cols.append(expr.cols)
+        self._vals.append(expr.vals)
+        self._sense.append(np.full(n, sense))
+        self._rhs.append(-np.asarray(expr.const, dtype=float).ravel())
+        self.num_rows += n
+        name = name or "R" + str(len(self.blocks))
+        if name in self.blocks:
+            raise ValueError(f"Constraint block {name} already exists.")
+        self.blocks[name] = rows.reshape(expr.shape)
+        return rows.reshape(expr.shape)
+
+    def fix_integers(self):
+        """
+        Turn integer columns which are fixed by an equality row (see
+        fixed_integer_columns) into continuous columns with lb = ub = fixed value.
+        If all integer columns are fixed, the problem is an LP afterwards
+        (is_mip() is False). Returns the indices of the fixed columns.
+        """
+        cols, values = fixed_integer_columns(self.A, self.sense, self.rhs, self.vtype, self.lb, self.ub)
+        lb, ub, vtype = self.lb, self.ub, self.vtype
+        lb[cols] = values
+        ub[cols] = values
+        vtype[cols] = "C"
+        self._lb, self._ub, self._vtype = [lb], [ub], [vtype]
+        return cols
+
+    def is_mip(self):
+        return bool(np.any(self.vtype != "C"))
+
+    def set_objective(self, expr):
+        """Set a linear objective (minimization). Constant terms are ignored."""
+        expr = as_expr(expr).sum()
+        obj = np.zeros(self.num_vars)
+        np.add.at(obj, expr.cols, expr.vals)
+        self._obj = [obj]
+
+    @property
+    def lb(self):
+        return np.concatenate(self._lb)
+
+    @property
+    def ub(self):
+        return np.concatenate(self._ub)
+
+    @property
+    def obj(self):
+        return np.concatenate(self._obj)
+
+    @property
+    def vtype(self):
+        return np.concatenate(self._vtype)
+
+    @property
+    def var_names(self):
+        return np.concatenate(self._names)
+
+    @property
+    def sense(self):
+        return np.concatenate(self._sense)
+
+    @property
+    def rhs(self):
+        return np.concatenate(self._rhs)
+
+    @property
+    def A(self):
+        """Constraint matrix as scipy.sparse CSR matrix (duplicate entries are summed)."""
+        return sp.csr_matrix((np.concatenate(self._vals),
+                              (np.concatenate(self._rows), np.concatenate(self._cols))),
+                             shape=(self.num_rows, self.num_vars))
+
+    def to_gurobi(self):
+        """
+        Create a gurobipy model with one MVar for all columns and all rows added
+        in a single matrix constraint. Returns the model and the MVar.
+        """
+        model = gp.Model(self.name)
+        x = model.addMVar(self.num_vars, lb=self.lb, ub=self.ub, obj=self.obj,
+                          vtype=self.vtype, name=self.var_names.tolist())
+        A = self.A
+        A.eliminate_zeros()
+        model.addMConstr(A, x, self.sense, self.rhs)
+        model.ModelSense = gp.GRB.MINIMIZE
+        model.update()
+        return model, x
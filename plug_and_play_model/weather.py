@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Weather data of EnergyPlus (.epw) and DWD test reference year (.dat) files.
+
+The file is parsed in one pass (header and hourly data). The columns T_air,
+GHI, DHI, wind_speed and the scalars timezone and altitude are stored in a
+binary file next to the weather file (<weather file>.npy), which is
+memory-mapped when the weather file is loaded again. The binary file is
+written again if the weather file has changed (size or modification time).
+
+    weather = load_weather("input_data/DEU_Dusseldorf.104000_IWEC.epw")
+    weather["T_air"], weather["timezone"]
+
+"""
+
+import os
+import csv
+import numpy as np
+
+
+series_names = ["T_air", "GHI", "DHI", "wind_speed"]
+scalar_names = ["timezone", "altitude"]
+
+# Columns of the hourly data: dry bulb temperature, global and diffuse horizontal radiation, wind speed
+epw_columns = [6, 13, 15, 21]
+
+
+def read_epw(weather_file):
+    """Parse an EnergyPlus weather file. Returns a dict with series_names (arrays) and scalar_names."""
+    with open(weather_file, newline="", errors="ignore") as file:
+        lines = file.read().splitlines()
+
+    n_header = 0
+    while not lines[n_header][:1].isdigit():
+        n_header += 1
+    header = {row[0]: row[1:] for row in csv.reader(lines[:n_header], delimiter=",", quotechar='"')}
+
+    values = np.loadtxt(lines[n_header:], delimiter=",", usecols=epw_columns, unpack=True)
+
+    weather = dict(zip(series_names, values))
+    weather["timezone"] = float(header["LOCATION"][7])
+    weather["altitude"] = float(header["LOCATION"][8])
+    return weather
+
+
+def read_dwd(weather_file):
+    """
+    Parse a DWD test reference year file (hourly data from line 35). GHI is the sum of
+    direct and diffuse horizontal radiation, the timezone is CET. The altitude is read
+    from the header ("Hoehenlage"), nan if not given.
+    """
+    with open(weather_file, "r", errors="ignore") as file:
+        lines = file.readlines()
+
+    altitude = np.nan
+    for line in lines[:34]:
+        if line.startswith("Hoehenlage"):
+            altitude = float(line.split(":")[1].split()[0])
+
+    T_air, wind_speed, direct, diffuse = np.loadtxt(lines[34:], usecols=[5, 8, 12, 13], unpack=True)
+    return {"T_air": T_air, "GHI": direct + diffuse, "DHI": diffuse, "wind_speed": wind_speed,
+            "timezone": 1.0, "altitude": altitude}
+
+
+def _source_stamp(weather_file):
+    stat = os.stat(weather_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _dtype(n_steps):
+    return np.dtype([(name, float, (n_steps,)) for name in series_names]
+                    + [(name, float) for name in scalar_names]
+                    + [("source_size", np.int64), ("source_mtime_ns", np.int64)])
+
+
+def _write_store(store_file, weather, stamp):
+    record = np.zeros(1, dtype=_dtype(len(weather["T_air"])))
+    for name in series_names + scalar_names:
+        record[name] = weather[name]
+    record["source_size"], record["source_mtime_ns"] = stamp
+    tmp_file = store_file[:-len(".npy")] + "." + str(os.getpid()) + ".tmp.npy"
+    np.save(tmp_file, record)
+    os.replace(tmp_file, store_file)
+
+
+def load_weather(weather_file, store=True):
+    """
+    Weather data of an .epw or DWD file as dict (see read_epw). With store=True,
+    the series are memory-mapped from <weather_file>.npy (read-only arrays),
+    which is created or updated if necessary.
+    """
+    read = read_epw if weather_file.lower().endswith(".epw") else read_dwd
+    if not store:
+        return read(weather_file)
+
+    store_file = weather_file + ".npy"
+    stamp = _source_stamp(weather_file)
+    if os.path.exists(store_file):
+        record = np.load(store_file, mmap_mode="r")
+        if (record.dtype.names == _dtype(record["T_air"].shape[1]).names
+                and (int(record["source_size"][0]), int(record["source_mtime_ns"][0])) == stamp):
+            weather = {name: record[name][0] for name in series_names}
+            weather.update({name: float(record[name][0]) for name in scalar_names})
+            return weather
+
+    weather = read(weather_file)
+    try:
+        _write_store(store_file, weather, stamp)
+    except OSError:  # e.g. read-only input directory: the parsed data is used
+        pass
+    return weather
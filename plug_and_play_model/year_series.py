@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+
+EHDO - ENERGY HUB DESIGN OPTIMIZATION Tool
+
+Developed by:   E.ON Energy Research Center,
+                Institute for Energy Efficient Buildings and Indoor Climate,
+                RWTH Aachen University,
+                Germany
+
+Contact:        Marco Wirtz
+                marco.wirtz@eonerc.rwth-aachen.de
+
+Full-year view of time series that are given on design days. Only the design
+day arrays (n_clusters x 24) and the sigma function (design day of every day
+of the year) are stored; hourly values of the year are created on access.
+
+"""
+
+from collections.abc import Mapping
+import numpy as np
+
+
+month_tuple = ("Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec")
+days_sum = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]
+
+
+class YearSeries(Mapping):
+    """
+    Read-only mapping item -> time series with 8760 hourly values, e.g.
+
+        full = YearSeries({"heat_HP": heat_HP, "power_HP": power_HP}, param["sigma"],
+                          full_year={"soc_TES": soc_TES})
+        full["heat_HP"]                     # 8760 values
+        full.month("heat_HP", "Jan")        # 744 values of January
+        full.window("heat_HP", 100, 200)    # hours 100 ... 199
+        full.device("HP")                   # view with all series of the heat pump
+        full.monthly_sum("heat_HP")         # {"Jan": ..., ...}, without expansion
+
+    design_days : dict of arrays (n_clusters x 24), expanded to the year via sigma.
+    sigma       : design day of every day of the year (365).
+    full_year   : dict of arrays (365 x 24) which are already given for every day
+                  (e.g. state of charge of storages).
+    """
+
+    def __init__(self, design_days, sigma, full_year=None):
+        self.sigma = np.asarray(sigma)
+        self._data = {}
+        for item, series in design_days.items():
+            self._data[item] = (np.asarray(series, dtype=float), self.sigma)
+        for item, series in (full_year or {}).items():
+            self._data[item] = (np.asarray(series, dtype=float), None)
+
+    def _days(self, item, first_day, last_day):
+        series, sigma = self._data[item]
+        if sigma is None:
+            return series[first_day:last_day]
+        return series[sigma[first_day:last_day]]
+
+    def __getitem__(self, item):
+        return self._days(item, 0, 365).ravel()
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def month(self, item, month):
+        """Hourly values of one month (index 0...11 or name from month_tuple)."""
+        if isinstance(month, str):
+            month = month_tuple.index(month)
+        return self._days(item, days_sum[month], days_sum[month+1]).ravel()
+
+    def window(self, item, start, stop):
+        """Hourly values of the hours start, ..., stop-1 of the year."""
+        first_day = start // 24
+        last_day = -(-stop // 24)
+        return self._days(item, first_day, last_day).ravel()[start - 24*first_day : stop - 24*first_day]
+
+    def device(self, device):
+        """View with all series of a device (e.g. "HP": heat_HP, cool_HP, power_HP, amb_heat_HP)."""
+        view = YearSeries({}, self.sigma)
+        view._data = {item: data for item, data in self._data.items() if device in item.split("_")[1:]}
+        return view
+
+    def _day_counts(self, item, first_day, last_day):
+        """Number of occurrences of every row of the stored array between first_day and last_day."""
+        series, sigma = self._data[item]
+        if sigma is None:
+            counts = np.zeros(series.shape[0])
+            counts[first_day:last_day] = 1
+            return counts
+        return np.bincount(sigma[first_day:last_day], minlength=series.shape[0])
+
+    def monthly_sum(self, item):
+        """Sum of every month, calculated from the daily sums of the design days."""
+        daily = self._data[item][0].sum(axis=1)
+        return {month_tuple[month]: float(self._day_counts(item, days_sum[month], days_sum[month+1]) @ daily)
+                for month in range(12)}
+
+    def sum(self, item):
+        """Sum over the year."""
+        return float(self._day_counts(item, 0, 365) @ self._data[item][0].sum(axis=1))
+
+    def peak(self, item):
+        """Maximum hourly value of the year."""
+        series = self._data[item][0]
+        return float(series[self._day_counts(item, 0, 365) > 0].max())
@@ -0,0 +1,58 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# The modules of plug_and_play_model import each other as top-level modules
+package_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "plug_and_play_model")
+sys.path.insert(0, package_dir)
+
+
+@pytest.fixture(scope="session")
+def input_dir(tmp_path_factory):
+    """
+    Copy of plug_and_play_model/input_data without binary stores, so that the
+    .npy files written by load_params do not end up in the source tree.
+    """
+    path = tmp_path_factory.mktemp("input") / "input_data"
+    shutil.copytree(os.path.join(package_dir, "input_data"), path, ignore=shutil.ignore_patterns("*.npy"))
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def small_instance(input_dir):
+    """
+    ac_sanierterzustand (dez) with heat pump, boiler, PV and heat storage on two
+    design days (FasterPAM clustering) and a CO2 limit that is not binding.
+    Returns (param, devs, dem, result_dict) of load_params.
+    """
+    pytest.importorskip("gurobipy")
+    import load_params
+
+    param, devs, dem, result_dict = load_params.load_params("ac_sanierterzustand", "dez", ["HP", "BOI", "PV", "TES"],
+                                                            "highs", cluster_engine="pam", n_clusters=2,
+                                                            use_cache=False, input_dir=input_dir)
+    # building specific parameters as in batch_run.scenario_params
+    param.update(observation_time=10, roof_area=152, enable_supply_heat=True, co2_limit=1e9)
+    return param, devs, dem, result_dict
+
+
+@pytest.fixture(scope="session")
+def tiny_instance(input_dir):
+    """
+    ac_sanierterzustand (dez) with heat pump, boiler, PV and heat storage on one
+    design day, superposition storage model and no CO2 limit. Pruned, the model
+    fits the size-limited Gurobi license. Returns (param, devs, dem).
+    """
+    pytest.importorskip("gurobipy")
+    import load_params
+    import matrix_model
+
+    param, devs, dem, _ = load_params.load_params("ac_sanierterzustand", "dez", ["HP", "BOI", "PV", "TES"], "highs",
+                                                  cluster_engine="pam", n_clusters=1, use_cache=False,
+                                                  input_dir=input_dir)
+    param.update(observation_time=10, roof_area=152, enable_supply_heat=True, co2_limit=None)
+    for dev in matrix_model.storage_devs:
+        devs[dev]["storage_model"] = "superposition"
+    return param, devs, dem
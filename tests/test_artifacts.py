@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("highspy")
+
+import artifacts
+import matrix_model
+import solvers
+
+
+@pytest.fixture(scope="module")
+def solved(small_instance):
+    """Solution values (see matrix_model.solution_values) and solvers.Result of the small instance."""
+    param, devs, dem, _ = small_instance
+    problem, v = matrix_model.build_hub_problem(devs, param, dem)
+    problem.fix_integers()
+    result = solvers.solve(problem, "highs")
+    assert result.status == "optimal"
+    return matrix_model.solution_values(v, result.x), result
+
+
+def test_check_policy():
+    for policy in artifacts.artifact_policies:
+        artifacts.check_policy(policy)
+    with pytest.raises(ValueError):
+        artifacts.check_policy("all")
+
+
+def test_policy_off_writes_nothing(solved, tmp_path):
+    _, result = solved
+    assert artifacts.write_artifacts(result, "off", result_dir=str(tmp_path)) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_solution_round_trip(solved, tmp_path, compress):
+    values, result = solved
+    files = artifacts.write_artifacts(result, "solution", "run", compress, result_dir=str(tmp_path))
+    assert [path.endswith(".sol.gz" if compress else ".sol") for path in files] == [True]
+
+    sol = artifacts.read_solution(files[0])
+    expected = {key: value for key, value in values.items() if not (isinstance(value, dict) and not value)}
+    assert set(sol) == set(expected)
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            assert set(sol[key]) == set(value), key
+            for dev in value:
+                assert np.shape(sol[key][dev]) == np.shape(value[dev]), (key, dev)
+                assert np.array_equal(sol[key][dev], value[dev]), (key, dev)
+        else:
+            assert sol[key] == value, key
+
+    assert sol["heat"]["HP"].shape == (2, 24)
+    assert sol["soc"]["TES"].shape == (365, 24)
+    assert sol["obj"]["tac"] == pytest.approx(result.obj)
@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+
+import pytest
+
+pytest.importorskip("gurobipy")
+
+import batch_run
+import demands
+import load_params
+import optim_model
+
+
+def _fake_params(building, size, devices=None, solver="gurobi", threads=None, n_clusters=8):
+    return {}, {}, {}, {}
+
+
+@pytest.fixture
+def infeasible(monkeypatch):
+    """Scenarios without load_params and with an infeasible run_optim (empty result_dict)."""
+    monkeypatch.setattr(batch_run, "scenario_params", _fake_params)
+    monkeypatch.setattr(optim_model, "run_optim", lambda devs, param, dem, result_dict, **kwargs: {})
+
+
+def test_default_buildings_have_demands():
+    assert set(batch_run.buildings) <= set(demands.buildings(load_params.default_input_dir))
+
+
+def test_infeasible_scenario_fails(infeasible):
+    result_dict, error = batch_run.run_scenario({"building": "ac_istzustand", "size": "dez"})
+    assert result_dict is None and "No feasible solution" in error
+
+
+def test_exception_in_scenario(monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError("broken input")
+    monkeypatch.setattr(batch_run, "scenario_params", fail)
+    result_dict, error = batch_run.run_scenario({"building": "ac_istzustand", "size": "dez"})
+    assert result_dict is None and "ValueError: broken input" in error
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the monkeypatched functions have to be inherited by the worker processes")
+def test_infeasible_scenario_is_retried(infeasible, tmp_path):
+    scenario_list = [{"building": "ac_istzustand", "size": "dez"}]
+    for _ in range(2):  # not counted as done: the second batch runs it again
+        assert batch_run.run_batch(scenario_list, 1, str(tmp_path)) == ["ac_istzustand_dez"]
+    assert sorted(os.listdir(tmp_path)) == ["ac_istzustand_dez.error.txt"]
+
+
+def test_unknown_building_fails_before_the_pool(tmp_path):
+    scenario_list = [{"building": "quart_istzustand", "size": "zent"}, {"building": "ac_istzustand", "size": "dez"}]
+    open(tmp_path / "ac_istzustand_dez.json", "w").close()  # done
+    assert batch_run.run_batch(scenario_list, 1, str(tmp_path)) == ["quart_istzustand_zent"]
+    with open(tmp_path / "quart_istzustand_zent.error.txt") as error_file:
+        assert "quart_istzustand" in error_file.read()
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("highspy")
+
+import bounds
+import optim_model
+
+
+def _run(run, devs, param, dem):
+    return run(devs, param, dem, {}, builder="matrix", prune=True, solver="highs", artifact_policy="off")
+
+
+def test_tightened_run_same_optimum(tiny_instance):
+    param, devs, dem = tiny_instance
+    result = _run(optim_model.run_optim, devs, param, dem)
+    tight, n_solves = _run(bounds.run_tightened, devs, param, dem)
+    assert n_solves >= 1
+    assert tight["Total Costs"]["Total annualized costs"] == result["Total Costs"]["Total annualized costs"]
+    for dev in result["Devices"]:
+        assert tight["Devices"][dev]["cap"] == pytest.approx(result["Devices"][dev]["cap"], abs=0.011)
+
+
+def test_bounds_never_loosen_the_input(tiny_instance):
+    param, devs, dem = tiny_instance
+    estimate = bounds.estimate_bounds(devs, param, dem)
+    devs_tight, param_tight = bounds.apply_bounds(devs, param, estimate)
+    assert estimate["cap"]
+    for dev in set(estimate["cap"]) - set(estimate["area"]):
+        assert devs[dev]["min_cap"] <= devs_tight[dev]["max_cap"] <= devs[dev]["max_cap"]
+    for carrier in estimate["grid"]:
+        assert param_tight["enable_cap_limit_" + carrier]
+        if param["enable_cap_limit_" + carrier]:
+            assert param_tight["cap_limit_" + carrier] <= param["cap_limit_" + carrier]
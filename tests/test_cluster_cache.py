@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+
+import cluster_cache
+
+
+def _inputs(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.random((2, 365 * 24))
+
+
+def _entries(cache_dir):
+    return [entry[2] for entry in cluster_cache._entries(str(cache_dir))]
+
+
+def test_cached_cluster_is_loaded(tmp_path):
+    inputs = _inputs()
+    first = cluster_cache.cached_cluster(inputs, 4, engine="pam", cache_dir=str(tmp_path))
+    assert len(_entries(tmp_path)) == 1
+    second = cluster_cache.cached_cluster(inputs, 4, engine="pam", cache_dir=str(tmp_path))
+    assert np.array_equal(first[1], second[1]) and np.array_equal(first[2], second[2])
+    assert np.allclose(first[0], second[0])
+
+
+def test_zero_size_disables_and_empties_cache(tmp_path):
+    cluster_cache.cached_cluster(_inputs(0), 4, engine="pam", cache_dir=str(tmp_path))
+    assert len(_entries(tmp_path)) == 1
+    cluster_cache.cached_cluster(_inputs(1), 4, engine="pam", cache_dir=str(tmp_path), max_size_MB=0)
+    assert _entries(tmp_path) == []
+
+
+def test_store_with_zero_size_writes_nothing(tmp_path):
+    inputs = _inputs()
+    result = cluster_cache.clustering.cluster(inputs, 3, engine="pam")
+    key = cluster_cache.store(inputs, 3, result, engine="pam", cache_dir=str(tmp_path), max_size_MB=0)
+    assert not os.path.exists(os.path.join(str(tmp_path), key + ".npz"))
+    key = cluster_cache.store(inputs, 3, result, engine="pam", cache_dir=str(tmp_path))
+    assert _entries(tmp_path) == [key + ".npz"]
+
+
+def test_default_cache_dir_independent_of_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert os.path.isabs(cluster_cache.default_cache_dir)
+    repository = os.path.dirname(os.path.dirname(os.path.abspath(cluster_cache.__file__)))
+    assert cluster_cache.default_cache_dir == os.path.join(repository, "results", "cluster_cache")
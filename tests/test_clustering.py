@@ -0,0 +1,32 @@
+import math
+
+import numpy as np
+import pytest
+
+import clustering_medoid
+
+
+def _loop_distances(values, norm):
+    """Former pairwise loop of clustering_medoid._distances (maximum norm for norm=inf)."""
+    d = np.zeros((values.shape[1], values.shape[1]))
+    for i in range(values.shape[1]):
+        for j in range(i+1, values.shape[1]):
+            if np.isinf(norm):
+                d[i, j] = np.max(np.abs(values[:, i] - values[:, j]))
+            else:
+                d[i, j] = math.pow(np.sum(np.power(np.abs(values[:, i] - values[:, j]), norm)), 1/norm)
+    return d + d.T
+
+
+@pytest.mark.parametrize("norm", [1, 2, 3, np.inf])
+@pytest.mark.parametrize("block_size", [None, 7])
+def test_distances_match_pairwise_loop(norm, block_size):
+    values = np.random.default_rng(0).random((48, 40))  # 40 days
+    d = clustering_medoid._distances(values, norm, block_size)
+    assert np.allclose(d, _loop_distances(values, norm), rtol=1e-9, atol=1e-9)
+    assert np.array_equal(d, d.T) and not np.diagonal(d).any()
+
+
+def test_distances_of_identical_days():
+    values = np.repeat(np.random.default_rng(1).random((24, 1)), 3, axis=1)
+    assert not clustering_medoid._distances(values, 2).any()
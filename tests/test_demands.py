@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pytest
+
+import demands
+
+
+def _write(input_dir, carrier, building, values):
+    path = os.path.join(input_dir, demands.file_prefixes[carrier] + building + ".txt")
+    np.savetxt(path, values)
+    return path
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    """Profiles of two buildings: "a" (heat, power, cool) and "b" (heat, power)."""
+    rng = np.random.default_rng(0)
+    for building, carriers in [("a", ["heat", "power", "cool"]), ("b", ["heat", "power"])]:
+        for carrier in carriers:
+            _write(str(tmp_path), carrier, building, rng.random(demands.n_steps))
+    return str(tmp_path)
+
+
+def test_store_round_trip(input_dir):
+    dem, missing = demands.load_demands("a", input_dir)
+    assert os.path.exists(os.path.join(input_dir, demands.store_name))
+    assert missing == ["hydrogen"]
+    for carrier in ["heat", "power", "cool"]:
+        expected = np.loadtxt(os.path.join(input_dir, demands.file_prefixes[carrier] + "a.txt"))
+        assert np.array_equal(dem[carrier], expected)
+        assert isinstance(dem[carrier], np.memmap)
+    assert not dem["hydrogen"].any()
+
+    mtime = os.stat(os.path.join(input_dir, demands.store_name)).st_mtime_ns
+    _, missing_b = demands.load_demands("b", input_dir)
+    assert missing_b == ["cool", "hydrogen"]
+    assert os.stat(os.path.join(input_dir, demands.store_name)).st_mtime_ns == mtime  # not imported again
+
+
+def test_changed_profile_is_imported_again(input_dir):
+    demands.load_demands("a", input_dir)
+    values = np.full(demands.n_steps, 2.5)
+    path = _write(input_dir, "heat", "a", values)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    dem, _ = demands.load_demands("a", input_dir)
+    assert np.array_equal(dem["heat"], values)
+
+    _write(input_dir, "hydrogen", "a", values)  # added profile
+    dem, missing = demands.load_demands("a", input_dir)
+    assert missing == [] and np.array_equal(dem["hydrogen"], values)
+
+
+def test_unknown_building(input_dir):
+    with pytest.raises(KeyError, match="c"):
+        demands.load_demands("c", input_dir)
+    assert not os.path.exists(os.path.join(input_dir, demands.store_name))
+
+
+def test_invalid_and_missing_profiles(input_dir):
+    _write(input_dir, "heat", "b", np.ones(100))
+    with pytest.raises(ValueError, match="Invalid"):
+        demands.load_demands("b", input_dir)
+    _write(input_dir, "heat", "d", np.ones(demands.n_steps))
+    with pytest.raises(ValueError, match="Missing"):
+        demands.load_demands("d", input_dir)
+    assert demands.import_demands(input_dir)["b"] == {"heat": "invalid", "power": "ok",
+                                                      "cool": "missing", "hydrogen": "missing"}
+
+
+def test_store_not_writable(input_dir):
+    store_file = os.path.join(input_dir, "read_only", demands.store_name)  # directory does not exist
+    dem, missing = demands.load_demands("a", input_dir, store_file)
+    assert missing == ["hydrogen"]
+    assert np.array_equal(dem["power"], np.loadtxt(os.path.join(input_dir, demands.file_prefixes["power"] + "a.txt")))
+    assert not os.path.exists(store_file)
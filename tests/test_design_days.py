@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import design_days
+
+
+def _inputs(seed=0):
+    """Two time series of a year made of three day types (365 x 24 hours)."""
+    rng = np.random.default_rng(seed)
+    day_types = rng.random((3, 2, 24)) * [[1], [10]]
+    sequence = np.arange(365) % 3
+    return np.concatenate([day_types[d] for d in sequence], axis=1)
+
+
+def test_design_day_sigma():
+    z = np.zeros((5, 5))
+    z[1, [0, 1, 3]] = 1
+    z[4, [2, 4]] = 1
+    assert design_days.design_day_sigma(z).tolist() == [0, 0, 1, 0, 1]
+
+
+def test_select_smallest_number_of_design_days():
+    inputs = _inputs()
+    k, (clustered_series, nc, z), scores = design_days.select_n_clusters(
+        inputs, range(1, 6), tolerances={"rmse": 1e-9, "peak": 1e-9, "duration_curve": 1e-9}, workers=1)
+    assert k == 3
+    assert sorted(nc.tolist()) == [121, 122, 122]
+    assert len(clustered_series) == 2 and clustered_series[0].shape == (3, 24)
+    assert all(np.max(errors) < 1e-9 for errors in scores[3].values())
+    assert np.max(scores[2]["rmse"]) > 1e-3
+
+
+def test_select_in_process_pool_matches_serial():
+    inputs = _inputs(1)
+    serial = design_days.select_n_clusters(inputs, range(1, 5), workers=1)
+    pool = design_days.select_n_clusters(inputs, range(1, 5), workers=2)
+    assert serial[0] == pool[0]
+    assert np.array_equal(serial[1][2], pool[1][2])
+
+
+def test_representation_errors_of_all_days():
+    inputs = _inputs(2)
+    z = np.eye(365)
+    clustered_series = [series.reshape(365, 24) for series in inputs]
+    errors = design_days.representation_errors(inputs, clustered_series, z)
+    for name in design_days.error_names:
+        assert np.max(errors[name]) == pytest.approx(0)
+
+
+def test_violations():
+    errors = {"rmse": np.array([0.1, 0.2, 0.3]), "peak": np.array([0.0, 0.05, 0.0])}
+    exceeded = design_days.violations(errors, {"rmse": 0.15, "peak": 0.1})
+    assert list(exceeded) == ["rmse"] and exceeded["rmse"].tolist() == [1, 2]
+
+
+def test_reported_errors_of_the_selected_number(capsys):
+    inputs = _inputs()
+    k, _, scores = design_days.select_n_clusters(inputs, range(1, 3), tolerances={"annual_sum": 1.0},
+                                                 report={"rmse": 1e-9}, workers=1)
+    assert k == 1 and np.max(scores[1]["rmse"]) > 1e-9
+    assert "1 design days: rmse error above 1e-09 for time series 0, 1" in capsys.readouterr().out
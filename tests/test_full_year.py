@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("gurobipy")
+
+import demands
+import load_params
+import matrix_model
+import optim_model
+
+
+@pytest.fixture(scope="module")
+def full_year_instance(input_dir):
+    return load_params.load_params("ac_sanierterzustand", "dez", ["HP", "BOI", "PV", "TES"], "highs",
+                                   full_year=True, input_dir=input_dir)
+
+
+def test_full_year_design_days(full_year_instance, input_dir):
+    param, devs, dem, _ = full_year_instance
+    assert param["full_year"] and param["n_clusters"] == 365
+    assert np.array_equal(param["day_matrix"], np.eye(365))
+    assert np.array_equal(param["sigma"], np.arange(365))
+    assert np.array_equal(param["day_weights"], np.ones(365))
+    dem_uncl, _ = demands.load_demands("ac_sanierterzustand", input_dir)
+    for k in ["heat", "cool", "power", "hydrogen"]:
+        assert dem[k].shape == (365, 24)
+        assert np.array_equal(dem[k].ravel(), dem_uncl[k])
+    assert devs["PV"]["norm_power"].shape == (365, 24)
+
+
+def test_full_year_requires_matrix_builder(full_year_instance):
+    param, devs, dem, result_dict = full_year_instance
+    with pytest.raises(ValueError, match="builder='matrix'"):
+        optim_model.run_optim(devs, param, dem, result_dict, builder="dict", solver="highs")
+
+
+def test_full_year_model_has_hourly_variables(full_year_instance):
+    param, devs, dem, _ = full_year_instance
+    param = dict(param, observation_time=10, roof_area=152, enable_supply_heat=True)
+    problem, v = matrix_model.build_hub_problem(devs, param, dem)
+    assert v["power"]["HP"].shape == (365, 24)
+    assert problem.num_vars > 8760
@@ -0,0 +1,65 @@
+import copy
+
+import numpy as np
+import pytest
+
+pytest.importorskip("gurobipy")
+
+import benchmark
+import matrix_model
+import optim_model
+import solvers
+
+
+def test_hub_model_patch_matches_rebuild(small_instance):
+    param, devs, dem, _ = small_instance
+    hub = optim_model.HubModel(devs, param, dem)
+    model = hub.model
+
+    hub.update_param(price_supply_el=param["price_supply_el"] * 1.2, observation_time=15)
+    hub._patch()
+    hub.update_device("HP", COP=np.asarray(devs["HP"]["COP"]) * 1.1, inv_var=devs["HP"]["inv_var"] * 0.8)
+    hub._patch()
+    hub.update_demand("heat", np.asarray(dem["heat"]) * 1.1)
+    hub._patch()
+    assert hub.model is model  # patched, not rebuilt
+    assert benchmark.compare_models(hub.model, optim_model.HubModel(hub.devs, hub.param, hub.dem).model) == []
+
+    hub.update_param(enable_feed_in_el=not param["enable_feed_in_el"])  # changes the structure
+    hub._patch()
+    assert hub.model is not model
+    assert benchmark.compare_models(hub.model, optim_model.HubModel(hub.devs, hub.param, hub.dem).model) == []
+
+
+def test_hub_model_ignores_unused_keys(small_instance):
+    param, devs, dem, _ = small_instance
+    hub = optim_model.HubModel(devs, param, dem)
+    trace = copy.deepcopy(hub._trace)
+    hub.update_param(unused_key=1)
+    assert hub._touched() == []
+    hub._patch()
+    assert hub._trace == trace
+
+
+def test_pareto_endpoints(tiny_instance):
+    pytest.importorskip("highspy")
+    param, devs, dem = tiny_instance
+    hub = optim_model.HubModel(devs, param, dem, prune=True, fix_binaries=True)  # LP: exact end points
+    gap, output_flag = hub.model.Params.MIPGap, hub.model.Params.OutputFlag
+    front = hub.pareto(4)
+    assert (hub.model.Params.MIPGap, hub.model.Params.OutputFlag) == (gap, output_flag)
+
+    # Cost optimum and CO2 optimum of the same model, solved independently
+    problem, v = matrix_model.build_hub_problem(devs, param, dem, prune=True)
+    problem.fix_integers()
+    tac_min = solvers.solve(problem, "highs").obj
+    problem.set_objective(v["obj"]["co2"])
+    co2_min = solvers.solve(problem, "highs").obj
+
+    assert len(front) == 4
+    assert front["tac"][-1] == pytest.approx(tac_min, rel=1e-6)
+    assert front["co2"][0] == pytest.approx(co2_min, rel=1e-6, abs=1e-6)
+    assert np.all(np.diff(front["co2"]) > 0) and np.all(np.diff(front["tac"]) < 0)
+
+    hub.optimize({}, artifact_policy="off")
+    assert hub.vars["obj"]["tac"].X == pytest.approx(tac_min, rel=1e-6)
@@ -0,0 +1,89 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import k_medoids
+
+
+def _distances(points):
+    return np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=2))
+
+
+def _cost(distances, medoids):
+    return distances[:, list(medoids)].min(axis=1).sum()
+
+
+def _brute_force(distances, number_clusters):
+    return min(_cost(distances, medoids)
+               for medoids in itertools.combinations(range(len(distances)), number_clusters))
+
+
+def _is_swap_local_optimum(distances, medoids, tol=1e-9):
+    cost = _cost(distances, medoids)
+    for i, candidate in itertools.product(range(len(medoids)), range(len(distances))):
+        if candidate in medoids:
+            continue
+        swapped = list(medoids)
+        swapped[i] = candidate
+        if _cost(distances, swapped) < cost - tol:
+            return False
+    return True
+
+
+def _check_contract(distances, y, z, obj, number_clusters):
+    medoids = np.flatnonzero(y > 0.5)
+    assert len(medoids) == number_clusters
+    assert np.allclose(z.sum(axis=0), 1)                   # every node in one cluster
+    assert np.all(z[medoids, medoids] == 1)                 # every medoid in its own cluster
+    assert np.all(z[np.flatnonzero(y < 0.5)] == 0)          # only medoids have members
+    assert obj == pytest.approx(np.sum(distances * z))
+    return medoids
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pam_is_swap_local_optimum(seed):
+    rng = np.random.default_rng(seed)
+    distances = _distances(rng.random((14, 3)))
+    y, z, obj = k_medoids.k_medoids_pam(distances, 3)
+    medoids = _check_contract(distances, y, z, obj, 3)
+    assert obj == pytest.approx(_cost(distances, medoids))
+    assert obj >= _brute_force(distances, 3) - 1e-9
+    assert _is_swap_local_optimum(distances, medoids)
+
+
+def test_pam_finds_optimum_of_separated_clusters():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0, 0], [10, 0], [0, 10], [10, 10]])
+    points = np.concatenate([center + rng.random((6, 2)) for center in centers])
+    distances = _distances(points)
+    _, _, obj = k_medoids.k_medoids_pam(distances, 4)
+    assert obj == pytest.approx(_brute_force(distances, 4))
+
+
+def test_pam_single_cluster():
+    rng = np.random.default_rng(1)
+    distances = _distances(rng.random((10, 2)))
+    y, z, obj = k_medoids.k_medoids_pam(distances, 1)
+    _check_contract(distances, y, z, obj, 1)
+    assert obj == pytest.approx(_brute_force(distances, 1))
+
+
+def test_pam_is_deterministic():
+    rng = np.random.default_rng(2)
+    distances = _distances(rng.random((30, 4)))
+    first, second = k_medoids.k_medoids_pam(distances, 5), k_medoids.k_medoids_pam(distances, 5)
+    assert np.array_equal(first[0], second[0]) and first[2] == second[2]
+
+
+@pytest.mark.parametrize("solver", ["gurobi", "highs"])
+@pytest.mark.parametrize("seed", range(3))
+def test_reduced_formulation_matches_full_mip(solver, seed):
+    pytest.importorskip("gurobipy" if solver == "gurobi" else "highspy")
+    rng = np.random.default_rng(seed)
+    distances = _distances(rng.random((12, 3)))
+    _, _, obj_full = k_medoids.k_medoids(distances, 3, mipgap=0.0, solver=solver)
+    y, z, obj = k_medoids.k_medoids_reduced(distances, 3, mipgap=0.0, solver=solver)
+    _check_contract(distances, y, z, obj, 3)
+    assert obj == pytest.approx(obj_full, rel=1e-6)
+    assert obj == pytest.approx(_brute_force(distances, 3), rel=1e-6)
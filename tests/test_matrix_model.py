@@ -0,0 +1,80 @@
+import pytest
+
+gp = pytest.importorskip("gurobipy")
+highspy = pytest.importorskip("highspy")
+
+import benchmark
+import matrix_model
+import optim_model
+import solvers
+
+
+devices = ["HP", "BOI", "PV", "TES"]
+
+
+def _solve_dict_model(devs, param, dem, path):
+    """
+    Objective value and capacities of the dict-based model. The model is solved
+    with HiGHS (via an MPS file), so that no full Gurobi license is needed.
+    """
+    model, _ = optim_model._build_dict_model(devs, param, dem)
+    optim_model._fix_binaries(model)
+    model.write(path)
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    h.readModel(path)
+    h.run()
+    assert h.getModelStatus() == highspy.HighsModelStatus.kOptimal
+    x = dict(zip(h.getLp().col_names_, h.getSolution().col_value))
+    return h.getInfo().objective_function_value, {dev: x["nominal_capacity_" + dev] for dev in matrix_model.all_devs}
+
+
+def test_builders_create_the_same_model(small_instance):
+    param, devs, dem, _ = small_instance
+    dict_model, _ = optim_model._build_dict_model(devs, param, dem)
+    matrix_gurobi, _ = matrix_model.build_gurobi_model(devs, param, dem)
+    assert benchmark.compare_models(dict_model, matrix_gurobi) == []
+
+
+def test_builders_same_objective_and_caps(small_instance, tmp_path):
+    param, devs, dem, _ = small_instance
+    obj, caps = _solve_dict_model(devs, param, dem, str(tmp_path / "dict.mps"))
+
+    problem, v = matrix_model.build_hub_problem(devs, param, dem)
+    problem.fix_integers()
+    result = solvers.solve(problem, "highs")
+    assert result.status == "optimal"
+    values = matrix_model.solution_values(v, result.x)
+
+    assert result.obj == pytest.approx(obj, rel=1e-7)
+    for dev in matrix_model.all_devs:
+        assert values["cap"][dev] == pytest.approx(caps[dev], rel=1e-6, abs=1e-6)
+    assert all(caps[dev] > 0 for dev in devices)
+
+
+def test_pruned_model_same_objective(small_instance):
+    param, devs, dem, _ = small_instance
+    objectives = []
+    for prune in [False, True]:
+        problem, _ = matrix_model.build_hub_problem(devs, param, dem, prune)
+        problem.fix_integers()
+        objectives.append(solvers.solve(problem, "highs").obj)
+    assert objectives[1] == pytest.approx(objectives[0], rel=1e-7)
+
+
+
+@pytest.mark.parametrize("solver", solvers.solver_names)
+def test_fixed_binaries_lp_same_objective(tiny_instance, solver):
+    param, devs, dem = tiny_instance
+    results = []
+    for fix_binaries in [False, True]:
+        problem, v = matrix_model.build_hub_problem(devs, param, dem, prune=True)
+        if fix_binaries:
+            problem.fix_integers()
+        assert problem.is_mip() != fix_binaries
+        result = solvers.solve(problem, solver, mip_gap=0)
+        assert result.status == "optimal"
+        results.append((result.obj, matrix_model.solution_values(v, result.x)["cap"]))
+    (mip_obj, mip_caps), (lp_obj, lp_caps) = results
+    assert lp_obj == pytest.approx(mip_obj, rel=1e-7)
+    assert lp_caps == pytest.approx(mip_caps, rel=1e-6, abs=1e-6)
@@ -0,0 +1,53 @@
+import copy
+
+import pytest
+
+pytest.importorskip("highspy")
+
+import benchmark
+import bounds
+import matrix_model
+import optim_model
+import portfolio
+
+options = {"builder": "matrix", "prune": True, "solver": "highs", "artifact_policy": "off"}
+
+
+@pytest.fixture(scope="module")
+def bounded_instance(tiny_instance):
+    """tiny_instance with estimated capacity bounds (small big-M values of the purchase decisions)."""
+    param, devs, dem = tiny_instance
+    devs, param = bounds.apply_bounds(devs, param, bounds.estimate_bounds(devs, param, dem))
+    return param, devs, dem
+
+
+def _tac(result_dict):
+    return result_dict["Total Costs"]["Total annualized costs"]
+
+
+def test_dict_and_matrix_builder_same_free_portfolio_model(small_instance):
+    param, devs, dem, _ = small_instance
+    devs = portfolio.set_min_sizes(copy.deepcopy(devs), param)
+    param = dict(param, free_portfolio=True)
+    dict_model, _ = optim_model._build_dict_model(devs, param, dem)
+    matrix_gurobi, _ = matrix_model.build_gurobi_model(devs, param, dem)
+    assert benchmark.compare_models(dict_model, matrix_gurobi) == []
+
+
+def test_installed_devices_have_minimum_size(bounded_instance):
+    param, devs, dem = bounded_instance
+    result = portfolio.run_portfolio(devs, param, dem, {}, **options)
+    assert portfolio.below_min_size(result) == []
+    assert "TES" not in result["Devices"]  # below the minimum volume of 5 m3 in the fixed portfolio
+    assert _tac(result) >= _tac(optim_model.run_optim(devs, param, dem, {}, **options))
+
+
+def test_fixed_costs_exclude_a_device(bounded_instance):
+    param, devs, dem = bounded_instance
+    expensive = copy.deepcopy(devs)
+    expensive["PV"]["inv_fix"] = 1e5
+    without = copy.deepcopy(devs)
+    without["PV"]["feasible"] = False
+    result = portfolio.run_portfolio(expensive, param, dem, {}, **options)
+    assert "PV" not in result["Devices"]
+    assert _tac(result) == _tac(portfolio.run_portfolio(without, param, dem, {}, **options))
@@ -0,0 +1,47 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("gurobipy")
+
+import benchmark
+import profiles
+import weather
+
+
+@pytest.fixture(scope="module")
+def weather_series(input_dir):
+    data = weather.load_weather(os.path.join(input_dir, "DEU_Dusseldorf.104000_IWEC.epw"), store=False)
+    with open(os.path.join(input_dir, "devs_ref.json"), "r") as file:
+        devs = json.load(file)
+    return devs, {name: np.array(data[name]) for name in weather.series_names}
+
+
+@pytest.mark.parametrize("shape", [(12, 24), (365, 24), (8760,)])
+def test_profiles_match_loops(weather_series, shape):
+    devs, series = weather_series
+    data = {name: values[:int(np.prod(shape))].reshape(shape) for name, values in series.items()}
+    COP_loop, WT_loop = benchmark._loop_profiles(devs, data["T_air"], data["wind_speed"])
+    result = profiles.device_profiles(devs, data["T_air"], data["GHI"], data["DHI"], data["wind_speed"])
+    assert all(values.shape == shape for values in result.values())
+    assert np.array_equal(result["COP_HP"], COP_loop)
+    assert np.allclose(result["norm_power_WT"], WT_loop, rtol=1e-12, atol=1e-12)
+
+
+def test_profiles_independent_of_shape(weather_series):
+    devs, series = weather_series
+    year = profiles.device_profiles(devs, series["T_air"], series["GHI"], series["DHI"], series["wind_speed"])
+    days = profiles.device_profiles(devs, *(series[name].reshape(365, 24) for name in
+                                            ["T_air", "GHI", "DHI", "wind_speed"]))
+    for name in year:
+        assert np.array_equal(days[name].ravel(), year[name]), name
+    assert np.all(year["norm_power_PV"] >= 0) and np.max(year["norm_power_PV"]) > 0.5
+
+
+def test_wind_turbine_power_curve():
+    speeds = np.array([0, 2.4, 2.75, 14, 25, 25.05, 30])
+    power = profiles.wt_norm_power(speeds, hub_h=1, ref_h=1, h_coeff=0)
+    expected = np.array([0, 0, (1.14 + 4.37) / 2, 500, 500, 250, 0]) / profiles.wt_rated_power
+    assert np.allclose(power, expected)
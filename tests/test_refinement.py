@@ -0,0 +1,39 @@
+import copy
+
+import numpy as np
+import pytest
+
+pytest.importorskip("highspy")
+
+import matrix_model
+import refinement
+import solvers
+
+
+def test_warm_start_vector_of_the_same_design_days(small_instance):
+    param, devs, dem, _ = small_instance
+    problem, v = matrix_model.build_hub_problem(devs, param, dem)
+    problem.fix_integers()
+    result = solvers.solve(problem, "highs")
+    warm_start = matrix_model.WarmStart()
+    assert warm_start.vector(problem, v, param) is None
+
+    warm_start.store(matrix_model.solution_values(v, result.x), param)
+    start = warm_start.vector(problem, v, param)
+    assert np.allclose(start, np.clip(result.x, problem.lb, problem.ub))
+
+
+def test_warm_started_refinement_same_objective(tiny_instance):
+    # Every step solves the same one-design-day model (small enough for the size-limited Gurobi license)
+    def load(n_clusters):
+        return copy.deepcopy(tiny_instance) + ({},)
+
+    history = {}
+    for warm_start in [False, True]:
+        refined = refinement.refine(load, k_start=1, k_step=1, k_max=3, warm_start=warm_start,
+                                    solver="gurobi", prune=True)
+        assert refined["converged"] and refined["n_clusters"] == 2
+        history[warm_start] = refined["history"]
+    for cold, warm in zip(history[False], history[True]):
+        assert warm["tac"] == cold["tac"]
+        assert warm["caps"] == pytest.approx(cold["caps"])
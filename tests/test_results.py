@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+gp = pytest.importorskip("gurobipy")
+
+import matrix_model
+import optim_model
+
+
+def _naive(block):
+    """Solution values by a Python loop over the variables."""
+    if isinstance(block, dict):
+        return np.array([[var.X for var in day.values()] for day in block.values()])
+    if hasattr(block, "getValue"):
+        return block.getValue()
+    block = np.asarray(block)
+    if block.dtype != object:
+        return block.astype(float)
+    return np.vectorize(lambda var: var.X, otypes=[float])(block)
+
+
+def test_block_values():
+    rng = np.random.default_rng(0)
+    values = rng.random((3, 24))
+    model = gp.Model()
+    model.Params.OutputFlag = 0
+    array_block = model.addMVar((3, 24), lb=values, ub=values).tolist()
+    dict_block = {d: {t: model.addVar(lb=values[d, t], ub=values[d, t]) for t in range(24)} for d in range(3)}
+    scalar = model.addVar(lb=2.5, ub=2.5)
+    model.optimize()
+
+    for block in [np.array(array_block, dtype=object), dict_block]:
+        assert np.array_equal(optim_model._block_values(model, block), values)
+    assert optim_model._block_values(model, np.array(scalar, dtype=object)) == 2.5
+    assert np.array_equal(optim_model._block_values(model, np.zeros((3, 24))), np.zeros((3, 24)))
+
+
+def test_solution_values_match_variable_loop(tiny_instance):
+    param, devs, dem = tiny_instance
+    hub = optim_model.HubModel(devs, param, dem, prune=True)
+    hub.model.Params.OutputFlag = 0
+    hub.model.optimize()
+    values = optim_model._solution_values(hub.model, hub.vars)
+    assert set(values) == set(hub.vars)
+    for key, block in hub.vars.items():
+        if isinstance(block, dict):
+            for dev in block:
+                assert np.allclose(values[key][dev], _naive(block[dev]), rtol=0, atol=1e-12), (key, dev)
+        else:
+            assert values[key] == block.X, key
+    assert values["soc"]["TES"].shape == (365, 24)
+
+
+def test_weighted_sum_in_loop_order():
+    rng = np.random.default_rng(1)
+    series, weights = rng.random((12, 24)) * 1e3, rng.integers(1, 60, 12)
+    expected = 0
+    for d in range(12):
+        expected += sum(series[d][t] for t in range(24)) * weights[d]
+    assert optim_model._weighted_sum(series, weights) == expected
@@ -0,0 +1,23 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import run_metrics
+
+resource = pytest.importorskip("resource")
+
+
+@pytest.mark.parametrize("platform, maxrss", [("linux", 512 * 1024), ("darwin", 512 * 1024 ** 2)])
+def test_peak_memory_units(monkeypatch, platform, maxrss):
+    monkeypatch.setattr(sys, "platform", platform)
+    monkeypatch.setattr(resource, "getrusage", lambda who: SimpleNamespace(ru_maxrss=maxrss))
+    assert run_metrics.peak_memory() == 512
+
+
+def test_phases():
+    metrics = run_metrics.RunMetrics()
+    metrics.lap("build")
+    metrics.lap("solve")
+    assert list(metrics) == ["build", "solve"]
+    assert all(metrics[phase]["time"] >= 0 and metrics[phase]["peak_memory_MB"] > 0 for phase in metrics)
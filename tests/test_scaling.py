@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("highspy")
+
+import matrix_model
+import scaling
+import solvers
+
+
+@pytest.fixture(scope="module")
+def problem(small_instance):
+    param, devs, dem, _ = small_instance
+    problem, _ = matrix_model.build_hub_problem(devs, param, dem)
+    problem.fix_integers()
+    return problem
+
+
+def test_scaled_matrix(problem):
+    A = problem.A.copy()
+    scaled, col_scale, obj_scale = scaling.scale_problem(problem)
+    assert (problem.A != A).nnz == 0  # the problem is not changed
+
+    exponents = np.log10(col_scale)
+    assert np.array_equal(exponents, np.round(exponents))
+    assert np.all(col_scale[problem.vtype != "C"] == 1)
+    for start, stop in problem.var_blocks:
+        assert np.all(col_scale[start:stop] == col_scale[start])
+
+    # A' x' = R A C x' with row factors R that are powers of ten
+    x = np.random.default_rng(0).random(problem.num_vars)
+    lhs, scaled_lhs = problem.A @ (col_scale * x), scaled.A @ x
+    rows = np.abs(lhs) > 1e-9
+    row_scale = scaled_lhs[rows] / lhs[rows]
+    assert np.allclose(np.log10(row_scale), np.round(np.log10(row_scale)))
+    assert np.allclose(scaled.obj * obj_scale, problem.obj * col_scale)
+
+    ranges, scaled_ranges = scaling.coefficient_ranges(problem), scaling.coefficient_ranges(scaled)
+    assert scaled_ranges["matrix"][1] / scaled_ranges["matrix"][0] < ranges["matrix"][1] / ranges["matrix"][0]
+
+
+def test_scaled_solve_same_objective(problem):
+    result = solvers.solve(problem, "highs")
+    scaled = solvers.solve(problem, "highs", scale=True)
+    assert scaled.status == "optimal"
+    assert scaled.obj == pytest.approx(result.obj, rel=1e-6)
+
+    # The unscaled solution is feasible in the original units
+    lhs = problem.A @ scaled.x
+    tol = 1e-5 * np.maximum(1, np.abs(problem.rhs))
+    sense = problem.sense
+    assert np.all(lhs[sense == "<"] <= problem.rhs[sense == "<"] + tol[sense == "<"])
+    assert np.all(lhs[sense == ">"] >= problem.rhs[sense == ">"] - tol[sense == ">"])
+    assert np.all(np.abs(lhs[sense == "="] - problem.rhs[sense == "="]) <= tol[sense == "="])
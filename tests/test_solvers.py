@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import solvers
+from run_metrics import RunMetrics
+from sparse_model import LinearProblem
+
+
+def _problem():
+    # min -x - 2y  s.t.  x + y <= 4,  x + 3y <= 6,  x, y >= 0  ->  x = 3, y = 1
+    p = LinearProblem("lp")
+    x = p.add_var((2,), name=["x", "y"])
+    p.add_constr(x[0] + x[1], "<", 4)
+    p.add_constr(x[0] + x[1] * 3, "<", 6)
+    p.set_objective(x[0] * -1 - x[1] * 2)
+    return p
+
+
+@pytest.mark.parametrize("solver", solvers.solver_names)
+@pytest.mark.parametrize("scale", [False, True])
+def test_solve_records_model_and_solve_phases(solver, scale):
+    pytest.importorskip({"gurobi": "gurobipy", "highs": "highspy"}[solver])
+    metrics = RunMetrics()
+    metrics.lap("build")
+    result = solvers.solve(_problem(), solver, scale=scale, metrics=metrics)
+
+    assert result.status == "optimal"
+    assert np.allclose(result.x, [3, 1]) and np.isclose(result.obj, -5)
+    assert result.metrics is metrics
+    assert list(metrics) == ["build", "model", "solve"]
+    assert result.runtime == metrics["solve"]["time"]
+    assert all(metrics[phase]["time"] >= 0 for phase in metrics)
+
+
+def test_solve_without_metrics():
+    pytest.importorskip("highspy")
+    result = solvers.solve(_problem(), "highs")
+    assert list(result.metrics) == ["model", "solve"]
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from sparse_model import LinearProblem, LinExpr, Var
+
+
+def _blocks():
+    """Variable blocks a (3 x 4), b (4) and s (scalar), random values x of all columns."""
+    p = LinearProblem()
+    a, b, s = p.add_var((3, 4)), p.add_var((4,)), p.add_var()
+    x = np.random.default_rng(0).normal(size=p.num_vars)
+    return p, a, b, s, x
+
+
+# The same arithmetic on Var blocks (LinExpr) and on their values (numpy arrays)
+@pytest.mark.parametrize("expression", [
+    lambda a, b, s: a + b,
+    lambda a, b, s: a - b * 2 + 1,
+    lambda a, b, s: 3 - a,
+    lambda a, b, s: -a + s,
+    lambda a, b, s: np.arange(4.0) + a,
+    lambda a, b, s: np.arange(4.0) - b,
+    lambda a, b, s: a * np.array([[1.0], [2.0], [3.0]]),
+    lambda a, b, s: (a - b) / 4,
+    lambda a, b, s: a[:, 1:] - a[:, :-1] * 0.9,
+    lambda a, b, s: a[[2, 0, 2]] + b[1],
+    lambda a, b, s: (a + b).sum(),
+    lambda a, b, s: (a * 2 + b).sum(axis=0),
+    lambda a, b, s: (a - s).sum(axis=1),
+    lambda a, b, s: (a + b).sum(axis=0) * 0.5 - a,  # broadcasting of rows with several terms
+])
+def test_expression_values(expression):
+    _, a, b, s, x = _blocks()
+    expr = expression(a, b, s)
+    assert isinstance(expr, LinExpr)
+    value = expression(x[a.idx], x[b.idx], x[s.idx])
+    assert expr.shape == np.shape(value)
+    assert np.allclose(expr.value(x), value)
+
+
+def test_var_indexing():
+    _, a, _, _, _ = _blocks()
+    assert isinstance(a[1], Var) and a[1].shape == (4,)
+    assert a[:, 2].idx.tolist() == [2, 6, 10]
+    assert int(a[2, 3].idx) == 11
+
+
+def test_constraint_rows():
+    p, a, b, s, x = _blocks()
+    rows_le = p.add_constr(a - b, "<", 1, name="le")
+    rows_eq = p.add_constr(a.sum(axis=1) + s * 2, "=", np.array([1.0, 2.0, 3.0]), name="eq")
+    assert rows_le.shape == (3, 4) and rows_eq.tolist() == [12, 13, 14]
+    assert list(p.blocks) == ["le", "eq"]
+    assert p.sense.tolist() == ["<"] * 12 + ["="] * 3
+
+    lhs = p.A @ x
+    xa, xb, xs = x[a.idx], x[b.idx], x[s.idx]
+    assert np.allclose(lhs[rows_le], xa - xb) and np.allclose(p.rhs[rows_le], 1)
+    assert np.allclose(lhs[rows_eq], xa.sum(axis=1) + 2 * xs) and np.allclose(p.rhs[rows_eq], [1, 2, 3])
+    with pytest.raises(ValueError):
+        p.add_constr(a, "<", 0, name="le")
+
+
+def test_constants_move_to_rhs():
+    p = LinearProblem()
+    y = p.add_var((2,))
+    rows = p.add_constr(y * 2 + 3, ">", np.array([5.0, 7.0]))
+    assert np.allclose(p.rhs[rows], [2, 4])
+    assert np.allclose(p.A.toarray(), 2 * np.eye(2))
+
+
+def test_objective():
+    p, a, b, s, x = _blocks()
+    p.set_objective(a.sum() * 2 - b[0] + s + 5)
+    expected = 2 * x[a.idx].sum() - x[b.idx][0] + x[s.idx]
+    assert np.isclose(p.obj @ x, expected)
+
+
+def test_fix_integers():
+    p = LinearProblem()
+    on = p.add_var(vtype="B")       # fixed to 1
+    off = p.add_var(vtype="B")      # fixed to 0
+    free = p.add_var(vtype="B")     # only bounded by an inequality
+    half = p.add_var(vtype="B")     # equality with a fractional value is not a fixing
+    count = p.add_var(vtype="I", ub=10)  # 2 * count == 4
+    cap = p.add_var(ub=100)
+    p.add_constr(on, "=", 1)
+    p.add_constr(off, "=", 0)
+    p.add_constr(cap - free * 100, "<", 0)
+    p.add_constr(half, "=", 0.5)
+    p.add_constr(count * 2, "=", 4)
+    p.add_constr(on + cap, "=", 3)  # two entries: not a fixing row
+    assert p.is_mip()
+
+    fixed = p.fix_integers()
+    assert sorted(fixed.tolist()) == sorted(int(var.idx) for var in [on, off, count])
+    assert p.vtype.tolist() == ["C", "C", "B", "B", "C", "C"]
+    assert p.lb.tolist() == [1, 0, 0, 0, 2, 0]
+    assert p.ub.tolist() == [1, 0, np.inf, np.inf, 2, 100]
+    assert p.is_mip()
+
+    p2 = LinearProblem()
+    x = p2.add_var((3,), vtype="B")
+    p2.add_constr(x, "=", np.array([1.0, 0.0, 1.0]))
+    p2.fix_integers()
+    assert not p2.is_mip()
@@ -0,0 +1,40 @@
+import copy
+
+import pytest
+
+pytest.importorskip("highspy")
+
+import matrix_model
+import solvers
+
+
+def _solve(devs, param, dem, storage_model):
+    devs = copy.deepcopy(devs)
+    for dev in matrix_model.storage_devs:
+        devs[dev]["storage_model"] = storage_model
+        devs[dev]["sto_loss"] = 0.0
+    problem, v = matrix_model.build_hub_problem(devs, param, dem, prune=True)
+    problem.fix_integers()
+    result = solvers.solve(problem, "highs")
+    assert result.status == "optimal"
+    return problem, matrix_model.solution_values(v, result.x), result.obj
+
+
+def test_superposition_same_objective_as_chain(small_instance):
+    param, devs, dem, _ = small_instance
+    chain, chain_values, chain_obj = _solve(devs, param, dem, "chain")
+    superposition, values, obj = _solve(devs, param, dem, "superposition")
+    assert superposition.num_vars < chain.num_vars
+    assert obj == pytest.approx(chain_obj, rel=1e-7)
+    assert values["cap"]["TES"] == pytest.approx(chain_values["cap"]["TES"], rel=1e-6)
+    assert values["cap"]["TES"] > 1  # the storage is used
+    assert values["soc"]["TES"].shape == chain_values["soc"]["TES"].shape == (365, 24)
+    assert values["soc"]["TES"].min() >= -1e-6 and values["soc"]["TES"].max() <= values["cap"]["TES"] + 1e-6
+
+
+def test_unknown_storage_model(small_instance):
+    param, devs, dem, _ = small_instance
+    devs = copy.deepcopy(devs)
+    devs["TES"]["storage_model"] = "seasonal"
+    with pytest.raises(ValueError, match="seasonal"):
+        matrix_model.build_hub_problem(devs, param, dem)
@@ -0,0 +1,73 @@
+import csv
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import weather
+
+epw_name = "DEU_Dusseldorf.104000_IWEC.epw"
+
+
+@pytest.fixture
+def weather_file(input_dir, tmp_path):
+    path = tmp_path / epw_name
+    shutil.copy(os.path.join(input_dir, epw_name), path)
+    return str(path)
+
+
+def _naive_epw(weather_file):
+    """Row-by-row parse of the hourly data as in the original load_params."""
+    with open(weather_file, newline="", errors="ignore") as file:
+        rows = [row for row in csv.reader(file) if row[0][:1].isdigit()]
+    return {name: np.array([float(row[col]) for row in rows]) for name, col in zip(weather.series_names,
+                                                                                   weather.epw_columns)}
+
+
+def test_read_epw(weather_file):
+    data = weather.read_epw(weather_file)
+    naive = _naive_epw(weather_file)
+    for name in weather.series_names:
+        assert data[name].shape == (8760,)
+        assert np.array_equal(data[name], naive[name])
+    assert (data["timezone"], data["altitude"]) == (1.0, 44.0)  # LOCATION header
+
+
+def test_store_round_trip(weather_file):
+    parsed = weather.load_weather(weather_file, store=False)
+    assert not os.path.exists(weather_file + ".npy")
+
+    first = weather.load_weather(weather_file)
+    assert os.path.exists(weather_file + ".npy")
+    second = weather.load_weather(weather_file)
+    assert isinstance(second["T_air"], np.memmap)
+    for data in [first, second]:
+        assert set(data) == set(parsed)
+        for name in parsed:
+            assert np.array_equal(data[name], parsed[name])
+
+
+def test_stale_store_is_written_again(weather_file):
+    weather.load_weather(weather_file)
+    with open(weather_file, newline="", errors="ignore") as file:
+        lines = file.read().splitlines(keepends=True)
+    row = next(i for i, line in enumerate(lines) if line[:1].isdigit())
+    columns = lines[row].split(",")
+    columns[weather.epw_columns[0]] = "42.0"
+    lines[row] = ",".join(columns)
+    with open(weather_file, "w", newline="") as file:
+        file.writelines(lines)
+
+    data = weather.load_weather(weather_file)
+    assert data["T_air"][0] == 42.0
+    assert weather.load_weather(weather_file)["T_air"][0] == 42.0
+
+
+def test_store_not_writable(weather_file, monkeypatch):
+    def fail(*args):
+        raise PermissionError("read-only")
+    monkeypatch.setattr(weather, "_write_store", fail)
+    data = weather.load_weather(weather_file)
+    assert not os.path.exists(weather_file + ".npy")
+    assert np.array_equal(data["GHI"], weather.read_epw(weather_file)["GHI"])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from year_series import YearSeries, days_sum, month_tuple
+
+
+def _series(seed=0):
+    """YearSeries with two design day series and one full-year series, and the naive hourly expansion."""
+    rng = np.random.default_rng(seed)
+    design_days = {"heat_HP": rng.random((6, 24)), "power_HP": rng.random((6, 24)), "heat_BOI": rng.random((6, 24))}
+    sigma = rng.integers(0, 5, 365)  # design day 5 is not used
+    full_year = {"soc_TES": rng.random((365, 24))}
+    naive = {item: np.concatenate([series[day] for day in sigma]) for item, series in design_days.items()}
+    naive["soc_TES"] = full_year["soc_TES"].ravel()
+    return YearSeries(design_days, sigma, full_year), naive
+
+
+def test_hourly_values():
+    full, naive = _series()
+    assert set(full) == set(naive) and len(full) == 4
+    for item in naive:
+        assert full[item].shape == (8760,)
+        assert np.array_equal(full[item], naive[item])
+
+
+@pytest.mark.parametrize("item", ["heat_HP", "soc_TES"])
+def test_month(item):
+    full, naive = _series()
+    for month in range(12):
+        expected = naive[item][24 * days_sum[month]:24 * days_sum[month + 1]]
+        assert np.array_equal(full.month(item, month), expected)
+        assert np.array_equal(full.month(item, month_tuple[month]), expected)
+
+
+@pytest.mark.parametrize("item", ["heat_HP", "soc_TES"])
+def test_window(item):
+    full, naive = _series()
+    rng = np.random.default_rng(1)
+    windows = [(0, 8760), (0, 1), (8759, 8760), (23, 25), (24, 48), (100, 100)]
+    windows += [tuple(sorted(rng.integers(0, 8761, 2))) for _ in range(50)]
+    for start, stop in windows:
+        assert np.array_equal(full.window(item, start, stop), naive[item][start:stop]), (start, stop)
+
+
+@pytest.mark.parametrize("item", ["heat_HP", "soc_TES"])
+def test_sums_and_peak(item):
+    full, naive = _series()
+    assert full.sum(item) == pytest.approx(naive[item].sum())
+    monthly = full.monthly_sum(item)
+    assert list(monthly) == list(month_tuple)
+    for month in range(12):
+        expected = naive[item][24 * days_sum[month]:24 * days_sum[month + 1]].sum()
+        assert monthly[month_tuple[month]] == pytest.approx(expected)
+    assert full.peak(item) == naive[item].max()
+
+
+def test_peak_ignores_unused_design_days():
+    full = YearSeries({"heat_HP": np.array([[1.0] * 24, [5.0] * 24])}, np.zeros(365, dtype=int))
+    assert full.peak("heat_HP") == 1.0
+
+
+def test_device_view():
+    full, naive = _series()
+    view = full.device("HP")
+    assert sorted(view) == ["heat_HP", "power_HP"]
+    assert np.array_equal(view.month("power_HP", "Feb"), full.month("power_HP", "Feb"))
+    assert list(full.device("TES")) == ["soc_TES"]